@@ -0,0 +1,100 @@
+# scripts/benchmark_data_cleaner.py
+
+import logging
+import re
+import time
+import numpy as np
+import pandas as pd
+from benchmark_feature_extraction import generate_urls
+from utils.data_cleaner import clean_url_series
+from utils.logger import get_logger
+
+logger = get_logger("DataCleanerBenchmark")
+
+def generate_corpus(n_urls, invalid_ratio=0.05, seed=42):
+    """
+    Generates a synthetic URL feed with mixed case, padding, unwanted characters and a share of invalid entries.
+
+    Args:
+        n_urls (int): Number of URLs to generate.
+        invalid_ratio (float): Fraction of entries that are not valid URLs.
+        seed (int): Random seed for reproducibility.
+
+    Returns:
+        list: Raw URLs.
+    """
+    rng = np.random.default_rng(seed)
+    urls = generate_urls(n_urls, seed=seed)
+    for index in rng.choice(n_urls, size=n_urls // 4, replace=False):
+        urls[index] = f"  {urls[index].upper()}?id={index}&ref=feed "
+    for index in rng.choice(n_urls, size=int(n_urls * invalid_ratio), replace=False):
+        urls[index] = f"not a url {index}"
+    return urls
+
+def clean_urls_loop(urls):
+    """
+    Baseline: the original per-URL cleaning loop, compiling the validation regex on every call
+    and logging one warning per invalid URL (to a discarded handler, so only the logging cost counts).
+    """
+    baseline_logger = logging.getLogger("DataCleanerBaseline")
+    baseline_logger.propagate = False
+    baseline_logger.handlers = [logging.NullHandler()]
+
+    cleaned_urls = []
+    for url in urls:
+        url = re.sub(r"[^\w\s:/.-]", "", url.strip()).lower()
+        regex = re.compile(
+            r'^(?:http|ftp)s?://'
+            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'
+            r'localhost|'
+            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'
+            r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'
+            r'(?::\d+)?'
+            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+        if re.match(regex, url) is not None:
+            cleaned_urls.append(url)
+        else:
+            baseline_logger.warning(f"Invalid URL removed: {url}")
+    return cleaned_urls
+
+def benchmark_data_cleaner(n_urls=1_000_000):
+    """
+    Compares the per-URL cleaning loop with the vectorized clean_url_series on an object
+    Series and, when pyarrow is installed, on an Arrow-backed string Series.
+
+    Args:
+        n_urls (int): Size of the synthetic corpus.
+
+    Returns:
+        dict: URLs/sec per implementation.
+    """
+    urls = generate_corpus(n_urls)
+    results = {}
+
+    start = time.perf_counter()
+    reference = clean_urls_loop(urls)
+    elapsed = time.perf_counter() - start
+    results["loop"] = n_urls / elapsed
+    logger.info(f"Per-URL loop: {results['loop']:,.0f} URLs/sec ({elapsed:.2f}s)")
+
+    inputs = {"series": pd.Series(urls, dtype=object)}
+    try:
+        inputs["arrow"] = pd.Series(urls, dtype="string[pyarrow]")
+    except ImportError:
+        logger.info("pyarrow not installed, skipping the Arrow-backed run.")
+
+    for name, series in inputs.items():
+        start = time.perf_counter()
+        cleaned, report = clean_url_series(series)
+        elapsed = time.perf_counter() - start
+        results[name] = n_urls / elapsed
+
+        assert cleaned.tolist() == reference, f"{name} output differs from the per-URL loop"
+        logger.info(f"Vectorized ({name}): {results[name]:,.0f} URLs/sec ({elapsed:.2f}s), "
+                    f"speedup {results[name] / results['loop']:.1f}x, {report['invalid']} invalid URLs")
+
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_data_cleaner()
@@ -0,0 +1,73 @@
+# scripts/benchmark_feature_extraction.py
+
+import random
+import string
+import time
+import numpy as np
+from multiprocessing import Queue
+from agents.feature_extraction_agent import FeatureExtractionAgent
+from utils.logger import get_logger
+
+logger = get_logger("FeatureExtractionBenchmark")
+
+def generate_urls(n_urls, seed=42):
+    """
+    Generates synthetic URLs of varying length for benchmarking.
+
+    Args:
+        n_urls (int): Number of URLs to generate.
+        seed (int): Random seed for reproducibility.
+
+    Returns:
+        list: Synthetic URLs.
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    urls = []
+    for _ in range(n_urls):
+        host = "".join(rng.choices(alphabet, k=rng.randint(4, 16)))
+        path = "/".join("".join(rng.choices(alphabet, k=rng.randint(2, 10))) for _ in range(rng.randint(0, 5)))
+        urls.append(f"http://{host}.com/{path}")
+    return urls
+
+def benchmark_feature_extraction(n_urls=256, batch_sizes=(8, 32, 64), models=None):
+    """
+    Compares per-URL and batched feature extraction throughput on CPU and checks
+    that both paths produce the same vectors.
+
+    Args:
+        n_urls (int): Number of synthetic URLs to extract features for.
+        batch_sizes (tuple): Batch sizes to benchmark.
+        models (dict): Optional pre-built feature-extraction pipelines (defaults to the agent's ensemble).
+
+    Returns:
+        dict: URLs/sec per configuration ('per_url' and one entry per batch size).
+    """
+    urls = generate_urls(n_urls)
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=models)
+    agent.cache = None  # Measure inference, not cache hits
+    results = {}
+
+    agent.batched = False
+    start = time.perf_counter()
+    reference = agent.extract_features(urls)
+    elapsed = time.perf_counter() - start
+    results["per_url"] = n_urls / elapsed
+    logger.info(f"Per-URL: {results['per_url']:.1f} URLs/sec ({elapsed:.2f}s)")
+
+    agent.batched = True
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        features = agent.extract_features(urls, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        results[batch_size] = n_urls / elapsed
+
+        max_diff = float(np.max(np.abs(reference - features)))
+        logger.info(f"Batch size {batch_size}: {results[batch_size]:.1f} URLs/sec ({elapsed:.2f}s), "
+                    f"speedup {results[batch_size] / results['per_url']:.1f}x, max abs diff {max_diff:.2e}")
+
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_feature_extraction()
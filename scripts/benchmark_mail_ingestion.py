@@ -0,0 +1,89 @@
+# scripts/benchmark_mail_ingestion.py
+
+import email
+import imaplib
+import os
+import sys
+import tempfile
+import time
+from bs4 import BeautifulSoup
+from utils.mail_fetcher import IncrementalMailFetcher
+from utils.logger import get_logger
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+from imap_stand_in import ImapStandIn, make_message  # Local IMAP server shared with the tests
+
+logger = get_logger("MailIngestionBenchmark")
+
+def collect_per_message(port, n_messages):
+    """
+    The previous collector: search ALL, fetch each full RFC822 message on its own and parse
+    its HTML parts with BeautifulSoup's html.parser.
+    """
+    mail = imaplib.IMAP4("127.0.0.1", port)
+    mail.login("user", "password")
+    mail.select("inbox")
+    result, data = mail.search(None, "ALL")
+    urls = []
+    for email_id in data[0].split()[-n_messages:]:
+        result, message_data = mail.fetch(email_id, "(RFC822)")
+        for response_part in message_data:
+            if isinstance(response_part, tuple):
+                msg = email.message_from_bytes(response_part[1])
+                for part in msg.walk():
+                    if part.get_content_type() == "text/html":
+                        soup = BeautifulSoup(part.get_payload(decode=True), 'html.parser')
+                        urls += [a['href'] for a in soup.find_all('a', href=True)]
+    mail.logout()
+    return urls
+
+def benchmark_mail_ingestion(n_messages=3000, n_links=20, attachment_bytes=32768, batch_size=200):
+    """
+    Ingests a large mailbox from the local IMAP stand-in with the per-message collector and with
+    IncrementalMailFetcher, then times a second, incremental pass with a few new messages.
+
+    Args:
+        n_messages (int): Messages in the mailbox fixture.
+        n_links (int): Links in each message's HTML part.
+        attachment_bytes (int): Size of the PDF attached to each message.
+        batch_size (int): Messages per batched FETCH.
+
+    Returns:
+        dict: Collector -> seconds, messages per second, URLs and message bytes sent by the server.
+    """
+    server = ImapStandIn({uid: make_message(uid, n_links, attachment_bytes) for uid in range(1, n_messages + 1)}).start()
+    results = {}
+    try:
+        start = time.perf_counter()
+        urls = collect_per_message(server.port, n_messages)
+        results["per-message RFC822 + html.parser"] = (time.perf_counter() - start, n_messages, len(urls), server.body_bytes)
+
+        with tempfile.TemporaryDirectory() as directory:
+            fetcher = IncrementalMailFetcher("127.0.0.1", "user", "password", port=server.port, use_ssl=False,
+                                             batch_size=batch_size, initial_messages=n_messages,
+                                             state_path=os.path.join(directory, "email.json"))
+            server.body_bytes = 0
+            start = time.perf_counter()
+            urls = fetcher.fetch_links()
+            results["batched UID FETCH + regex"] = (time.perf_counter() - start, n_messages, len(urls), server.body_bytes)
+
+            for uid in range(n_messages + 1, n_messages + 11):
+                server.mailbox[uid] = make_message(uid, n_links, attachment_bytes)
+            server.body_bytes = 0
+            start = time.perf_counter()
+            urls = fetcher.fetch_links()
+            results["incremental (10 new)"] = (time.perf_counter() - start, 10, len(urls), server.body_bytes)
+            fetcher.close()
+    finally:
+        server.stop()
+
+    report = {}
+    for name, (seconds, messages, n_urls, body_bytes) in results.items():
+        report[name] = {"seconds": seconds, "messages_per_second": messages / seconds, "urls": n_urls, "bytes": body_bytes}
+        logger.info(f"{name:<36}{seconds:>8.2f}s{messages / seconds:>10,.0f} msg/s{n_urls:>10,} URLs"
+                    f"{body_bytes / 2**20:>10.1f} MiB")
+    return report
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_mail_ingestion()
@@ -0,0 +1,53 @@
+# scripts/benchmark_model_backends.py
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from benchmark_sparse_training import generate_labeled_urls
+from utils.model_backends import MODEL_BACKENDS, train_and_profile
+from utils.model_helper import split_features
+from utils.url_features import LexicalFeatureExtractor
+from utils.logger import get_logger
+
+logger = get_logger("ModelBackendBenchmark")
+
+def build_features(urls, features):
+    """
+    Featurizes URLs for the benchmark: 'lexical' (dense LexicalFeatureExtractor columns)
+    or 'tfidf' (sparse word-level TF-IDF, as in train_model).
+    """
+    if features == "lexical":
+        return LexicalFeatureExtractor().transform(urls)
+    if features == "tfidf":
+        return TfidfVectorizer().fit_transform(urls)
+
+    raise ValueError(f"Unknown feature set: {features}")
+
+def benchmark_model_backends(n_urls=20000, features="lexical", backends=MODEL_BACKENDS):
+    """
+    Trains every model backend on the same train/test split and compares accuracy, train time,
+    prediction latency per 1k URLs and serialized model size.
+
+    Args:
+        n_urls (int): Size of the synthetic labeled corpus.
+        features (str): Feature set, see build_features.
+        backends (tuple): Backends to compare, see utils.model_backends.build_model.
+
+    Returns:
+        dict: Backend -> accuracy, train_seconds, predict_ms_per_1k and model_bytes.
+    """
+    urls, labels = generate_labeled_urls(n_urls)
+    X_train, X_test, y_train, y_test = split_features(build_features(urls, features), labels)
+    results = {}
+
+    for name in backends:
+        model, profile = train_and_profile(name, X_train, y_train, X_test)
+        results[name] = dict(profile, accuracy=model.score(X_test, y_test))
+
+    logger.info(f"{'backend':<24}{'accuracy':>10}{'train s':>10}{'ms/1k':>10}{'KiB':>10}")
+    for name, result in results.items():
+        logger.info(f"{name:<24}{result['accuracy']:>10.4f}{result['train_seconds']:>10.2f}"
+                    f"{result['predict_ms_per_1k']:>10.1f}{result['model_bytes'] / 1024:>10,.0f}")
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_model_backends()
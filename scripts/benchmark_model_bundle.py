@@ -0,0 +1,62 @@
+# scripts/benchmark_model_bundle.py
+
+import os
+import tempfile
+import time
+import joblib
+from benchmark_sparse_training import generate_labeled_urls
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.model_backends import build_model
+from utils.model_bundle import load_bundle, save_bundle
+from utils.logger import get_logger
+
+logger = get_logger("ModelBundleBenchmark")
+
+def time_load(load, repeats=5):
+    """
+    Returns the median time in milliseconds of `load()`.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    return 1000 * sorted(timings)[len(timings) // 2]
+
+def benchmark_model_bundle(n_urls=20000, classifier="hist_gradient_boosting"):
+    """
+    Compares the load time of a compressed joblib model with the same model in a bundle,
+    loaded into memory and memory-mapped.
+
+    Args:
+        n_urls (int): Size of the synthetic labeled corpus the model is trained on.
+        classifier (str): Model backend, see utils.model_backends.build_model.
+
+    Returns:
+        dict: Load variant -> median load time in milliseconds.
+    """
+    urls, labels = generate_labeled_urls(n_urls)
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(urls)
+    model = build_model(classifier, sparse=True, n_features=X.shape[1]).fit(X, labels)
+
+    with tempfile.TemporaryDirectory() as directory:
+        compressed = os.path.join(directory, "model.pkl.z")
+        joblib.dump((model, vectorizer), compressed, compress=3)
+        bundle = save_bundle(os.path.join(directory, "registry"), model, vectorizer)
+
+        results = {
+            "joblib (compressed)": time_load(lambda: joblib.load(compressed)),
+            "bundle": time_load(lambda: load_bundle(bundle, mmap_mode=None)),
+            "bundle (mmap_mode='r')": time_load(lambda: load_bundle(bundle, mmap_mode="r")),
+        }
+        logger.info(f"Compressed file {os.path.getsize(compressed) / 2**20:.1f} MiB, bundle "
+                    f"{sum(entry.stat().st_size for entry in os.scandir(bundle)) / 2**20:.1f} MiB.")
+
+    for name, milliseconds in results.items():
+        logger.info(f"{name:<26}{milliseconds:>10.1f} ms")
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_model_bundle()
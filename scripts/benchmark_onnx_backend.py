@@ -0,0 +1,106 @@
+# scripts/benchmark_onnx_backend.py
+
+import shutil
+import tempfile
+import time
+import numpy as np
+from multiprocessing import Queue
+from agents.feature_extraction_agent import FeatureExtractionAgent
+from benchmark_feature_extraction import generate_urls
+from utils.logger import get_logger
+
+logger = get_logger("OnnxBackendBenchmark")
+
+def check_parity(reference, features):
+    """
+    Compares embeddings from an alternate backend against the PyTorch reference.
+
+    Args:
+        reference (np.ndarray): PyTorch embeddings of shape (n_urls, dim).
+        features (np.ndarray): Embeddings of the same URLs from the backend under test.
+
+    Returns:
+        dict: Maximum absolute difference and minimum/mean row-wise cosine similarity.
+    """
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(features, axis=1)
+    cosine = (reference * features).sum(axis=1) / np.maximum(norms, 1e-12)
+    return {
+        "max_abs_diff": float(np.max(np.abs(reference - features))),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+    }
+
+def time_backend(agent, urls, batch_size):
+    """
+    Extracts features for `urls` once to warm up (and export, for ONNX), then once timed.
+
+    Returns:
+        tuple: (features, URLs/sec, mean latency per batch in milliseconds)
+    """
+    agent.extract_features(urls[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    features = agent.extract_features(urls, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    n_batches = -(-len(urls) // batch_size)
+    return features, len(urls) / elapsed, 1000 * elapsed / n_batches
+
+def benchmark_onnx_backend(n_urls=256, batch_size=32, models=None, export_dir=None):
+    """
+    Benchmarks each ensemble member on CPU with eager PyTorch, ONNX Runtime fp32 and
+    ONNX Runtime with dynamic int8 quantization, and checks embedding parity against PyTorch.
+
+    Args:
+        n_urls (int): Number of synthetic URLs to extract features for.
+        batch_size (int): URLs per forward pass.
+        models (dict): Optional pre-built feature-extraction pipelines (defaults to the agent's ensemble).
+        export_dir (str): Directory for the exported ONNX models (defaults to a temporary
+                          directory that is removed afterwards).
+
+    Returns:
+        dict: Model name -> backend -> throughput, latency and parity figures.
+    """
+    if export_dir is None:
+        export_dir = tempfile.mkdtemp(prefix="onnx_benchmark-")
+        try:
+            return benchmark_onnx_backend(n_urls, batch_size, models, export_dir)
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+    urls = generate_urls(n_urls)
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=models)
+    agent.load_models()
+    all_models = agent.models
+    results = {}
+
+    for model_name, extractor in all_models.items():
+        # Benchmark one model at a time so the figures are per model
+        agent.models = {model_name: extractor}
+        agent.cache = None
+        agent.mode, agent.ensemble = "transformer", "concat"
+        results[model_name] = {}
+        reference = None
+
+        for backend, quantize in [("pytorch", None), ("onnx", False), ("onnx", True)]:
+            label = backend if quantize is None else ("onnx-int8" if quantize else "onnx-fp32")
+            agent.backend = backend
+            agent.onnx_config = {"export_dir": export_dir, "quantize": quantize}
+            agent.onnx_encoders = {}
+
+            features, throughput, latency = time_backend(agent, urls, batch_size)
+            result = {"urls_per_sec": throughput, "batch_latency_ms": latency}
+            if reference is None:
+                reference = features
+            else:
+                result.update(check_parity(reference, features))
+            results[model_name][label] = result
+
+            logger.info(f"{model_name} [{label}]: {throughput:.1f} URLs/sec, {latency:.1f} ms per batch of {batch_size}"
+                        + (f", min cosine {result['min_cosine']:.4f}, max abs diff {result['max_abs_diff']:.2e}"
+                           if "min_cosine" in result else ""))
+
+    agent.models = all_models
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_onnx_backend()
@@ -0,0 +1,66 @@
+# scripts/benchmark_seen_index.py
+
+import os
+import tempfile
+import time
+from utils.seen_index import SeenURLIndex
+from utils.logger import get_logger
+
+logger = get_logger("SeenIndexBenchmark")
+
+def generate_batch(start, size):
+    """
+    Returns `size` distinct synthetic URLs numbered from `start`.
+    """
+    return [f"http://host{i % 9973}.example/path/{i}?id={i * 7919}" for i in range(start, start + size)]
+
+def benchmark_seen_index(n_urls=2000000, batch_size=10000, capacity=20000000, error_rate=0.001):
+    """
+    Fills a seen-URL index batch by batch, then times batches that are half new and half seen,
+    reporting throughput, SQLite lookups per URL, RAM held by the Bloom filter and bytes on disk per URL.
+
+    Args:
+        n_urls (int): URLs loaded into the index before timing.
+        batch_size (int): URLs per filter_new call, like one source's URLs in a collection cycle.
+        capacity (int): Bloom filter capacity.
+        error_rate (float): Bloom filter false positive rate.
+
+    Returns:
+        dict: Fill and mixed-batch throughput in URLs per second, lookups per URL, Bloom MiB and disk bytes per URL.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "seen.sqlite")
+        index = SeenURLIndex(path, capacity, error_rate)
+
+        start = time.perf_counter()
+        for offset in range(0, n_urls, batch_size):
+            index.filter_new(generate_batch(offset, batch_size))
+        fill_seconds = time.perf_counter() - start
+
+        index.stats["db_lookups"] = 0
+        checked = 0
+        start = time.perf_counter()
+        for offset in range(n_urls - batch_size // 2, n_urls + 50 * batch_size, batch_size):
+            index.filter_new(generate_batch(offset, batch_size))
+            checked += batch_size
+        mixed_seconds = time.perf_counter() - start
+        index.close()
+
+        disk_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                         if not name.endswith(".npz"))
+        results = {
+            "fill_urls_per_second": n_urls / fill_seconds,
+            "mixed_urls_per_second": checked / mixed_seconds,
+            "db_lookups_per_url": index.stats["db_lookups"] / checked,
+            "bloom_mib": index.bloom.bits.nbytes / 2**20,
+            "disk_bytes_per_url": disk_bytes / len(index),
+        }
+
+    logger.info(f"Filled {n_urls:,} URLs at {results['fill_urls_per_second']:,.0f} URLs/s; mixed batches at "
+                f"{results['mixed_urls_per_second']:,.0f} URLs/s with {results['db_lookups_per_url']:.3f} SQLite lookups per URL.")
+    logger.info(f"Bloom filter {results['bloom_mib']:.1f} MiB in RAM, {results['disk_bytes_per_url']:.1f} bytes per URL on disk.")
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_seen_index()
@@ -0,0 +1,125 @@
+# scripts/benchmark_sparse_training.py
+
+import random
+import string
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.model_backends import build_model
+from utils.model_helper import preprocess_data, split_features
+from utils.logger import get_logger
+
+logger = get_logger("SparseTrainingBenchmark")
+
+BENIGN_HOSTS = ["google.com", "wikipedia.org", "github.com", "amazon.com", "bbc.co.uk", "python.org", "apple.com"]
+PHISHING_WORDS = ["login", "verify", "secure", "account", "update", "paypal", "bank", "wallet", "signin"]
+PHISHING_TLDS = ["tk", "ml", "xyz", "top", "gq", "click"]
+
+def generate_labeled_urls(n_urls, malicious_ratio=0.5, seed=42):
+    """
+    Generates a synthetic labeled URL corpus. Malicious URLs tend to use phishing keywords,
+    unusual TLDs, IP hosts and long random tokens, but both classes overlap so the task is not trivial.
+
+    Args:
+        n_urls (int): Number of URLs to generate.
+        malicious_ratio (float): Fraction of malicious URLs.
+        seed (int): Random seed for reproducibility.
+
+    Returns:
+        tuple: (list of URLs, np.ndarray of 'benign'/'malicious' labels)
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+
+    def token(low=3, high=10):
+        return "".join(rng.choices(alphabet, k=rng.randint(low, high)))
+
+    urls, labels = [], []
+    for _ in range(n_urls):
+        malicious = rng.random() < malicious_ratio
+        words = [token() for _ in range(rng.randint(0, 4))]
+        if rng.random() < (0.7 if malicious else 0.1):
+            words.insert(rng.randint(0, len(words)), rng.choice(PHISHING_WORDS))
+
+        if malicious and rng.random() < 0.15:
+            host = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+        elif malicious:
+            host = f"{token()}-{rng.choice(PHISHING_WORDS)}.{token(4, 8)}.{rng.choice(PHISHING_TLDS + ['com'])}"
+        else:
+            host = rng.choice(BENIGN_HOSTS) if rng.random() < 0.6 else f"{token()}.{rng.choice(['com', 'org', 'net'])}"
+
+        scheme = "https" if rng.random() < (0.4 if malicious else 0.8) else "http"
+        urls.append(f"{scheme}://{host}/{'/'.join(words)}")
+        labels.append("malicious" if malicious else "benign")
+    return urls, np.array(labels)
+
+def measure(function):
+    """
+    Runs `function` and returns (result, seconds, peak traced memory in MiB).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+def train_dense(urls, labels, classifier):
+    """
+    Baseline: the previous training path, densifying the TF-IDF matrix into a DataFrame before splitting.
+    """
+    X = TfidfVectorizer().fit_transform(urls)
+    df_features = pd.DataFrame(X.toarray())
+    df_features['label'] = labels
+    X_train, X_test, y_train, y_test = preprocess_data(df_features, 'label')
+    model = build_model(classifier, n_features=X.shape[1]).fit(X_train, y_train)
+    return model.score(X_test, y_test)
+
+def train_sparse(urls, labels, classifier):
+    """
+    The sparse training path used by train_model: CSR from the vectorizer through the split to the model.
+    """
+    X = TfidfVectorizer(dtype=np.float32).fit_transform(urls)
+    X_train, X_test, y_train, y_test = split_features(X, labels)
+    model = build_model(classifier, sparse=True, n_features=X.shape[1]).fit(X_train, y_train)
+    return model.score(X_test, y_test)
+
+def benchmark_sparse_training(sizes=(1000, 4000, 16000, 64000), classifier="logistic_regression", max_dense_mib=1024):
+    """
+    Compares time and peak memory of the dense and sparse training paths over increasing corpus sizes.
+
+    Args:
+        sizes (tuple): Corpus sizes to benchmark.
+        classifier (str): Model backend to train, see utils.model_backends.build_model.
+        max_dense_mib (int): The dense path is skipped once its feature matrix alone would exceed this.
+
+    Returns:
+        dict: Corpus size -> path -> seconds, peak MiB and test accuracy.
+    """
+    results = {}
+    for n_urls in sizes:
+        urls, labels = generate_labeled_urls(n_urls)
+        n_features = len(TfidfVectorizer().fit(urls).vocabulary_)
+        dense_mib = n_urls * n_features * 8 / 2**20
+        results[n_urls] = {}
+
+        paths = [("sparse", train_sparse)]
+        if dense_mib <= max_dense_mib:
+            paths.insert(0, ("dense", train_dense))
+        else:
+            logger.info(f"{n_urls} URLs: skipping dense path, its {n_urls} x {n_features} matrix needs {dense_mib:,.0f} MiB.")
+
+        for name, train in paths:
+            accuracy, elapsed, peak = measure(lambda: train(urls, labels, classifier))
+            results[n_urls][name] = {"seconds": elapsed, "peak_mib": peak, "accuracy": accuracy}
+            logger.info(f"{n_urls} URLs x {n_features} features [{name}]: {elapsed:.2f}s, "
+                        f"peak {peak:,.1f} MiB, accuracy {accuracy:.3f}")
+
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_sparse_training()
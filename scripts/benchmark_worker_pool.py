@@ -0,0 +1,106 @@
+# scripts/benchmark_worker_pool.py
+
+import os
+import tempfile
+import time
+from core.coordination_hub import CoordinationHub
+from agents.feature_extraction_agent import FeatureExtractionAgent, share_model_weights
+from benchmark_feature_extraction import generate_urls
+from utils.logger import get_logger
+
+logger = get_logger("WorkerPoolBenchmark")
+
+def build_tiny_models(directory):
+    """
+    Builds a small randomly initialised BERT pipeline over a character vocabulary, so the
+    transformer path can be benchmarked without downloading weights.
+
+    Args:
+        directory (str): Directory to write the tokenizer vocabulary to.
+
+    Returns:
+        dict: Ensemble member name -> feature-extraction pipeline.
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast, pipeline
+
+    chars = list("abcdefghijklmnopqrstuvwxyz0123456789:/.-_?=&")
+    vocab_file = os.path.join(directory, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + chars + ["##" + c for c in chars]))
+
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=5 + 2 * len(chars), hidden_size=128, num_hidden_layers=2,
+                        num_attention_heads=2, intermediate_size=512, max_position_embeddings=128)
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file, model_max_length=128)
+    return {"bert": pipeline("feature-extraction", model=BertModel(config), tokenizer=tokenizer)}
+
+def measure_replicas(replicas, n_messages, urls_per_message, mode="lexical", models=None):
+    """
+    Runs `replicas` FeatureExtractionAgent workers on one shared stage queue and measures throughput.
+
+    Args:
+        replicas (int): Number of worker processes.
+        n_messages (int): Number of URL messages to send.
+        urls_per_message (int): URLs per message.
+        mode (str): Feature extraction mode of the workers ('lexical' needs no model downloads).
+        models (dict): Pipelines for the 'transformer' and 'hybrid' modes (e.g. from build_tiny_models).
+
+    Returns:
+        float: URLs processed per second.
+    """
+    hub = CoordinationHub()
+    hub.bus.add_stage("feature_extraction")
+    results = hub.bus.add_stage("classification")  # Collects the workers' output
+    cores = os.cpu_count() or 1
+    for agent in hub.launch_stage("feature_extraction", FeatureExtractionAgent, replicas=replicas,
+                                  models=models if mode != "lexical" else {}):
+        agent.mode = mode
+        agent.cache = None  # Measure inference, not cache hits
+        agent.torch_threads = max(1, cores // replicas)  # The split run() makes for the configured replica count
+    hub.start()
+
+    urls = generate_urls(urls_per_message)
+    start = time.perf_counter()
+    for index in range(n_messages):
+        hub.bus.put({"sender": "Benchmark", "data": {"request_id": f"bench-{index:06d}", "urls": urls}})
+
+    # Replicas finish out of order; request IDs tell the results apart
+    request_ids = {results.get(timeout=300)["data"]["request_id"] for _ in range(n_messages)}
+    elapsed = time.perf_counter() - start
+    hub.stop()
+
+    assert len(request_ids) == n_messages
+    return n_messages * urls_per_message / elapsed
+
+def benchmark_worker_pool(replica_counts=None, n_messages=64, urls_per_message=20000, mode="lexical", models=None):
+    """
+    Measures how feature-extraction throughput scales with the number of stage replicas.
+    In the transformer modes each replica runs torch with its share of the cores, so the
+    replica/thread trade-off is what gets measured.
+
+    Args:
+        replica_counts (list): Replica counts to try (defaults to powers of two up to the core count).
+        n_messages (int): Number of URL messages to send per run.
+        urls_per_message (int): URLs per message.
+        mode (str): Feature extraction mode of the workers.
+        models (dict): Pipelines for the transformer modes, shared by all replicas.
+
+    Returns:
+        dict: URLs/sec per replica count.
+    """
+    cores = os.cpu_count() or 1
+    replica_counts = replica_counts or [count for count in (1, 2, 4, 8, 16, 32, 64) if count <= cores]
+    results = {}
+    for replicas in replica_counts:
+        results[replicas] = measure_replicas(replicas, n_messages, urls_per_message, mode, models)
+        logger.info(f"{mode}, {replicas} replica(s) x {max(1, cores // replicas)} thread(s): {results[replicas]:.0f} URLs/sec, "
+                    f"speedup {results[replicas] / results[replica_counts[0]]:.2f}x")
+    return results
+
+if __name__ == "__main__":
+    # Example usage
+    benchmark_worker_pool()
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_worker_pool(n_messages=32, urls_per_message=512, mode="transformer",
+                              models=share_model_weights(build_tiny_models(directory)))
@@ -1,12 +1,12 @@
 # scripts/data_preparation.py
 
 import pandas as pd
-from utils.data_cleaner import clean_urls, clean_dataframe
+from utils.data_cleaner import clean_csv_stream, clean_url_series, clean_dataframe, log_invalid_report
 from utils.logger import get_logger
 
 logger = get_logger("DataPreparation")
 
-def prepare_data(input_file, output_file):
+def prepare_data(input_file, output_file, chunk_size=None):
     """
     Prepares data for training by loading raw data, cleaning it, 
     and saving the processed data to a new file.
@@ -14,15 +14,25 @@ def prepare_data(input_file, output_file):
     Args:
         input_file (str): Path to the raw data file.
         output_file (str): Path to save the cleaned data.
+        chunk_size (int): If set, stream the file in chunks of this many rows with constant memory,
+                          deduplicating across chunks (suited to multi-GB feeds such as PhishTank dumps).
     """
     try:
+        if chunk_size:
+            clean_csv_stream(input_file, output_file, chunk_size=chunk_size)
+            logger.info(f"Cleaned data saved to {output_file}.")
+            return
+
         # Load raw data
         df = pd.read_csv(input_file)
         logger.info(f"Raw data loaded from {input_file}.")
         
         # Clean the data
         df = clean_dataframe(df, columns=['url'])  # Assuming 'url' is a column in your dataset
-        df['url'] = clean_urls(df['url'].tolist())  # Clean URLs
+        cleaned_urls, report = clean_url_series(df['url'])  # Clean URLs, dropping rows with invalid ones
+        log_invalid_report(report)
+        df = df.loc[cleaned_urls.index]
+        df['url'] = cleaned_urls
 
         # Save cleaned data
         df.to_csv(output_file, index=False)
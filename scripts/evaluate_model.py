@@ -1,50 +1,59 @@
 # scripts/evaluate_model.py
 
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
-from utils.model_helper import load_data, load_model, preprocess_data
+import os
+from utils.model_helper import load_data, load_model, split_features
 from utils.logger import get_logger
+from utils.url_features import HashingURLFeaturizer
 import joblib  # Import joblib to load the vectorizer
 
 logger = get_logger("ModelEvaluation")
 
-def evaluate_trained_model(data_file, target_column, model_path, vectorizer_path):
+def evaluate_trained_model(data_file, target_column, model_path, vectorizer_path=None):
     """
     Evaluates a trained model using test data and logs the results.
 
     Args:
         data_file (str): Path to the cleaned data file.
         target_column (str): The name of the target column in the dataset.
-        model_path (str): Path to the saved trained model.
-        vectorizer_path (str): Path to the saved fitted vectorizer.
+        model_path (str): Path to the saved trained model, or a model bundle directory
+                          (which brings its own featurizer; `vectorizer_path` is then ignored).
+        vectorizer_path (str): Path to the saved fitted vectorizer, or None for a model trained
+                               on the stateless hashing featurizer.
     """
     try:
         # Load and preprocess data
         df = load_data(data_file)
 
         # Extract URLs and labels
-        urls = df['url'].values
-        labels = df[target_column].values
+        urls = df['url'].to_numpy()
+        labels = df[target_column].to_numpy()
 
-        # Load the fitted vectorizer
-        vectorizer = joblib.load(vectorizer_path)
-        logger.info(f"Vectorizer loaded from {vectorizer_path}.")
+        # Load the trained model, and the fitted vectorizer; the hashing featurizer needs nothing loaded
+        bundle = None
+        if os.path.isdir(model_path):
+            bundle = load_model(model_path, model_type="bundle")
+            if bundle is None:
+                raise ValueError("Model bundle loading failed.")
+            model = bundle.model
+            vectorizer = bundle.featurizer or HashingURLFeaturizer()
+            logger.info(f"Evaluating model bundle version {bundle.version}.")
+        elif vectorizer_path is None:
+            vectorizer = HashingURLFeaturizer()
+        else:
+            vectorizer = joblib.load(vectorizer_path)
+            logger.info(f"Vectorizer loaded from {vectorizer_path}.")
 
-        # Transform URLs using the loaded vectorizer
+        # Transform URLs using the loaded vectorizer (a sparse CSR matrix, never densified)
         X = vectorizer.transform(urls)
 
-        # Convert X to a DataFrame
-        df_features = pd.DataFrame(X.toarray())
-        df_features['label'] = labels
+        # Split data into train and test sets (same split as training)
+        X_train, X_test, y_train, y_test = split_features(X, labels)
 
-        # Split data into train and test sets
-        X_train, X_test, y_train, y_test = preprocess_data(df_features, 'label')
-
-        # Load the trained model
-        model = load_model(model_path)
-        if model is None:
-            raise ValueError("Model loading failed.")
+        if bundle is None:
+            model = load_model(model_path)
+            if model is None:
+                raise ValueError("Model loading failed.")
 
         # Predict using the model
         y_pred = model.predict(X_test)
@@ -1,58 +1,177 @@
 # scripts/train_model.py
 
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from utils.model_helper import load_data, preprocess_data, save_model
+from sklearn.model_selection import train_test_split
+from utils.model_backends import CLASSES, DEFAULT_MODEL_BACKEND, DEFAULT_SPARSE_MODEL_BACKEND, build_model, train_and_profile
+from utils.model_helper import load_data, split_features, save_model
+from utils.url_features import HashingURLFeaturizer, LexicalFeatureExtractor
 from utils.logger import get_logger
 import joblib  # Import joblib to save the vectorizer
 
 logger = get_logger("ModelTraining")
 
-def train_model(data_file, target_column, model_save_path, vectorizer_save_path):
+def build_featurizer(name="tfidf"):
+    """
+    Returns the URL featurizer: 'tfidf' (word-level TfidfVectorizer, fitted and saved alongside the model)
+    or 'hashing' (stateless character n-gram HashingURLFeaturizer, nothing to fit or save).
+    """
+    if name == "tfidf":
+        return TfidfVectorizer(dtype=np.float32)
+    if name == "hashing":
+        return HashingURLFeaturizer()
+
+    raise ValueError(f"Unknown featurizer: {name}")
+
+def train_model(data_file, target_column, model_save_path, vectorizer_save_path=None, classifier=DEFAULT_SPARSE_MODEL_BACKEND,
+                featurizer="tfidf", registry_dir=None):
     """
     Trains a machine learning model using the cleaned data and saves the model and vectorizer to disk.
+    The feature matrix stays sparse (CSR) from the vectorizer through the split to the model.
 
     Args:
         data_file (str): Path to the cleaned data file.
         target_column (str): The name of the target column in the dataset.
         model_save_path (str): Path to save the trained model.
-        vectorizer_save_path (str): Path to save the fitted vectorizer.
+        vectorizer_save_path (str): Path to save the fitted vectorizer (not used by the hashing featurizer).
+        classifier (str): Model backend to train, see utils.model_backends.build_model.
+        featurizer (str): 'tfidf' or 'hashing', see build_featurizer.
+        registry_dir (str): If given, also saves the model, fitted featurizer, label map and training
+                            metadata as the next model bundle version in this registry.
+
+    Returns:
+        str: Path of the saved model bundle, or None without `registry_dir`.
     """
     try:
         # Load and preprocess data
         df = load_data(data_file)
 
         # Extract URLs and labels
-        urls = df['url'].values
-        labels = df[target_column].values
+        urls = df['url'].to_numpy()
+        labels = df[target_column].to_numpy()
 
-        # Convert URLs to numeric features using TF-IDF
-        vectorizer = TfidfVectorizer()
+        # Convert URLs to numeric features
+        vectorizer = build_featurizer(featurizer)
         X = vectorizer.fit_transform(urls)
+        logger.info(f"Feature matrix ({featurizer}): {X.shape[0]} rows x {X.shape[1]} features, {X.nnz} non-zeros.")
 
-        # Save the fitted vectorizer for future use
-        joblib.dump(vectorizer, vectorizer_save_path)
-        logger.info(f"Vectorizer saved to {vectorizer_save_path}.")
-
-        # Split the data into training and testing sets
-        df_features = pd.DataFrame(X.toarray())
-        df_features['label'] = labels
+        # Save the fitted vectorizer for future use; the hashing featurizer has nothing to save
+        if featurizer == "tfidf":
+            joblib.dump(vectorizer, vectorizer_save_path)
+            logger.info(f"Vectorizer saved to {vectorizer_save_path}.")
 
         # Split data
-        X_train, X_test, y_train, y_test = preprocess_data(df_features, 'label')
+        X_train, X_test, y_train, y_test = split_features(X, labels)
 
-        # Initialize and train the model
-        model = GradientBoostingClassifier()
-        model.fit(X_train, y_train)
-        logger.info("Model training completed.")
+        # Initialize and train the model, reporting train time, prediction latency and size
+        model, profile = train_and_profile(classifier, X_train, y_train, X_test)
+        accuracy = model.score(X_test, y_test)
+        logger.info(f"Model training completed (test accuracy {accuracy:.4f}).")
 
         # Save the trained model
         save_model(model, model_save_path)
+
+        # Save everything needed to serve the model as one versioned, memory-mappable bundle
+        if registry_dir is not None:
+            metadata = {"model_backend": classifier, "featurizer": featurizer, "data_file": data_file,
+                        "train_rows": X_train.shape[0], "n_features": X.shape[1], "test_accuracy": accuracy, **profile}
+            label_map = {str(index): str(label) for index, label in enumerate(model.classes_)}
+            return save_model(model, registry_dir, model_type="bundle", featurizer=vectorizer,
+                              label_map=label_map, metadata=metadata)
     
     except Exception as e:
         logger.error(f"Failed to train model: {e}")
 
+def train_cascade_model(data_file, target_column, registry_dir, classifier=DEFAULT_MODEL_BACKEND,
+                        stage1_classifier=DEFAULT_MODEL_BACKEND, feature_extractor=None):
+    """
+    Trains both models of the ClassificationAgent's two-stage cascade and saves them as one model bundle:
+    the stage-1 model on lexical features of the raw URLs, and the stage-2 model on the transformer
+    embeddings the agent extracts for the URLs it escalates.
+
+    Args:
+        data_file (str): Path to the cleaned data file.
+        target_column (str): The name of the target column in the dataset.
+        registry_dir (str): Registry the bundle is saved to as its next version.
+        classifier (str): Model backend for stage 2, see utils.model_backends.build_model.
+        stage1_classifier (str): Model backend for stage 1.
+        feature_extractor (object): Produces the stage-2 features with extract_features(urls);
+                                    defaults to a FeatureExtractionAgent with the configured models.
+
+    Returns:
+        str: Path of the saved model bundle.
+    """
+    try:
+        df = load_data(data_file)
+        urls = df['url'].to_numpy()
+        labels = df[target_column].to_numpy()
+        urls_train, urls_test, y_train, y_test = train_test_split(urls, labels, test_size=0.2, random_state=42)
+
+        # Stage 1: cheap lexical features, computed for every URL at classification time
+        lexical_extractor = LexicalFeatureExtractor()
+        stage1_model, _ = train_and_profile(stage1_classifier, lexical_extractor.transform(urls_train), y_train)
+        stage1_accuracy = stage1_model.score(lexical_extractor.transform(urls_test), y_test)
+        logger.info(f"Stage-1 model training completed (test accuracy {stage1_accuracy:.4f}).")
+
+        # Stage 2: transformer embeddings, as the agent extracts them for escalated URLs
+        if feature_extractor is None:
+            from multiprocessing import Queue
+            from agents.feature_extraction_agent import FeatureExtractionAgent
+            feature_extractor = FeatureExtractionAgent(Queue(), Queue())
+        X_train = np.asarray(feature_extractor.extract_features(list(urls_train)), dtype=np.float32)
+        X_test = np.asarray(feature_extractor.extract_features(list(urls_test)), dtype=np.float32)
+        model, profile = train_and_profile(classifier, X_train, y_train, X_test)
+        accuracy = model.score(X_test, y_test)
+        logger.info(f"Stage-2 model training completed (test accuracy {accuracy:.4f}).")
+
+        metadata = {"model_backend": classifier, "stage1_backend": stage1_classifier, "featurizer": "embeddings",
+                    "data_file": data_file, "train_rows": X_train.shape[0], "n_features": X_train.shape[1],
+                    "test_accuracy": accuracy, "stage1_test_accuracy": stage1_accuracy, **profile}
+        label_map = {str(index): str(label) for index, label in enumerate(model.classes_)}
+        return save_model(model, registry_dir, model_type="bundle", label_map=label_map, metadata=metadata,
+                          stage1_model=stage1_model)
+
+    except Exception as e:
+        logger.error(f"Failed to train cascade models: {e}")
+
+def train_model_incremental(data_file, target_column, model_save_path, chunk_size=100000, classifier="sgd"):
+    """
+    Trains a model over a CSV file one chunk at a time with partial_fit, using the stateless hashing
+    featurizer, so training memory does not depend on the size of the file.
+
+    Args:
+        data_file (str): Path to the cleaned data file.
+        target_column (str): The name of the target column in the dataset.
+        model_save_path (str): Path to save the trained model.
+        chunk_size (int): Rows read and learned from at a time.
+        classifier (str): A model backend supporting partial_fit, see utils.model_backends.build_model.
+
+    Returns:
+        object: The trained model.
+    """
+    try:
+        featurizer = HashingURLFeaturizer()
+        model = build_model(classifier, sparse=True)
+        if not hasattr(model, "partial_fit"):
+            raise ValueError(f"Classifier {classifier} does not support partial_fit.")
+
+        rows = 0
+        for chunk in pd.read_csv(data_file, chunksize=chunk_size):
+            chunk = chunk.dropna(subset=['url', target_column])
+            model.partial_fit(featurizer.transform(chunk['url'].to_numpy()), chunk[target_column].to_numpy(), classes=CLASSES)
+            rows += len(chunk)
+            logger.info(f"Trained on {rows} rows so far.")
+
+        logger.info("Incremental model training completed.")
+        save_model(model, model_save_path)
+        return model
+
+    except Exception as e:
+        logger.error(f"Failed to train model incrementally: {e}")
+
 if __name__ == "__main__":
-    # Example usage
-    train_model('data/processed/cleaned_data.csv', 'label', 'models/classification/gradient_boosting_model.pkl', 'models/classification/tfidf_vectorizer.pkl')
+    # Example usage. The ClassificationAgent serves MODEL_REGISTRY_PATH and cannot use a TF-IDF model,
+    # so this bundle goes to a registry of its own
+    train_model('data/processed/cleaned_data.csv', 'label', 'models/classification/gradient_boosting_model.pkl', 'models/classification/tfidf_vectorizer.pkl',
+                registry_dir='models/classification/tfidf_registry')
@@ -1,93 +1,659 @@
 from multiprocessing import Process, Queue
-import time  # Ensure time is imported for sleep
+import copy
+import itertools
+import queue
+import threading
+import time
 from utils.logger import get_logger
-from sklearn.ensemble import GradientBoostingClassifier
+from utils.batching import SHUTDOWN, discard_pending, drain_queue
+from utils.url_features import HASHING_N_FEATURES, HASHING_NGRAM_RANGE, HashingURLFeaturizer, LexicalFeatureExtractor
+from utils.model_backends import CLASSES, DEFAULT_MODEL_BACKEND, DEFAULT_SPARSE_MODEL_BACKEND, build_model, model_size_bytes
+from utils.model_bundle import latest_bundle_path, latest_version, load_bundle
+from utils.shared_ring import ArrayDescriptor
+from config.agents_config import CLASSIFICATION_AGENT_CONFIG
+from config.settings import QUEUE_POLL_TIMEOUT, MICRO_BATCH_MAX_MESSAGES, MICRO_BATCH_MAX_WAIT_MS
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 import numpy as np
+import scipy.sparse as sp
 import logging
 
 # Configure global logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+WARMUP_URLS = ["http://example.com/", "https://github.com/python/cpython", "http://paypal-login.verify.tk/account",
+               "http://192.168.10.4/secure/update.php?id=88213"]  # Warm-up input before any traffic was seen
+
+def malicious_probability(model, features):
+    """
+    Returns the predicted probability of the malicious class for each row of `features`.
+    Models trained on 'malicious'/'benign' labels and on 0/1 labels are both supported.
+    """
+    classes = list(model.classes_)
+    positive = "malicious" if "malicious" in classes else 1
+    return model.predict_proba(features)[:, classes.index(positive)].astype(np.float32)
+
+def threshold_labels(model, scores, threshold=0.5):
+    """
+    Turns malicious scores into class labels of the model's own label type: the malicious class
+    where the score reaches `threshold`, the other class elsewhere.
+    """
+    classes = np.asarray(model.classes_)
+    positive = "malicious" if "malicious" in list(classes) else 1
+    negative = classes[classes != positive][0]
+    return np.where(scores >= threshold, positive, negative)
+
 class ClassificationAgent(Process):  # Inherit from Process for multiprocessing
-    def __init__(self, input_queue: Queue, output_queue: Queue):
+    def __init__(self, input_queue: Queue, output_queue: Queue, feature_extractor=None, transport=None):
         super().__init__()
         self.input_queue = input_queue  # Queue for receiving messages
         self.output_queue = output_queue  # Queue for sending messages
         self.name = "ClassificationAgent"
         self.active = True
         self.logger = get_logger(self.name)
-        self.model = GradientBoostingClassifier()
+        self.max_batch_messages = CLASSIFICATION_AGENT_CONFIG.get("micro_batch_max_messages", MICRO_BATCH_MAX_MESSAGES)
+        self.max_batch_wait = CLASSIFICATION_AGENT_CONFIG.get("micro_batch_max_wait_ms", MICRO_BATCH_MAX_WAIT_MS) / 1000
+        self.model_backend = CLASSIFICATION_AGENT_CONFIG.get("model_backend", DEFAULT_MODEL_BACKEND)
+        self.sparse_model_backend = CLASSIFICATION_AGENT_CONFIG.get("sparse_model_backend", DEFAULT_SPARSE_MODEL_BACKEND)
+        self.model = build_model(self.model_backend)  # Rebuilt by train_model() to match its input
+        self.decision_threshold = CLASSIFICATION_AGENT_CONFIG.get("decision_threshold", 0.5)
+        calibration_config = CLASSIFICATION_AGENT_CONFIG.get("calibration", {})
+        self.calibration = calibration_config.get("method")  # None, "sigmoid" or "isotonic"
+        self.calibration_folds = calibration_config.get("folds", 3)
         self.is_trained = False  # Flag to check if the model is trained
+        self.model_path = CLASSIFICATION_AGENT_CONFIG.get("model_path")  # Model bundle registry
+        self.bundle_version = 0  # Registry version being served (0: none)
+
+        # Hot reload: a background thread watches the registry, loads and warms up new bundles, and
+        # hands them to run(), which swaps them in between batches. Latency and throughput are kept
+        # per model version so a slower model shows up in version_report().
+        reload_config = CLASSIFICATION_AGENT_CONFIG.get("hot_reload", {})
+        self.hot_reload = reload_config.get("enabled", False)
+        self.reload_interval = reload_config.get("poll_interval", 5.0)
+        self.warmup_rows = reload_config.get("warmup_rows", 256)
+        self.slowdown_warning = reload_config.get("slowdown_warning", 1.5)
+        self.pending_bundle = None  # Loaded and warmed up, waiting for the next batch boundary
+        self.rejected_versions = set()  # Versions that failed to load or warm up; not retried
+        self.reload_stop = threading.Event()
+        self.watcher = None
+        self.warmup_urls = list(WARMUP_URLS)
+        self.warmup_features = None
+        self.version_stats = {}  # Keyed by model_version
+
+        # Online learning: labeled batches from the queue update an incrementally trainable model in a
+        # background thread. Each update trains a copy of the serving model and then swaps it in with a
+        # single reference assignment, so classification keeps using the old model until then.
+        online_config = CLASSIFICATION_AGENT_CONFIG.get("online_learning", {})
+        self.online_learning = online_config.get("enabled", False)
+        self.max_pending_updates = online_config.get("max_pending_batches", 16)
+        self.model_version = (0, 0)  # (bundle version, online updates applied on top of it)
+        self.model_lock = threading.Lock()  # Serializes updates; readers never take it
+        self.training_queue = None
+        self.trainer = None
+        if self.online_learning:
+            self.model = build_model("sgd").set_params(alpha=online_config.get("alpha", 1e-6))
+        self.transport = transport  # SharedArrayRing the FeatureExtractionAgent writes feature matrices into
+
+        # With the "hashing" featurizer the agent classifies raw URL messages itself from hashed
+        # character n-grams instead of waiting for transformer features
+        featurizer_config = CLASSIFICATION_AGENT_CONFIG.get("featurizer", {})
+        self.featurizer = None
+        if featurizer_config.get("type") == "hashing":
+            self.featurizer = HashingURLFeaturizer(featurizer_config.get("n_features", HASHING_N_FEATURES),
+                                                   featurizer_config.get("ngram_range", HASHING_NGRAM_RANGE))
+
+        # Two-stage cascade: a cheap lexical model scores every URL and only URLs whose probability
+        # falls inside the uncertainty band are sent through the transformer ensemble and self.model
+        cascade_config = CLASSIFICATION_AGENT_CONFIG.get("cascade", {})
+        self.cascade_enabled = cascade_config.get("enabled", False)
+        self.uncertainty_band = tuple(cascade_config.get("uncertainty_band", (0.2, 0.8)))
+        self.stage1_model = build_model(DEFAULT_MODEL_BACKEND)  # Few dense lexical columns suit histogram boosting
+        self.stage1_trained = False
+        self.lexical_extractor = LexicalFeatureExtractor()
+        self.feature_extractor = feature_extractor  # Created on first use if not supplied
+        self.cascade_stats = {stage: {"urls": 0, "seconds": 0.0} for stage in ("stage1", "stage2")}
 
     def run(self):
         """
         Processes incoming features for classification.
         """
         self.logger.info("Classification Agent started.")
+        self.load_latest_model()
+        if self.online_learning:
+            self.start_online_learning()
+        if self.hot_reload:
+            self.start_model_watcher()
         while self.active:
             try:
-                if not self.input_queue.empty():
-                    message = self.input_queue.get()
-                    sender, data = message['sender'], message['data']
-                    self.receive_message(sender, data)
-                time.sleep(1)  # Wait for messages to arrive
+                self.apply_pending_model()
+                messages, shutdown = drain_queue(self.input_queue, self.max_batch_messages,
+                                                 self.max_batch_wait, timeout=QUEUE_POLL_TIMEOUT)
+                if messages:
+                    self.receive_batch(messages)
+                if shutdown:
+                    break
             except Exception as e:
                 self.logger.error(f"Error in {self.name}: {e}")
+        self.release_pending_features()
+        if self.trainer is not None:
+            self.training_queue.put(None)  # Finish queued updates before exiting
+            self.trainer.join()
+        if self.watcher is not None:
+            self.reload_stop.set()
+            self.watcher.join()
+        self.logger.info(f"{self.name} stopped.")
+
+    def receive_batch(self, messages):
+        """
+        Handles a micro-batch of messages. Unlabeled feature matrices are stacked and classified
+        in one call, then split back so each input message gets its own output message. With the
+        hashing featurizer, raw URL messages are likewise featurized and classified together.
+        Everything else is handled one message at a time.
+        """
+        feature_messages, url_messages = [], []
+        for message in messages:
+            sender, data = message['sender'], message['data']
+            if "features" in data and "labels" not in data:
+                feature_messages.append(data)
+            elif ("urls" in data and "features" not in data and "labels" not in data and self.featurizer is not None
+                  and not self.cascade_enabled):
+                url_messages.append(data)
+            else:
+                self.receive_message(sender, data)
+
+        if url_messages:
+            features = self.featurizer.transform([url for data in url_messages for url in data["urls"]])
+            self.send_classifications(url_messages, [len(data["urls"]) for data in url_messages],
+                                      *self.classify_with_scores(features))
+
+        if not feature_messages:
+            return
+
+        matrices, descriptors = [], []
+        for data in feature_messages:
+            features, descriptor = self.unpack_features(data["features"])
+            matrices.append(features)
+            descriptors.append(descriptor)
+
+        try:
+            # A single matrix is classified in place; several are stacked into one batch
+            classifications, scores = self.classify_with_scores(matrices[0] if len(matrices) == 1 else np.vstack(matrices))
+        finally:
+            for descriptor in descriptors:
+                self.release_features(descriptor)
+
+        self.send_classifications(feature_messages, [len(features) for features in matrices], classifications, scores)
+
+    def send_classifications(self, messages, counts, classifications, scores):
+        """
+        Splits the labels and float32 malicious scores of a stacked batch back into one output
+        message per input message.
+        """
+        if self.hot_reload:
+            # Kept as warm-up input for the next model
+            urls = list(itertools.islice((url for data in messages if data.get("urls") is not None for url in data["urls"]),
+                                         self.warmup_rows))
+            self.warmup_urls = urls or self.warmup_urls
+        offset = 0
+        for data, count in zip(messages, counts):
+            self.output_queue.put({"sender": self.name, "data": {"request_id": data.get("request_id"), "urls": data.get("urls"),
+                                                                 "classifications": classifications[offset:offset + count],
+                                                                 "scores": scores[offset:offset + count]}})
+            offset += count
 
     def receive_message(self, sender, message):
         """
         Handles incoming messages from other agents.
         """
-        if "features" in message and "labels" in message:
-            features = message["features"]
-            labels = message["labels"]
-            classifications = self.classify(features, labels)
-            self.output_queue.put({"sender": self.name, "classifications": classifications})
+        if "urls" in message and "features" not in message and self.cascade_enabled:
+            urls = message["urls"]
+            classifications, scores = self.classify_cascade(urls)
+            self.send_classifications([message], [len(urls)], classifications, scores)
+        elif "urls" in message and "features" not in message and self.featurizer is not None:
+            urls = message["urls"]
+            features = self.featurizer.transform(urls)
+            classifications, scores = self.classify_with_scores(features, message.get("labels"))
+            if "labels" in message:
+                self.submit_update(features, message["labels"])
+            self.send_classifications([message], [len(urls)], classifications, scores)
         elif "features" in message:
-            features = message["features"]
-            classifications = self.classify(features)
-            self.output_queue.put({"sender": self.name, "classifications": classifications})
+            features, descriptor = self.unpack_features(message["features"])
+            try:
+                classifications, scores = self.classify_with_scores(features, message.get("labels"))
+                if "labels" in message:
+                    # Copy out of the shared memory slot, which is reused once released
+                    self.submit_update(np.array(features, dtype=np.float32), message["labels"])
+            finally:
+                self.release_features(descriptor)
+            self.send_classifications([message], [len(scores)], classifications, scores)
+
+    def unpack_features(self, features):
+        """
+        Resolves the features field of a message. Shared memory descriptors are wrapped as
+        zero-copy views into the transport ring; inline matrices are returned as they are.
+
+        Returns:
+            tuple: (features, descriptor) where descriptor must be passed to release_features
+                   once the features are no longer needed (None for inline matrices).
+        """
+        if isinstance(features, ArrayDescriptor):
+            return self.transport.read(features), features
+        return features, None
+
+    def release_features(self, descriptor):
+        """
+        Returns a shared memory slot to the transport ring.
+        """
+        if descriptor is not None:
+            self.transport.release(descriptor)
+
+    def release_pending_features(self):
+        """
+        Releases the shared memory slots of feature messages still queued when the agent stops,
+        which would otherwise stay taken and eventually leave producers without free slots.
+        """
+        if self.transport is None:
+            return
+        pending = discard_pending(self.input_queue)
+        descriptors = [message["data"]["features"] for message in pending
+                       if isinstance(message, dict) and isinstance(message.get("data", {}).get("features"), ArrayDescriptor)]
+        for descriptor in descriptors:
+            self.transport.release(descriptor)
+        if pending:
+            self.logger.warning(f"Dropped {len(pending)} messages queued after shutdown "
+                                f"(released {len(descriptors)} shared memory slots).")
 
     def classify(self, features, true_labels=None):
         """
-        Classifies URLs based on extracted features.
+        Classifies URLs based on extracted features and returns their labels.
+        See classify_with_scores for the malicious scores behind them.
+        """
+        return self.classify_with_scores(features, true_labels)[0]
+
+    def classify_with_scores(self, features, true_labels=None):
+        """
+        Scores and classifies URLs based on extracted features.
+        `features` is the dense (n_urls, dim) float32 matrix produced by the FeatureExtractionAgent,
+        used as-is without copying, or the sparse matrix from the hashing featurizer.
+        The score is the model's (optionally calibrated) malicious probability, and a URL is labeled
+        malicious when its score reaches the configured decision threshold.
         If true_labels are provided, it calculates and logs the evaluation metrics.
+
+        Returns:
+            tuple: (labels, scores) where scores is a float32 array of malicious probabilities.
         """
         self.logger.info("Starting classification...")
         try:
-            features = np.array(features)
+            if not sp.issparse(features):
+                features = np.asarray(features, dtype=np.float32)
             
             if not self.is_trained:
                 self.logger.warning("Model is not trained yet. Returning default predictions.")
                 # Return default predictions or handle accordingly
-                return ["benign" for _ in features]
+                return ["benign" for _ in range(features.shape[0])], np.zeros(features.shape[0], dtype=np.float32)
 
-            predictions = self.model.predict(features)
-            self.logger.info(f"Classification completed. Predictions: {predictions}")
+            model, version = self.model, self.model_version  # Read once, so a concurrent swap cannot mix two models in one batch
+            start = time.perf_counter()
+            scores = malicious_probability(model, features)
+            predictions = threshold_labels(model, scores, self.decision_threshold)
+            self.record_version(version, len(scores), time.perf_counter() - start)
+            if self.hot_reload:
+                # Kept as warm-up input for the next model; copied since it may be a view into shared memory
+                self.warmup_features = features[:self.warmup_rows].copy()
+            self.logger.info(f"Classification completed. {int((scores >= self.decision_threshold).sum())} of "
+                             f"{len(scores)} URLs scored malicious.")
 
             if true_labels is not None:
                 self.evaluate(predictions, true_labels)
 
-            return predictions
+            return predictions, scores
         except Exception as e:
             self.logger.error(f"Error during classification: {e}")
             raise
 
+    def classify_cascade(self, urls):
+        """
+        Classifies raw URLs with the two-stage cascade.
+        Stage 1 scores every URL from cheap lexical features. URLs whose malicious probability lies
+        inside the uncertainty band are escalated: the transformer ensemble extracts their features
+        and the stage-2 model (self.model) scores them. Everything else keeps its stage-1 score.
+
+        Returns:
+            tuple: (labels, probabilities) where probabilities is a float32 array of malicious scores.
+        """
+        urls = list(urls)
+        low, high = self.uncertainty_band
+        if not self.stage1_trained and not self.is_trained:
+            self.logger.warning("Cascade models are not trained yet. Returning default predictions.")
+            return np.full(len(urls), "benign"), np.zeros(len(urls), dtype=np.float32)
+
+        start = time.perf_counter()
+        if self.stage1_trained:
+            probabilities = malicious_probability(self.stage1_model, self.lexical_extractor.transform(urls))
+            uncertain = (probabilities >= low) & (probabilities <= high)
+        else:
+            # Without a stage-1 model every URL is uncertain
+            probabilities = np.full(len(urls), 0.5, dtype=np.float32)
+            uncertain = np.ones(len(urls), dtype=bool)
+        self.record_stage("stage1", len(urls), time.perf_counter() - start)
+
+        escalated = np.flatnonzero(uncertain)
+        if len(escalated) and self.is_trained:
+            start = time.perf_counter()
+            features = np.asarray(self.get_feature_extractor().extract_features([urls[index] for index in escalated]),
+                                  dtype=np.float32)
+            probabilities[escalated] = malicious_probability(self.model, features)
+            if self.hot_reload:
+                self.warmup_features = features[:self.warmup_rows].copy()  # Warm-up input for the next stage-2 model
+            self.record_stage("stage2", len(escalated), time.perf_counter() - start)
+        elif len(escalated):
+            self.logger.warning(f"Stage-2 model is not trained yet. Keeping stage-1 scores for {len(escalated)} uncertain URLs.")
+
+        labels = np.where(probabilities >= self.decision_threshold, "malicious", "benign")
+        self.logger.info(f"Cascade classified {len(urls)} URLs, escalated {len(escalated)} to stage 2.")
+        return labels, probabilities
+
+    def get_feature_extractor(self):
+        """
+        Returns the FeatureExtractionAgent used in-process for stage 2, creating it on first use
+        so the transformer ensemble is only loaded when something is actually escalated.
+        """
+        if self.feature_extractor is None:
+            from agents.feature_extraction_agent import FeatureExtractionAgent
+            self.feature_extractor = FeatureExtractionAgent(self.input_queue, self.output_queue)
+        return self.feature_extractor
+
+    def record_stage(self, stage, n_urls, seconds):
+        """
+        Accumulates per-stage URL counts and latency.
+        """
+        self.cascade_stats[stage]["urls"] += n_urls
+        self.cascade_stats[stage]["seconds"] += seconds
+
+    def cascade_report(self):
+        """
+        Returns per-stage counters and latency, used to tune the uncertainty band.
+
+        Returns:
+            dict: For each stage the number of URLs scored, total seconds and milliseconds per URL,
+                  plus the fraction of URLs escalated to stage 2.
+        """
+        report = {}
+        for stage, stats in self.cascade_stats.items():
+            report[stage] = dict(stats, ms_per_url=1000 * stats["seconds"] / stats["urls"] if stats["urls"] else 0.0)
+        total = self.cascade_stats["stage1"]["urls"]
+        report["escalation_rate"] = self.cascade_stats["stage2"]["urls"] / total if total else 0.0
+        return report
+
+    def train_stage1_model(self, urls, labels):
+        """
+        Trains the cheap first-stage model on lexical features of raw URLs.
+        """
+        self.logger.info("Training stage-1 (lexical) model...")
+        try:
+            self.stage1_model.fit(self.lexical_extractor.transform(urls), labels)
+            self.stage1_trained = True
+            self.logger.info("Stage-1 model training completed.")
+        except Exception as e:
+            self.logger.error(f"Error during stage-1 model training: {e}")
+            raise
+
     def train_model(self, X_train, y_train):
         """
-        Train the classification model.
+        Train the classification model: `model_backend` on dense embeddings, `sparse_model_backend`
+        on sparse hashed features.
         """
-        self.logger.info("Training classification model...")
+        sparse = sp.issparse(X_train)
+        backend = self.sparse_model_backend if sparse else self.model_backend
+        self.logger.info(f"Training classification model ({backend})...")
         try:
-            self.model.fit(X_train, y_train)
+            model = build_model(backend, sparse=sparse, n_features=np.shape(X_train)[1])
+            if self.calibration:
+                # Cross-validated calibration so scores can be read as probabilities and thresholded
+                model = CalibratedClassifierCV(model, method=self.calibration, cv=self.calibration_folds)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            train_seconds = time.perf_counter() - start
+            self.model = model
             self.is_trained = True
-            self.logger.info("Model training completed.")
+            self.logger.info(f"Model training completed in {train_seconds:.2f}s "
+                             f"({model_size_bytes(model) / 1024:,.0f} KiB).")
         except Exception as e:
             self.logger.error(f"Error during model training: {e}")
             raise
 
+    def load_latest_model(self):
+        """
+        Loads the newest model bundle from the registry at `model_path`, if it holds any.
+        Arrays are memory-mapped, so start-up does not depend on the model's size and replicas
+        loading the same bundle share its pages. Bundles trained on a different input than the
+        one this agent is routed (see expected_input) are refused.
+
+        Returns:
+            bool: Whether a bundle was loaded.
+        """
+        path = latest_bundle_path(self.model_path) if self.model_path else None
+        if path is None:
+            self.logger.info(f"No model bundle in {self.model_path}; waiting for training.")
+            return False
+        bundle = self.load_model_bundle(path)
+        if bundle is None:
+            return False
+        self.swap_model(bundle)
+        return True
+
+    def load_model_bundle(self, path):
+        """
+        Loads a model bundle and warms it up on a sample of recent input (the first calls into a
+        freshly mapped model fault its pages in), timing it for comparison with the serving model.
+
+        Returns:
+            ModelBundle: The bundle, or None if it failed to load, does not match the agent's input
+                         or failed to score the sample.
+        """
+        try:
+            bundle = load_bundle(path)
+            self.check_bundle_input(bundle)
+            sample = self.warmup_sample(bundle)
+            start = time.perf_counter()
+            malicious_probability(bundle.model, sample)
+            warmup_ms_per_url = 1000 * (time.perf_counter() - start) / sample.shape[0]
+            if bundle.stage1_model is not None:
+                malicious_probability(bundle.stage1_model, self.lexical_extractor.transform(self.warmup_urls))
+        except Exception as e:
+            self.logger.error(f"Failed to load model bundle {path}: {e}")
+            return None
+        bundle.metadata["warmup_ms_per_url"] = warmup_ms_per_url
+        self.logger.info(f"Warmed up model bundle version {bundle.version} on {sample.shape[0]} URLs "
+                         f"({warmup_ms_per_url:.3f} ms per URL).")
+        return bundle
+
+    def expected_input(self):
+        """
+        Describes the input this agent feeds its model (in the format of model_bundle.input_spec):
+        hashed URLs with the configured featurizer, or else feature matrices from the
+        FeatureExtractionAgent, whose width is known once one has been received.
+        """
+        if self.featurizer is not None and not self.cascade_enabled:
+            return {"featurizer": "hashing", "n_features": self.featurizer.n_features,
+                    "ngram_range": list(self.featurizer.ngram_range)}
+        expected = {"featurizer": "embeddings"}
+        if self.warmup_features is not None:
+            expected["n_features"] = self.warmup_features.shape[1]
+        return expected
+
+    def check_bundle_input(self, bundle):
+        """
+        Raises ValueError if a bundle's model was trained on a different input than the agent
+        receives. Stage routing is fixed at start-up, so such a model could never score a batch.
+        """
+        expected = self.expected_input()
+        if any(bundle.model_input.get(key) != value for key, value in expected.items()):
+            raise ValueError(f"Model bundle version {bundle.version} expects input {bundle.model_input}, "
+                             f"but this agent receives {expected}.")
+
+    def warmup_sample(self, bundle):
+        """
+        Returns input for warming up a bundle's model: the most recent input the agent scored, as
+        its routing delivers it (feature matrices, or URLs hashed by the agent's featurizer). Before
+        any traffic, the warm-up URLs run through the featurizer, or else zeros of the model's width.
+        """
+        if self.warmup_features is not None:
+            return self.warmup_features
+        if self.featurizer is not None and not self.cascade_enabled:
+            return self.featurizer.transform(self.warmup_urls)
+        width = bundle.model_input.get("n_features")
+        if width is None:
+            raise ValueError("No recent input to warm the model up on and its input width is unknown.")
+        return np.zeros((len(self.warmup_urls), width), dtype=np.float32)
+
+    def swap_model(self, bundle):
+        """
+        Starts serving a loaded bundle. The model (and the cascade's stage-1 model, if the bundle
+        has one) is only replaced between batches (or before the first one), so no batch mixes two models. The agent keeps its own featurizer, which
+        check_bundle_input has matched against the bundle's.
+        """
+        with self.model_lock:
+            previous = self.version_stats.get(self.model_version)
+            self.model = bundle.model
+            if bundle.stage1_model is not None:
+                self.stage1_model, self.stage1_trained = bundle.stage1_model, True
+            self.bundle_version = bundle.version
+            self.model_version = (bundle.version, 0)  # Online updates count up from here
+            self.is_trained = True
+        stats = self.version_stats.setdefault(self.model_version, {"batches": 0, "urls": 0, "seconds": 0.0})
+        stats["warmup_ms_per_url"] = bundle.metadata.get("warmup_ms_per_url")
+
+        self.logger.info(f"Serving model bundle version {bundle.version} ({bundle.metadata.get('model_backend', type(bundle.model).__name__)}).")
+        if previous and previous["urls"] and bundle.metadata.get("warmup_ms_per_url") is not None:
+            serving_ms_per_url = 1000 * previous["seconds"] / previous["urls"]
+            if bundle.metadata["warmup_ms_per_url"] > self.slowdown_warning * serving_ms_per_url:
+                self.logger.warning(f"Model version {bundle.version} took {bundle.metadata['warmup_ms_per_url']:.3f} ms per URL "
+                                    f"to warm up, vs {serving_ms_per_url:.3f} ms for the previous version.")
+
+    def start_model_watcher(self):
+        """
+        Starts the background thread that watches the model registry.
+        Called from run(), so the thread lives in the agent's own process.
+        """
+        self.watcher = threading.Thread(target=self.watch_model_registry, name=f"{self.name}-model-watcher", daemon=True)
+        self.watcher.start()
+        self.logger.info(f"Watching {self.model_path} for new model versions every {self.reload_interval}s.")
+
+    def watch_model_registry(self):
+        """
+        Polls the registry until stopped. A newer version is loaded and warmed up here, off the
+        classification path, and left in `pending_bundle` for run() to swap in.
+        """
+        while not self.reload_stop.wait(self.reload_interval):
+            try:
+                self.check_for_new_model()
+            except Exception as e:
+                self.logger.error(f"Error while checking for new models: {e}")
+
+    def check_for_new_model(self):
+        """
+        Loads the newest registry version if it is newer than the serving (or pending) one.
+
+        Returns:
+            bool: Whether a new bundle is now pending.
+        """
+        version = latest_version(self.model_path)
+        pending = self.pending_bundle
+        current = max(self.bundle_version, pending.version if pending is not None else 0)
+        if version is None or version <= current or version in self.rejected_versions:
+            return False
+        bundle = self.load_model_bundle(latest_bundle_path(self.model_path))
+        if bundle is None:
+            self.rejected_versions.add(version)
+            return False
+        self.pending_bundle = bundle
+        return True
+
+    def apply_pending_model(self):
+        """
+        Swaps in a bundle the watcher has loaded, if any. Called by run() between batches.
+        """
+        bundle, self.pending_bundle = self.pending_bundle, None
+        if bundle is not None:
+            self.swap_model(bundle)
+
+    def record_version(self, version, n_urls, seconds):
+        """
+        Accumulates batches, URLs and scoring time for one model version.
+        """
+        stats = self.version_stats.setdefault(version, {"batches": 0, "urls": 0, "seconds": 0.0})
+        stats["batches"] += 1
+        stats["urls"] += n_urls
+        stats["seconds"] += seconds
+
+    def version_report(self):
+        """
+        Returns per-version counters, latency and throughput, used to catch a model that is slower than its predecessor.
+
+        Returns:
+            dict: For each model version, a (bundle version, online update count) tuple, the batches and URLs scored, total seconds, milliseconds per URL,
+                  URLs per second and (for registry bundles) the warm-up milliseconds per URL.
+        """
+        report = {}
+        for version, stats in self.version_stats.items():
+            report[version] = dict(stats, ms_per_url=1000 * stats["seconds"] / stats["urls"] if stats["urls"] else 0.0,
+                                   urls_per_second=stats["urls"] / stats["seconds"] if stats["seconds"] else 0.0)
+        return report
+
+    def start_online_learning(self):
+        """
+        Starts the background thread that applies labeled batches to the model.
+        Called from run(), so the thread lives in the agent's own process.
+        """
+        self.training_queue = queue.Queue(maxsize=self.max_pending_updates)
+        self.trainer = threading.Thread(target=self.training_loop, name=f"{self.name}-trainer", daemon=True)
+        self.trainer.start()
+        self.logger.info("Online learning enabled.")
+
+    def submit_update(self, features, labels):
+        """
+        Queues a labeled batch for an online model update. Without online learning, or when the
+        trainer is not running (e.g. outside run()), labeled batches are only used for evaluation.
+        If updates are backing up, the batch is dropped rather than stalling classification.
+        """
+        if not self.online_learning or self.training_queue is None:
+            return
+        try:
+            self.training_queue.put_nowait((features, np.asarray(labels)))
+        except queue.Full:
+            self.logger.warning(f"Online learning is {self.max_pending_updates} batches behind. Dropping a labeled batch.")
+
+    def training_loop(self):
+        """
+        Applies queued labeled batches to the model until stop() sends None.
+        """
+        while True:
+            batch = self.training_queue.get()
+            if batch is None:
+                break
+            try:
+                self.update_model(*batch)
+            except Exception as e:
+                self.logger.error(f"Error during online model update: {e}")
+
+    def update_model(self, features, labels):
+        """
+        Updates the model from one labeled batch with partial_fit, without a full retrain.
+        The update is applied to a copy of the serving model, which then replaces it atomically:
+        classify() keeps using whichever model it picked up and never waits for training.
+        """
+        with self.model_lock:
+            start = time.perf_counter()
+            candidate = copy.deepcopy(self.model)
+            candidate.partial_fit(features, labels, classes=CLASSES)
+            self.model = candidate
+            self.is_trained = True
+            self.model_version = (self.bundle_version, self.model_version[1] + 1)
+        self.logger.info(f"Online update to model version {self.model_version} from {len(labels)} labeled URLs "
+                         f"in {time.perf_counter() - start:.3f}s.")
+
     def evaluate(self, predictions, true_labels):
         """
         Evaluate the performance of the classification model.
@@ -123,4 +689,7 @@ class ClassificationAgent(Process):  # Inherit from Process for multiprocessing
         Stops the agent's execution.
         """
         self.active = False
+        self.input_queue.put(SHUTDOWN)  # Unblocks run() in the agent's process
+        if self.training_queue is not None:
+            self.training_queue.put(None)
         self.logger.info("Stopping Classification Agent.")
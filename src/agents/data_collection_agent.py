@@ -1,20 +1,24 @@
 from multiprocessing import Process, Queue
 import logging
+import queue
 import time
-import requests
 import os
+import uuid
 import pandas as pd
 from bs4 import BeautifulSoup
 from tweepy import OAuthHandler, API, Cursor
-import imaplib
-import email
 from email.header import decode_header
-import socks
-import socket
 from io import StringIO
 
 from utils.logger import get_logger
+from utils.batching import SHUTDOWN
+from utils.scheduler import AdaptiveScheduler
 from utils.data_cleaner import clean_urls  # Assuming you have a data_cleaner module
+from utils.feed_fetcher import fetch_concurrently, fetch_with_retry, make_session
+from utils.feed_state import FeedState
+from utils.mail_fetcher import IncrementalMailFetcher
+from utils.seen_index import SeenURLIndex
+from config.agents_config import DATA_COLLECTION_AGENT_CONFIG
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,6 +41,23 @@ class DataCollectionAgent(Process):
         self.raw_dir = 'data/raw'
         self.processed_dir = 'data/processed'
         self.output_dir = 'data/output'
+        self.message_size = DATA_COLLECTION_AGENT_CONFIG.get("message_size", 256)
+        self.sources = DATA_COLLECTION_AGENT_CONFIG.get("sources", {})
+        self.max_workers = DATA_COLLECTION_AGENT_CONFIG.get("max_workers", 8)
+        self.cycle_timeout = DATA_COLLECTION_AGENT_CONFIG.get("cycle_timeout", 300)
+        self.session = None  # Pooled HTTP session shared by all sources, created in the agent's process
+        # Incremental fetching: conditional requests, and only URLs new since the last snapshot of a feed go downstream
+        self.incremental = DATA_COLLECTION_AGENT_CONFIG.get("incremental", True)
+        self.feed_state = FeedState(DATA_COLLECTION_AGENT_CONFIG.get("feed_state_dir", "data/feed_state"))
+        self.fetch_stats = {}  # Source -> bytes transferred and new/seen URL counts of its last fetch
+        self.pending_feed_state = {}  # Source -> (snapshot, validators) of a fetch whose URLs were not handed on yet
+        self.seen_config = DATA_COLLECTION_AGENT_CONFIG.get("seen_index", {})
+        self.seen_index = None  # Opened on first use, in the agent's own process
+        self.mail_fetcher = None  # IMAP connection, opened on first use and kept open between collections
+        scheduler_config = DATA_COLLECTION_AGENT_CONFIG.get("scheduler", {})
+        default_interval = DATA_COLLECTION_AGENT_CONFIG.get("scraping_interval", 60)
+        self.scheduler = AdaptiveScheduler({name: self.sources.get(name, {}).get("interval", default_interval)
+                                            for name in self.get_collectors()}, **scheduler_config)
 
         # Ensure directories exist
         os.makedirs(self.raw_dir, exist_ok=True)
@@ -46,55 +67,256 @@ class DataCollectionAgent(Process):
     def run(self):
         """
         Continuously collects URLs from various sources and sends them to the FeatureExtractionAgent.
+        Each source is polled when the scheduler says it is due; in between, the agent waits on its
+        input queue, so stop() ends the wait at once.
         """
         self.logger.info(f"{self.name} started.")
         while self.active:
             try:
-                urls = self.collect_urls()
-                if urls:
-                    self.save_urls_to_file(urls, os.path.join(self.raw_dir, 'raw_urls.csv'))
-                    cleaned_urls = clean_urls(urls)
-                    self.save_urls_to_file(cleaned_urls, os.path.join(self.processed_dir, 'cleaned_urls.csv'))
-
-                    # Sending cleaned URLs to other agents for further processing
-                    self.output_queue.put({"sender": self.name, "urls": cleaned_urls})
-
-                time.sleep(86400)  # Collect URLs every 24 hours
+                sources = self.scheduler.due()
+                if sources:
+                    self.collect_cycle(sources)
             except Exception as e:
                 self.logger.error(f"Error in {self.name}: {e}")
+            if self.wait_for_shutdown(self.scheduler.wait_time()):
+                break
+        if self.seen_index is not None:
+            self.seen_index.close()
+        if self.mail_fetcher is not None:
+            self.mail_fetcher.close()
+        self.logger.info(f"{self.name} stopped.")
 
-    def collect_urls(self):
+    def collect_cycle(self, sources=None):
         """
-        Collects URLs from various sources including OpenPhish, PhishTank, Twitter, Email, and dark web.
+        Collects from the given sources (all enabled ones by default). Each source's URLs are
+        cleaned, deduplicated and sent on as soon as that source finishes, and the number of new
+        URLs it produced sets its next poll time. URLs are recorded as seen only once they have
+        been sent, so a failure in between means they are sent again rather than lost.
         """
-        self.logger.info("Starting data collection...")
-        urls = []
+        urls, cleaned_urls = [], []
+        for source, source_urls in self.collect_urls_streaming(sources):
+            urls += source_urls
+            cleaned = self.filter_seen(clean_urls(source_urls))
+            cleaned_urls += cleaned
+            # Sending cleaned URLs to other agents for further processing
+            self.send_urls(cleaned)
+            interval = self.scheduler.record(source, len(cleaned))
+            self.mark_seen(cleaned)
+            self.logger.info(f"Next poll of {source} in about {interval:.0f}s.")
+
+        if urls:
+            self.save_urls_to_file(urls, os.path.join(self.raw_dir, 'raw_urls.csv'))
+            self.save_urls_to_file(cleaned_urls, os.path.join(self.processed_dir, 'cleaned_urls.csv'))
+        if self.seen_index is not None:
+            self.seen_index.save()
 
-        # Collect from OpenPhish, PhishTank, Phishing Database (same as before)
-        urls += self.collect_from_openphish()
-        urls += self.collect_from_phishtank()
-        urls += self.collect_from_phishing_database()
+    def wait_for_shutdown(self, timeout):
+        """
+        Waits up to `timeout` seconds for the SHUTDOWN sentinel on the input queue.
 
-        # Collect from Twitter (social media)
-        urls += self.collect_from_twitter()
+        Returns:
+            bool: True if the agent should stop.
+        """
+        deadline = time.monotonic() + timeout
+        while self.active:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                message = self.input_queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if isinstance(message, str) and message == SHUTDOWN:
+                return True
+            self.logger.warning(f"Ignoring unexpected message: {message!r:.100}")
+        return True
 
-        # Collect from emails (IMAP)
-        urls += self.collect_from_emails()
+    def schedule(self):
+        """
+        Returns, per source, its adapted interval and the Unix timestamp of its next poll (see AdaptiveScheduler.next_poll_times).
+        """
+        return self.scheduler.next_poll_times()
 
-        # Collect from dark web forums (through Tor)
-        urls += self.collect_from_dark_web()
+    def get_session(self):
+        """
+        Returns the pooled HTTP session, creating it on first use.
+        """
+        if self.session is None:
+            self.session = make_session(DATA_COLLECTION_AGENT_CONFIG.get("connection_pool_size", 10))
+        return self.session
 
-        self.logger.info(f"Total URLs collected: {len(urls)}")
-        return urls
+    def fetch(self, source, headers=None):
+        """
+        Fetches a source's URL over the pooled session with its configured timeout, retries and proxy.
+
+        Returns:
+            requests.Response: The final response.
+        """
+        config = self.sources[source]
+        proxies = {"http": config["proxy"], "https": config["proxy"]} if config.get("proxy") else None
+        return fetch_with_retry(self.get_session(), config["url"], timeout=config.get("timeout", 30),
+                                retries=config.get("retries", 3), backoff=config.get("backoff", 1.0), proxies=proxies,
+                                headers=headers)
+
+    def fetch_feed(self, source, parse):
+        """
+        Fetches a full-snapshot feed incrementally and returns only the URLs it added since the last fetch.
+
+        The request is conditional on the stored ETag / Last-Modified, so an unchanged feed costs a
+        304 and no body. A body identical to the last one (servers without validators) is skipped
+        unparsed, and otherwise the parsed URLs are reduced to those not in the previous snapshot.
+        Bytes transferred and new/seen counts are recorded in `fetch_stats`.
+
+        The new snapshot and validators are only kept in `pending_feed_state`; commit_feed_state
+        saves them once the URLs have been handed on. A fetch abandoned at the cycle deadline
+        therefore leaves the stored state alone, and its URLs are found again next time.
+
+        Args:
+            source (str): Source name in DATA_COLLECTION_AGENT_CONFIG["sources"].
+            parse (callable): Turns the response text into a list of URLs.
+
+        Returns:
+            list: New URLs (all URLs when incremental fetching is disabled).
+        """
+        response = self.fetch(source, self.feed_state.conditional_headers(source) if self.incremental else None)
+        # Bytes read off the wire (compressed size when the server used gzip)
+        stats = {"status": response.status_code, "bytes": response.raw.tell() if response.raw is not None else len(response.content),
+                 "urls": 0, "new": 0, "seen": 0}
+        self.fetch_stats[source] = stats
+        if response.status_code == 304:
+            self.logger.info(f"{source} not modified since the last fetch.")
+            return []
+        response.raise_for_status()
+
+        content_hash = self.feed_state.content_hash(response.content)
+        if self.incremental and content_hash == self.feed_state.validators(source).get("content_hash"):
+            self.logger.info(f"{source} content unchanged since the last fetch.")
+            return []
+
+        urls = parse(response.text)
+        new_urls, snapshot = self.feed_state.delta(source, urls) if self.incremental else (urls, None)
+        self.pending_feed_state[source] = (snapshot, self.feed_state.response_validators(response, content_hash))
+        stats.update(urls=len(urls), new=len(new_urls), seen=len(urls) - len(new_urls))
+        return new_urls
+
+    def commit_feed_state(self, source):
+        """
+        Saves the snapshot and validators of a source's last fetch, once its URLs have been handed on.
+        """
+        pending = self.pending_feed_state.pop(source, None)
+        if pending is None:
+            return
+        snapshot, validators = pending
+        if snapshot is not None:
+            self.feed_state.save_snapshot(source, snapshot)
+        self.feed_state.save_validators(source, validators)
+
+    def fetch_report(self):
+        """
+        Returns, per source, the status, bytes transferred, and total/new/seen URL counts of its last fetch.
+        """
+        return {source: dict(stats) for source, stats in self.fetch_stats.items()}
+
+    def get_collectors(self):
+        """
+        Returns the enabled sources as source name -> collector method.
+        """
+        collectors = {"openphish": self.collect_from_openphish, "phishtank": self.collect_from_phishtank,
+                      "phishing_database": self.collect_from_phishing_database, "twitter": self.collect_from_twitter,
+                      "email": self.collect_from_emails, "dark_web": self.collect_from_dark_web}
+        return {name: collector for name, collector in collectors.items()
+                if self.sources.get(name, {}).get("enabled", True)}
+
+    def get_seen_index(self):
+        """
+        Returns the seen-URL index, opening it on first use, or None if deduplication is disabled.
+        """
+        if not self.seen_config.get("enabled", True):
+            return None
+        if self.seen_index is None:
+            self.seen_index = SeenURLIndex(self.seen_config.get("path", "data/seen_urls.sqlite"),
+                                           self.seen_config.get("capacity", 20000000),
+                                           self.seen_config.get("error_rate", 0.001))
+        return self.seen_index
+
+    def filter_seen(self, urls):
+        """
+        Drops URLs already sent downstream in this or an earlier cycle (see utils.seen_index),
+        so the other agents never process the same URL twice. The URLs kept are not recorded
+        yet; mark_seen does that once they have been sent.
+        """
+        seen_index = self.get_seen_index()
+        if seen_index is None:
+            return urls
+        new_urls = seen_index.unseen(list(urls))
+        self.logger.info(f"{len(new_urls)} of {len(urls)} URLs not seen before ({len(seen_index)} in the seen-URL index).")
+        return new_urls
+
+    def mark_seen(self, urls):
+        """
+        Records URLs that have been sent downstream in the seen-URL index.
+        """
+        seen_index = self.get_seen_index()
+        if seen_index is not None:
+            seen_index.mark_seen(list(urls))
+
+    def send_urls(self, urls):
+        """
+        Sends URLs downstream in chunks of `message_size`, so replicas of the next stage can
+        process them in parallel. Each chunk gets a request ID of the form "<cycle>-<chunk>";
+        results keep that ID, so the original order can be restored downstream.
+        """
+        cycle_id = uuid.uuid4().hex[:12]
+        for index, start in enumerate(range(0, len(urls), self.message_size)):
+            self.output_queue.put({"sender": self.name,
+                                   "data": {"request_id": f"{cycle_id}-{index:06d}", "urls": urls[start:start + self.message_size]}})
+
+    def collect_urls_streaming(self, sources=None):
+        """
+        Collects URLs from all enabled sources concurrently (OpenPhish, PhishTank, Phishing.Database,
+        Twitter, email and dark web), yielding each source's URLs as soon as it finishes.
+        A hung source only delays itself: sources still running after `cycle_timeout` are abandoned.
+        A feed's incremental state is committed when the next source is requested, i.e. after the
+        caller has handled the URLs yielded for it.
+
+        Args:
+            sources (list): Names of the sources to collect from (all enabled ones by default).
+
+        Yields:
+            tuple: (source name, list of URLs)
+        """
+        collectors = self.get_collectors()
+        if sources is not None:
+            collectors = {name: collector for name, collector in collectors.items() if name in sources}
+        self.logger.info(f"Starting data collection from {', '.join(collectors)}...")
+        for source in collectors:
+            self.fetch_stats.pop(source, None)
+            self.pending_feed_state.pop(source, None)  # Left by a fetch abandoned in an earlier cycle
+        total = 0
+        for source, urls, seconds in fetch_concurrently(collectors, self.max_workers, self.cycle_timeout):
+            stats = self.fetch_stats.get(source)
+            transfer = f" ({stats['bytes']:,} bytes, {stats['new']} new / {stats['seen']} seen)" if stats else ""
+            self.logger.info(f"{source} finished after {seconds:.2f}s with {len(urls)} URLs{transfer}.")
+            total += len(urls)
+            yield source, urls
+            # The consumer asks for the next source only after it has handled this one's URLs
+            self.commit_feed_state(source)
+        self.logger.info(f"Total URLs collected: {total}")
+
+    def collect_urls(self):
+        """
+        Collects URLs from various sources including OpenPhish, PhishTank, Twitter, Email, and dark web.
+        See collect_urls_streaming; this waits for every source and returns all URLs at once.
+        """
+        return [url for _, urls in self.collect_urls_streaming() for url in urls]
 
     def collect_from_openphish(self):
         """Collect URLs from OpenPhish."""
         urls = []
         try:
             self.logger.info("Collecting URLs from OpenPhish...")
-            response = requests.get("https://openphish.com/feed.txt")
-            urls += response.text.splitlines()
-            self.logger.info(f"Collected {len(urls)} URLs from OpenPhish.")
+            urls += self.fetch_feed("openphish", str.splitlines)
+            self.logger.info(f"Collected {len(urls)} new URLs from OpenPhish.")
         except Exception as e:
             self.logger.error(f"Error collecting from OpenPhish: {e}")
         return urls
@@ -104,10 +326,8 @@ class DataCollectionAgent(Process):
         urls = []
         try:
             self.logger.info("Collecting URLs from PhishTank...")
-            response = requests.get("http://data.phishtank.com/data/online-valid.csv")
-            df = pd.read_csv(pd.compat.StringIO(response.text))
-            urls += df['url'].tolist()
-            self.logger.info(f"Collected {len(df)} URLs from PhishTank.")
+            urls += self.fetch_feed("phishtank", lambda text: pd.read_csv(StringIO(text))['url'].tolist())
+            self.logger.info(f"Collected {len(urls)} new URLs from PhishTank.")
         except Exception as e:
             self.logger.error(f"Error collecting from PhishTank: {e}")
         return urls
@@ -117,11 +337,8 @@ class DataCollectionAgent(Process):
         urls = []
         try:
             self.logger.info("Collecting URLs from Phishing.Database...")
-            response = requests.get("https://phishingdatabase.com/download/all.txt")
-            if response.status_code == 200:
-                urls += response.text.splitlines()
-            else:
-                self.logger.warning(f"Failed to collect from Phishing.Database. Status code: {response.status_code}")
+            urls += self.fetch_feed("phishing_database", str.splitlines)
+            self.logger.info(f"Collected {len(urls)} new URLs from Phishing.Database.")
         except Exception as e:
             self.logger.error(f"Error collecting from Phishing.Database: {e}")
         return urls
@@ -133,7 +350,7 @@ class DataCollectionAgent(Process):
             self.logger.info("Collecting URLs from Twitter...")
             auth = OAuthHandler(TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET)
             auth.set_access_token(TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET)
-            api = API(auth)
+            api = API(auth, timeout=self.sources.get("twitter", {}).get("timeout", 30))
 
             for tweet in Cursor(api.search_tweets, q="http", lang="en").items(100):  # Modify search criteria as needed
                 for url in tweet.entities.get("urls", []):
@@ -145,50 +362,37 @@ class DataCollectionAgent(Process):
         return urls
 
     def collect_from_emails(self):
-        """Collect URLs from emails using IMAP."""
+        """Collect URLs from emails using IMAP, only from messages that arrived since the last collection."""
         urls = []
         try:
             self.logger.info("Collecting URLs from email...")
-            mail = imaplib.IMAP4_SSL("imap.gmail.com")  # Use your IMAP provider
-            mail.login("your_email@gmail.com", "your_password")  # Replace with actual credentials
-            mail.select("inbox")
-
-            result, data = mail.search(None, "ALL")
-            email_ids = data[0].split()
-
-            for email_id in email_ids[-10:]:  # Process the last 10 emails
-                result, message_data = mail.fetch(email_id, "(RFC822)")
-                for response_part in message_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == "text/html":
-                                    body = part.get_payload(decode=True)
-                                    soup = BeautifulSoup(body, 'html.parser')
-                                    for a in soup.find_all('a', href=True):
-                                        urls.append(a['href'])
-                        else:
-                            body = msg.get_payload(decode=True)
-                            soup = BeautifulSoup(body, 'html.parser')
-                            for a in soup.find_all('a', href=True):
-                                urls.append(a['href'])
-
+            urls += self.get_mail_fetcher().fetch_links()
             self.logger.info(f"Collected {len(urls)} URLs from email.")
         except Exception as e:
             self.logger.error(f"Error collecting from email: {e}")
         return urls
 
+    def get_mail_fetcher(self):
+        """
+        Returns the IMAP fetcher, whose connection stays open across collections, creating it on first use.
+        """
+        if self.mail_fetcher is None:
+            config = self.sources.get("email", {})
+            self.mail_fetcher = IncrementalMailFetcher(
+                config.get("host", "imap.gmail.com"), config.get("user"), config.get("password"),
+                mailbox=config.get("mailbox", "INBOX"), port=config.get("port"), use_ssl=config.get("use_ssl", True),
+                timeout=config.get("timeout", 30), batch_size=config.get("batch_size", 200),
+                initial_messages=config.get("initial_messages", 10), max_part_bytes=config.get("max_part_bytes", 1000000),
+                state_path=config.get("state_path"))
+        return self.mail_fetcher
+
     def collect_from_dark_web(self):
         """Collect URLs from the dark web through Tor."""
         urls = []
         try:
             self.logger.info("Collecting URLs from dark web...")
-            # Set up Tor proxy
-            socks.set_default_proxy(socks.SOCKS5, "127.0.0.1", 9050)  # Tor default proxy
-            socket.socket = socks.socksocket
-
-            response = requests.get("http://exampleonion.onion")  # Replace with actual dark web site
+            # Only this request goes through the Tor proxy (set in the source's config), not every socket in the process
+            response = self.fetch("dark_web")  # Replace the configured URL with an actual dark web site
             soup = BeautifulSoup(response.content, 'html.parser')
             for link in soup.find_all('a'):
                 href = link.get('href')
@@ -216,4 +420,5 @@ class DataCollectionAgent(Process):
         Stops the agent's execution.
         """
         self.active = False
+        self.input_queue.put(SHUTDOWN)  # Interrupts run()'s wait for the next poll
         self.logger.info("Stopping Data Collection Agent.")
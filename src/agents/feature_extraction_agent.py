@@ -1,45 +1,205 @@
 from multiprocessing import Process, Queue
 import logging
+import os
 import time
+import psutil
+import torch
 from transformers import pipeline
 from utils.logger import get_logger
+from utils.batching import SHUTDOWN, drain_queue
+from utils.embedding_cache import EmbeddingCache
+from utils.onnx_backend import build_onnx_encoder
+from utils.url_features import LexicalFeatureExtractor
+from config.agents_config import FEATURE_EXTRACTION_AGENT_CONFIG
+from config.settings import QUEUE_POLL_TIMEOUT, MICRO_BATCH_MAX_MESSAGES, MICRO_BATCH_MAX_WAIT_MS
 import numpy as np  # To combine feature outputs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODELS = {
+    "bert": "bert-base-uncased",
+    "roberta": "roberta-base",
+    "xlnet": "xlnet-base-cased",
+    "distilbert": "distilbert-base-uncased",
+}
+
+def pool_hidden_states(hidden_states, attention_mask, strategy="mean", cls_last=False):
+    """
+    Pools (batch, tokens, hidden) transformer outputs into one (batch, hidden) float32 vector per input.
+
+    Args:
+        hidden_states (np.ndarray): Token embeddings of shape (batch, tokens, hidden).
+        attention_mask (np.ndarray): Boolean mask of shape (batch, tokens); padding positions are False.
+        strategy (str): 'mean' (masked average), 'max' (masked max) or 'cls' (summary token).
+        cls_last (bool): Take the last real token instead of the first for 'cls' pooling.
+
+    Returns:
+        np.ndarray: Pooled float32 matrix of shape (batch, hidden).
+    """
+    hidden_states = np.asarray(hidden_states, dtype=np.float32)
+    mask = np.asarray(attention_mask, dtype=bool)
+
+    if strategy == "mean":
+        weights = mask[..., np.newaxis].astype(np.float32)
+        return (hidden_states * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1.0)
+    if strategy == "max":
+        return np.where(mask[..., np.newaxis], hidden_states, -np.inf).max(axis=1).astype(np.float32)
+    if strategy == "cls":
+        if cls_last:
+            positions = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)
+        else:
+            positions = mask.argmax(axis=1)
+        return hidden_states[np.arange(len(hidden_states)), positions]
+
+    raise ValueError(f"Unknown pooling strategy: {strategy}")
+
+def load_feature_models(model_names=None):
+    """
+    Loads the transformer ensemble as feature-extraction pipelines.
+
+    Args:
+        model_names (dict): Ensemble member name -> Hugging Face model name
+                            (defaults to BERT, RoBERTa, XLNet and DistilBERT).
+
+    Returns:
+        dict: Ensemble member name -> pipeline.
+    """
+    model_names = model_names or DEFAULT_MODELS
+    return {name: pipeline("feature-extraction", model=model_name, clean_up_tokenization_spaces=False)
+            for name, model_name in model_names.items()}
+
+def share_model_weights(models):
+    """
+    Moves the weights of loaded pipelines into shared memory, so extraction replicas started
+    afterwards use one read-only copy of the weights instead of each holding their own.
+    """
+    for extractor in models.values():
+        extractor.model.eval()
+        extractor.model.share_memory()
+    return models
+
+def random_projection(input_dim, output_dim, seed=0):
+    """
+    Returns a fixed Gaussian random projection matrix of shape (input_dim, output_dim).
+    The seed is fixed so every process projects the same ensemble output to the same space.
+    """
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((input_dim, output_dim)) / np.sqrt(output_dim)).astype(np.float32)
+
 class FeatureExtractionAgent(Process):  # Use Process for multiprocessing
-    def __init__(self, input_queue: Queue, output_queue: Queue):
+    def __init__(self, input_queue: Queue, output_queue: Queue, models=None, transport=None):
         super().__init__()
         self.input_queue = input_queue  # Queue to receive messages
         self.output_queue = output_queue  # Queue to send messages
         self.name = "FeatureExtractionAgent"
         self.active = True
         self.logger = get_logger(self.name)
+        self.max_batch_messages = FEATURE_EXTRACTION_AGENT_CONFIG.get("micro_batch_max_messages", MICRO_BATCH_MAX_MESSAGES)
+        self.max_batch_wait = FEATURE_EXTRACTION_AGENT_CONFIG.get("micro_batch_max_wait_ms", MICRO_BATCH_MAX_WAIT_MS) / 1000
+        self.torch_threads = FEATURE_EXTRACTION_AGENT_CONFIG.get("torch_threads")
+        self.transport = transport  # Optional SharedArrayRing for sending feature matrices without pickling
+        self.transport_timeout = FEATURE_EXTRACTION_AGENT_CONFIG.get("shared_memory", {}).get("write_timeout", 1.0)
+        self.batched = FEATURE_EXTRACTION_AGENT_CONFIG.get("batched", True)
+        self.batch_size = FEATURE_EXTRACTION_AGENT_CONFIG.get("batch_size", 32)
+        self.pooling = FEATURE_EXTRACTION_AGENT_CONFIG.get("pooling", "mean")
+        self.ensemble = FEATURE_EXTRACTION_AGENT_CONFIG.get("ensemble", "concat")
+        self.projection_dim = FEATURE_EXTRACTION_AGENT_CONFIG.get("projection_dim", 768)
+        self.projection = None
+        self.mode = FEATURE_EXTRACTION_AGENT_CONFIG.get("mode", "transformer")
+        self.backend = FEATURE_EXTRACTION_AGENT_CONFIG.get("backend", "pytorch")
+        self.onnx_config = FEATURE_EXTRACTION_AGENT_CONFIG.get("onnx", {})
+        self.onnx_encoders = {}  # Model name -> OnnxEncoder, built on first use
+        self.lexical_extractor = LexicalFeatureExtractor()
+
+        # The transformer ensemble is loaded lazily by load_models(), normally inside run() so the
+        # weights are created in the agent's own process instead of being copied over from the parent.
+        # Pre-built pipelines (e.g. weights already placed in shared memory) can be passed in instead.
+        self.models = models
+        self.cache = None
+        if self.models is not None:
+            self.init_cache()
+
+    def load_models(self):
+        """
+        Loads the transformer ensemble if it has not been loaded or passed in yet.
+        The lexical-only mode never needs it.
+        """
+        if self.models is not None:
+            return
+        if self.mode == "lexical":
+            self.models = {}
+            return
 
-        # Load multiple transformer models for ensemble learning
-        self.models = {
-            "bert": pipeline("feature-extraction", model="bert-base-uncased", clean_up_tokenization_spaces=False),
-            "roberta": pipeline("feature-extraction", model="roberta-base", clean_up_tokenization_spaces=False),
-            "xlnet": pipeline("feature-extraction", model="xlnet-base-cased", clean_up_tokenization_spaces=False),
-            "distilbert": pipeline("feature-extraction", model="distilbert-base-uncased", clean_up_tokenization_spaces=False)
-        }
+        start = time.perf_counter()
+        self.models = load_feature_models(FEATURE_EXTRACTION_AGENT_CONFIG.get("models"))
+        self.init_cache()
+        self.logger.info(f"{self.name} loaded {len(self.models)} models in {time.perf_counter() - start:.1f}s.")
+
+    def init_cache(self):
+        """
+        Creates the embedding cache for the loaded models, so URLs that reappear in every
+        feed cycle skip inference.
+        """
+        cache_config = FEATURE_EXTRACTION_AGENT_CONFIG.get("cache", {})
+        if cache_config.get("enabled", False) and self.models:
+            self.cache = EmbeddingCache(cache_config["directory"], self.model_fingerprint(),
+                                        memory_entries=cache_config.get("memory_entries", 100000),
+                                        shard_rows=cache_config.get("shard_rows", 65536),
+                                        max_shards=cache_config.get("max_shards", 16))
 
     def run(self):
         """
         Continuously processes incoming URLs for feature extraction.
         """
         self.logger.info(f"{self.name} started.")
+
+        # Replicas share the machine, so each one gets its slice of the cores for intra-op parallelism
+        replicas = FEATURE_EXTRACTION_AGENT_CONFIG.get("replicas", 1)
+        torch.set_num_threads(self.torch_threads or max(1, (os.cpu_count() or 1) // replicas))
+
+        # Report startup cost per worker; private (USS) memory stays small when weights are shared
+        start = time.perf_counter()
+        self.load_models()
+        memory = psutil.Process().memory_full_info()
+        self.logger.info(f"{self.name} ready in {time.perf_counter() - start:.1f}s "
+                         f"(RSS {memory.rss / 2**20:.0f} MiB, private {memory.uss / 2**20:.0f} MiB).")
+
         while self.active:
             try:
-                if not self.input_queue.empty():
-                    message = self.input_queue.get()
-                    sender, data = message['sender'], message['data']
-                    self.receive_message(sender, data)
-                time.sleep(1)  # Adjust the frequency as needed
+                messages, shutdown = drain_queue(self.input_queue, self.max_batch_messages,
+                                                 self.max_batch_wait, timeout=QUEUE_POLL_TIMEOUT)
+                if messages:
+                    self.receive_batch(messages)
+                if shutdown:
+                    break
             except Exception as e:
                 self.logger.error(f"Error in {self.name}: {e}")
+        self.logger.info(f"{self.name} stopped.")
+
+    def receive_batch(self, messages):
+        """
+        Handles a micro-batch of messages. URLs from all URL messages are extracted together
+        in one call, then split back so each input message gets its own output message.
+        """
+        url_messages = []
+        for message in messages:
+            sender, data = message['sender'], message['data']
+            if "urls" in data:
+                url_messages.append(data)
+            else:
+                self.receive_message(sender, data)
+
+        if not url_messages:
+            return
+
+        features = self.extract_features([url for data in url_messages for url in data["urls"]])
+        offset = 0
+        for data in url_messages:
+            count = len(data["urls"])
+            self.send_features(data, features[offset:offset + count])
+            offset += count
 
     def receive_message(self, sender, message):
         """
@@ -48,12 +208,86 @@ class FeatureExtractionAgent(Process):  # Use Process for multiprocessing
         if "urls" in message:
             urls = message["urls"]
             features = self.extract_features(urls)
-            self.output_queue.put({"sender": self.name, "features": features})
+            self.send_features(message, features)
+
+    def send_features(self, message, features):
+        """
+        Sends the features extracted for one input message downstream. Labels on labeled
+        batches are passed through so the ClassificationAgent can learn from them.
+        """
+        data = {"request_id": message.get("request_id"), "urls": message["urls"], "features": self.pack_features(features)}
+        if "labels" in message:
+            data["labels"] = message["labels"]
+        self.output_queue.put({"sender": self.name, "data": data})
 
-    def extract_features(self, urls):
+    def pack_features(self, features):
+        """
+        Prepares a feature matrix for the output queue. With a shared memory transport the matrix is
+        written into the ring and only its descriptor is sent; otherwise (or if it does not fit or no
+        slot frees up in time) the matrix itself is sent and pickled by the queue.
+        """
+        if self.transport is not None:
+            descriptor = self.transport.write(features, timeout=self.transport_timeout)
+            if descriptor is not None:
+                return descriptor
+            self.logger.warning(f"Shared memory transport unavailable for a {np.shape(features)} matrix. Sending it inline.")
+        return features
+
+    def extract_features(self, urls, batch_size=None):
+        """
+        Extracts features from URLs according to the configured mode:
+        "lexical" (vectorized lexical/structural features only), "transformer" (the transformer
+        ensemble only) or "hybrid" (both, concatenated column-wise).
+        Returns a dense float32 matrix of shape (n_urls, dim) in the same order as `urls`.
+        """
+        if self.mode == "lexical":
+            return self.lexical_extractor.transform(urls)
+        if self.mode == "transformer":
+            return self.extract_transformer_features(urls, batch_size)
+        if self.mode == "hybrid":
+            transformer_features = self.extract_transformer_features(urls, batch_size)
+            if len(transformer_features) != len(urls):
+                return transformer_features  # Extraction failed and was already logged
+            return np.hstack([self.lexical_extractor.transform(urls), transformer_features])
+
+        raise ValueError(f"Unknown feature extraction mode: {self.mode}")
+
+    def extract_transformer_features(self, urls, batch_size=None):
         """
         Extracts features from URLs using an ensemble of transformer models (BERT, RoBERTa, XLNet, DistilBERT).
+        Each model's token outputs are pooled into one fixed-width vector and the per-model vectors are
+        combined, giving a dense float32 matrix of shape (n_urls, dim) in the same order as `urls`.
+        When batching is enabled, URLs are run through each model in padded chunks of `batch_size`.
+        URLs found in the embedding cache skip inference entirely.
         """
+        self.load_models()
+        if self.cache is None:
+            return self.compute_features(urls, batch_size)
+
+        urls = list(urls)
+        cached = self.cache.lookup(urls)
+        missing_urls = list(dict.fromkeys(url for url, vector in zip(urls, cached) if vector is None))
+
+        if missing_urls:
+            computed = self.compute_features(missing_urls, batch_size)
+            if len(computed) != len(missing_urls):
+                return computed  # Extraction failed and was already logged
+            self.cache.store(missing_urls, computed)
+            computed_rows = dict(zip(missing_urls, computed))
+            cached = [computed_rows[url] if vector is None else vector for url, vector in zip(urls, cached)]
+
+        stats = self.cache.stats()
+        self.logger.info(f"Embedding cache: {len(urls) - len(missing_urls)}/{len(urls)} URLs served from cache "
+                         f"(overall hit rate {stats['hit_rate']:.1%}).")
+        return np.vstack(cached) if urls else np.empty((0, 0), dtype=np.float32)
+
+    def compute_features(self, urls, batch_size=None):
+        """
+        Runs the transformer ensemble on URLs, batched or one at a time depending on configuration.
+        """
+        if self.batched:
+            return self.extract_features_batched(urls, batch_size or self.batch_size)
+
         try:
             features = []
 
@@ -61,40 +295,145 @@ class FeatureExtractionAgent(Process):  # Use Process for multiprocessing
             for url in urls:
                 self.logger.info(f"Extracting features for URL: {url}")
 
-                # Run each model and collect features
-                url_features = {model_name: self.models[model_name](url) for model_name in self.models}
-                
+                # Run each model and pool its token outputs into one vector
+                url_features = {}
+                for model_name, extractor in self.models.items():
+                    hidden_states = np.asarray(extractor(url, truncation=True), dtype=np.float32)
+                    attention_mask = np.ones(hidden_states.shape[:2], dtype=bool)
+                    url_features[model_name] = pool_hidden_states(hidden_states, attention_mask, self.pooling,
+                                                                  cls_last=self.cls_last(model_name))
+
                 # Combine features from all models using an ensemble method
-                combined_features = self.combine_features(url_features)
-                
-                features.append(combined_features)
+                features.append(self.combine_features(url_features))
                 self.logger.info(f"Feature extraction completed for URL: {url}")
 
             self.logger.info(f"Extracted features for {len(urls)} URLs.")
-            return features
+            return np.vstack(features) if features else np.empty((0, 0), dtype=np.float32)
 
         except Exception as e:
             self.logger.error(f"Error during feature extraction: {e}")
-            return []
+            return np.empty((0, 0), dtype=np.float32)
 
-    def combine_features(self, url_features):
+    def extract_features_batched(self, urls, batch_size):
         """
-        Combines features from multiple transformer models into a single feature vector.
-        You can use averaging, concatenation, or other ensemble methods.
+        Extracts features for a list of URLs in padded batches.
+        URLs are grouped by length so each batch is padded only to its own longest URL,
+        then the rows are put back in the original order.
         """
         try:
-            # Here we use simple averaging of the feature vectors from all models
-            model_feature_vectors = [np.array(features[0]) for features in url_features.values()]  # Extract the feature arrays
-            combined_features = np.mean(model_feature_vectors, axis=0)  # Take the average of all model outputs
-            return combined_features.tolist()
+            urls = list(urls)
+            order = np.argsort([len(url) for url in urls], kind="stable")
+            chunks = []
+
+            for start in range(0, len(order), batch_size):
+                chunk = [urls[index] for index in order[start:start + batch_size]]
+
+                # One forward pass per model for the whole chunk
+                chunk_features = {model_name: self.run_model_batch(model_name, chunk) for model_name in self.models}
+                chunks.append(self.combine_features(chunk_features))
+
+            if not chunks:
+                return np.empty((0, 0), dtype=np.float32)
+
+            features = np.empty((len(urls), chunks[0].shape[1]), dtype=np.float32)
+            features[order] = np.vstack(chunks)
+
+            self.logger.info(f"Extracted features for {len(urls)} URLs in batches of {batch_size}.")
+            return features
 
         except Exception as e:
-            self.logger.error(f"Error during feature combination: {e}")
-            return []
+            self.logger.error(f"Error during batched feature extraction: {e}")
+            return np.empty((0, 0), dtype=np.float32)
+
+    def run_model_batch(self, model_name, urls):
+        """
+        Runs one feature-extraction pipeline on a chunk of URLs with dynamic padding.
+        Returns the pooled (n_urls, hidden) float32 matrix; padding positions are ignored.
+        URLs longer than the model's limit are truncated to it, as in the one-URL-at-a-time path.
+        """
+        extractor = self.models[model_name]
+        if self.backend == "onnx":
+            encoded = extractor.tokenizer(urls, padding=True, truncation=True, return_tensors="np")
+            hidden_states = self.get_onnx_encoder(model_name)(encoded)
+        else:
+            encoded = extractor.tokenizer(urls, padding=True, truncation=True, return_tensors="pt")
+            with torch.no_grad():
+                hidden_states = extractor.model(**encoded)[0].numpy()
+
+        attention_mask = np.asarray(encoded["attention_mask"]).astype(bool)
+        return pool_hidden_states(hidden_states, attention_mask, self.pooling, cls_last=self.cls_last(model_name))
+
+    def get_onnx_encoder(self, model_name):
+        """
+        Returns the ONNX Runtime encoder for a model, exporting and (optionally) int8-quantizing
+        it the first time it is needed. Intra-op threads default to the torch thread count,
+        which run() already sized to this replica's share of the cores.
+        """
+        encoder = self.onnx_encoders.get(model_name)
+        if encoder is None:
+            encoder = build_onnx_encoder(model_name, self.models[model_name],
+                                         self.onnx_config.get("export_dir", "onnx"),
+                                         quantize=self.onnx_config.get("quantize", True),
+                                         intra_op_threads=self.onnx_config.get("intra_op_threads") or torch.get_num_threads())
+            self.onnx_encoders[model_name] = encoder
+        return encoder
+
+    def model_fingerprint(self):
+        """
+        Identifies the model set/version and pooling settings, so cached embeddings are
+        only reused when they would be computed the same way.
+        """
+        parts = [self.pooling, self.ensemble, str(self.projection_dim)]
+        if self.inference_backend() != "pytorch":
+            parts.append(self.inference_backend())
+        for model_name, extractor in sorted(self.models.items()):
+            model = extractor.model
+            parts.append(f"{model_name}={getattr(model, 'name_or_path', '')}@{getattr(model.config, '_commit_hash', '')}")
+        return "|".join(parts)
+
+    def inference_backend(self):
+        """
+        Returns the backend that actually computes the embeddings: 'onnx-int8' or 'onnx' when ONNX Runtime
+        is configured (quantized weights produce slightly different embeddings), otherwise 'pytorch'.
+        Only the batched path runs ONNX; one-URL-at-a-time extraction always uses the PyTorch pipelines.
+        """
+        if self.backend == "onnx" and self.batched:
+            return "onnx-int8" if self.onnx_config.get("quantize", True) else "onnx"
+        return "pytorch"
+
+    def cls_last(self, model_name):
+        """
+        Returns True if the model puts its summary token at the end of the sequence.
+        Left-padding tokenizers (XLNet) append <cls> after the text; the others prepend it.
+        """
+        return getattr(self.models[model_name].tokenizer, "padding_side", "right") == "left"
+
+    def combine_features(self, model_features):
+        """
+        Combines pooled features from multiple transformer models into a single feature matrix.
+        `model_features` maps model name to an (n_urls, hidden) matrix; the ensemble method is one of
+        "concat" (stack side by side), "mean" (average, requires equal widths) or "projection"
+        (concatenate, then apply a fixed random projection to `projection_dim` columns).
+        """
+        model_feature_vectors = [np.asarray(features, dtype=np.float32) for features in model_features.values()]
+
+        if self.ensemble == "mean":
+            return np.mean(model_feature_vectors, axis=0, dtype=np.float32)
+
+        combined_features = np.hstack(model_feature_vectors)
+        if self.ensemble == "concat":
+            return combined_features
+        if self.ensemble == "projection":
+            if self.projection is None or self.projection.shape[0] != combined_features.shape[1]:
+                self.projection = random_projection(combined_features.shape[1], self.projection_dim)
+            return combined_features @ self.projection
+
+        raise ValueError(f"Unknown ensemble method: {self.ensemble}")
 
     def stop(self):
         """
         Stops the agent's execution.
         """
         self.active = False
+        self.input_queue.put(SHUTDOWN)  # Unblocks run() in the agent's process
         self.logger.info("Stopping Feature Extraction Agent.")
@@ -1,8 +1,11 @@
 # agents/response_agent.py
 
 from multiprocessing import Process
-import time
+import numpy as np
 from utils.logger import get_logger
+from utils.batching import SHUTDOWN, drain_queue
+from config.agents_config import RESPONSE_AGENT_CONFIG
+from config.settings import QUEUE_POLL_TIMEOUT, MICRO_BATCH_MAX_MESSAGES, MICRO_BATCH_MAX_WAIT_MS
 from cryptography.fernet import Fernet
 from multiprocessing import Queue
 
@@ -16,6 +19,8 @@ class ResponseAgent(Process):  # Switch to Process for multiprocessing
         self.logger = get_logger(self.name)
         self.encryption_key = Fernet.generate_key()
         self.cipher = Fernet(self.encryption_key)
+        self.min_score = RESPONSE_AGENT_CONFIG.get("min_score", 0.0)
+        self.high_severity_score = RESPONSE_AGENT_CONFIG.get("high_severity_score", 0.9)
 
     def run(self):
         """
@@ -23,7 +28,16 @@ class ResponseAgent(Process):  # Switch to Process for multiprocessing
         """
         self.logger.info(f"{self.name} started.")
         while self.active:
-            time.sleep(1)  # Wait for messages to arrive
+            try:
+                messages, shutdown = drain_queue(self.input_queue, MICRO_BATCH_MAX_MESSAGES,
+                                                 MICRO_BATCH_MAX_WAIT_MS / 1000, timeout=QUEUE_POLL_TIMEOUT)
+                for message in messages:
+                    self.receive_message(message['sender'], message['data'])
+                if shutdown:
+                    break
+            except Exception as e:
+                self.logger.error(f"Error in {self.name}: {e}")
+        self.logger.info(f"{self.name} stopped.")
 
     def receive_message(self, sender, message):
         """
@@ -31,32 +45,54 @@ class ResponseAgent(Process):  # Switch to Process for multiprocessing
         """
         if "classifications" in message:
             classifications = message["classifications"]
-            self.take_action(classifications)
+            scores = message.get("scores")
+            if message.get("urls") is not None:
+                # Classification results arrive as a list aligned with the URLs they belong to
+                urls = message["urls"]
+                classifications = dict(zip(urls, classifications))
+                if scores is not None:
+                    scores = dict(zip(urls, np.asarray(scores, dtype=np.float32).tolist()))
+            self.take_action(classifications, scores)
 
-    def take_action(self, classifications):
+    def take_action(self, classifications, scores=None):
         """
         Takes action based on URL classification results.
         Encrypts and logs the results, sends alerts or blocks URLs.
+
+        When malicious scores are available, URLs are handled from the highest score down so the
+        most likely threats are blocked first, and benign URLs scored below `min_score` are skipped
+        entirely. URLs labeled malicious are always handled, whatever decision threshold produced the label.
         """
-        for url, classification in classifications.items():
+        urls = list(classifications)
+        if scores is not None:
+            urls = [url for url in sorted(urls, key=scores.get, reverse=True)
+                    if scores[url] >= self.min_score or classifications[url] == "malicious"]
+            skipped = len(classifications) - len(urls)
+            if skipped:
+                self.logger.info(f"Skipped {skipped} benign URLs scored below {self.min_score}.")
+
+        for url in urls:
+            score = scores[url] if scores is not None else None
             encrypted_url = self.cipher.encrypt(url.encode())
-            if classification == "malicious":
-                self.logger.warning(f"Blocked URL: {url}")
+            if classifications[url] == "malicious":
+                self.logger.warning(f"Blocked URL: {url}" + (f" (score {score:.3f})" if score is not None else ""))
                 # Example: Implement an API call or firewall rule to block the URL
-                self.send_alert(url, encrypted_url)
+                self.send_alert(url, encrypted_url, score)
             else:
                 self.logger.info(f"URL is benign: {url}")
 
-    def send_alert(self, url, encrypted_url):
+    def send_alert(self, url, encrypted_url, score=None):
         """
-        Sends an alert for a malicious URL.
+        Sends an alert for a malicious URL, with a severity derived from its score when known.
         """
+        severity = "high" if score is not None and score >= self.high_severity_score else "normal"
         # Placeholder for alert logic (e.g., send email, SMS alert, or push to monitoring system)
-        self.logger.info(f"Alert sent for malicious URL: {url}, Encrypted: {encrypted_url}")
+        self.logger.info(f"Alert sent for malicious URL ({severity} severity): {url}, Encrypted: {encrypted_url}")
 
     def stop(self):
         """
         Stops the agent's execution.
         """
         self.active = False
+        self.input_queue.put(SHUTDOWN)  # Unblocks run() in the agent's process
         self.logger.info("Stopping Response Agent.")
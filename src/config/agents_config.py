@@ -9,11 +9,50 @@ from config.settings import *
 # Data Collection Agent Settings
 DATA_COLLECTION_AGENT_CONFIG = {
     "enabled": True,
+    "queue_maxsize": STAGE_QUEUE_MAXSIZE,  # Bound on this stage's input queue
     "data_sources": [
         "https://example.com/urls",
         "https://another-source.com/feed"
     ],
-    "scraping_interval": DATA_COLLECTION_INTERVAL,
+    "scraping_interval": DATA_COLLECTION_INTERVAL,  # Initial poll interval of sources without their own "interval"
+    "scheduler": {  # Per-source intervals adapt to churn: shorter after polls with new URLs, longer after empty ones
+        "min_interval": DATA_COLLECTION_INTERVAL,
+        "max_interval": 86400,
+        "speedup": 0.5,  # Interval factor after a poll that found new URLs
+        "slowdown": 1.5,  # Interval factor after a poll that found none
+        "jitter": 0.1,  # Each wait is randomly lengthened or shortened by up to this fraction
+    },
+    "message_size": 256,  # URLs per message sent to feature extraction
+    "max_workers": 8,  # Sources fetched concurrently
+    "cycle_timeout": 300,  # Seconds after which sources still running are abandoned for this cycle
+    "connection_pool_size": 10,  # Pooled connections kept per host by the shared HTTP session
+    "incremental": True,  # Conditional requests (ETag/Last-Modified); only URLs new since a feed's last snapshot are sent on
+    "feed_state_dir": "data/feed_state",  # Per-source validators and URL snapshot hashes
+    "seen_index": {
+        "enabled": True,  # Only send URLs that were never sent before, across cycles and restarts
+        "path": "data/seen_urls.sqlite",  # SQLite index of 64-bit URL hashes, with its Bloom filter saved alongside
+        "capacity": 20000000,  # URLs the in-memory Bloom filter is sized for (~34 MiB at 0.1%)
+        "error_rate": 0.001,  # Fraction of new URLs that still need an SQLite lookup
+    },
+    # Per-source settings: timeout is seconds to connect and between bytes received per attempt,
+    # retries are extra attempts after a connection error, timeout or 429/5xx, with exponential backoff
+    "sources": {
+        "openphish": {"enabled": True, "url": "https://openphish.com/feed.txt", "timeout": 30, "retries": 3, "backoff": 1.0},
+        "phishtank": {"enabled": True, "url": "http://data.phishtank.com/data/online-valid.csv", "timeout": 60, "retries": 3,
+                      "backoff": 2.0},
+        "phishing_database": {"enabled": True, "url": "https://phishingdatabase.com/download/all.txt", "timeout": 60,
+                              "retries": 3, "backoff": 2.0},
+        "twitter": {"enabled": True, "timeout": 30, "interval": 900},
+        "email": {"enabled": True, "host": "imap.gmail.com", "port": 993, "use_ssl": True, "timeout": 30, "interval": 300,
+                  "user": "your_email@gmail.com", "password": "your_password",  # Replace with actual credentials
+                  "mailbox": "INBOX",
+                  "batch_size": 200,  # Messages per batched UID FETCH
+                  "initial_messages": 10,  # Latest messages processed on the first run; later runs take every new UID
+                  "max_part_bytes": 1000000,  # Larger text parts are skipped
+                  "state_path": "data/feed_state/email.json"},  # Last processed UID and the mailbox's UIDVALIDITY
+        "dark_web": {"enabled": True, "url": "http://exampleonion.onion", "timeout": 120, "retries": 1, "backoff": 5.0, "interval": 3600,
+                     "proxy": "socks5h://127.0.0.1:9050"},  # Tor; socks5h resolves .onion names through the proxy
+    },
     "api_keys": {
         "source1": "your-api-key-here",
         "source2": "another-api-key"
@@ -23,21 +62,92 @@ DATA_COLLECTION_AGENT_CONFIG = {
 # Feature Extraction Agent Settings
 FEATURE_EXTRACTION_AGENT_CONFIG = {
     "enabled": True,
+    "queue_maxsize": STAGE_QUEUE_MAXSIZE,  # Bound on this stage's input queue
+    "replicas": 1,  # Worker processes sharing this stage's queue; each gets cpu_count // replicas torch threads
     "model_name": "all-MiniLM-L6-v2",  # Name of the SentenceTransformer model
-    "batch_size": 32,
+    "micro_batch_max_messages": MICRO_BATCH_MAX_MESSAGES,
+    "micro_batch_max_wait_ms": MICRO_BATCH_MAX_WAIT_MS,
+    "mode": "transformer",  # "lexical" (fast path, no models loaded), "transformer" or "hybrid" (both)
+    "models": {  # Transformer ensemble, loaded inside each agent process after it starts
+        "bert": "bert-base-uncased",
+        "roberta": "roberta-base",
+        "xlnet": "xlnet-base-cased",
+        "distilbert": "distilbert-base-uncased",
+    },
+    "share_weights": False,  # Load the ensemble once before starting replicas and share it read-only
+    "backend": "pytorch",  # Batched inference runtime: "pytorch" (eager fp32) or "onnx" (ONNX Runtime)
+    "onnx": {
+        "export_dir": MODEL_SAVE_PATH + "feature_extraction/onnx",  # Exported models, reused across restarts
+        "quantize": True,  # Dynamic int8 quantization of the weights
+        "intra_op_threads": None,  # None uses the same thread count as PyTorch
+    },
+    "batch_size": 32,  # Number of URLs tokenized and run through each model per forward pass
+    "batched": True,  # Set to False to run the models one URL at a time
+    "pooling": "mean",  # How token outputs become one vector per model: "mean", "cls" or "max"
+    "ensemble": "concat",  # How per-model vectors are combined: "concat", "mean" or "projection"
+    "projection_dim": 768,  # Output width when ensemble is "projection"
+    "shared_memory": {
+        "enabled": True,  # Send feature matrices to classification through a shared memory ring
+        "slots": 8,  # Matrices that can be in flight at once
+        "slot_bytes": 4 * 1024 * 1024,  # Larger matrices fall back to being pickled through the queue
+        "write_timeout": 1.0,  # Seconds to wait for a free slot before falling back
+    },
+    "cache": {
+        "enabled": True,
+        "directory": MODEL_SAVE_PATH + "feature_extraction/embedding_cache",
+        "memory_entries": 100000,  # Embeddings kept in the in-memory LRU tier
+        "shard_rows": 65536,  # Rows per memory-mapped float32 shard on disk
+        "max_shards": 16,  # Shards kept on disk; the oldest is deleted when a new one is started
+    },
 }
 
 # Classification Agent Settings
 CLASSIFICATION_AGENT_CONFIG = {
     "enabled": True,
-    "model_path": MODEL_SAVE_PATH + MODEL_NAME,
+    "queue_maxsize": STAGE_QUEUE_MAXSIZE,  # Bound on this stage's input queue
+    "model_path": MODEL_REGISTRY_PATH,  # Registry of model bundles; the newest version is loaded at start
+    "hot_reload": {
+        "enabled": True,  # Watch model_path and switch to new bundle versions without a restart
+        "poll_interval": 5.0,  # Seconds between checks of the registry
+        "warmup_rows": 256,  # Rows of recent input a new model is warmed up (and timed) on before the swap
+        "slowdown_warning": 1.5,  # Warn when a new version's latency per URL exceeds the serving one's by this factor
+    },
     "retrain_on_start": False,
+    "model_backend": "hist_gradient_boosting",  # Or "gradient_boosting", "logistic_regression", "sgd"
+    "sparse_model_backend": "logistic_regression",  # Backend trained on sparse input (the hashing featurizer)
+    "decision_threshold": 0.5,  # URLs whose malicious score reaches this are labeled malicious
+    "calibration": {
+        "method": None,  # None, "sigmoid" or "isotonic": calibrate scores when training the model
+        "folds": 3,  # Cross-validation folds used for calibration
+    },
+    "replicas": 1,  # Worker processes sharing this stage's queue
+    "micro_batch_max_messages": MICRO_BATCH_MAX_MESSAGES,
+    "micro_batch_max_wait_ms": MICRO_BATCH_MAX_WAIT_MS,
+    "cascade": {
+        "enabled": False,  # Classify raw URLs with a cheap lexical model first
+        "uncertainty_band": (0.2, 0.8),  # Stage-1 probabilities in this range go to the transformer ensemble
+    },
+    "featurizer": {
+        "type": "embeddings",  # "embeddings" (features from the FeatureExtractionAgent) or "hashing" (raw URLs
+                               # are featurized here from hashed character n-grams, skipping feature extraction)
+        "n_features": 2 ** 20,  # Hashed feature columns; must match the value the model was trained with
+        "ngram_range": (3, 5),  # Character n-gram lengths
+    },
+    "online_learning": {
+        "enabled": False,  # Update an SGD (logistic loss) model from labeled batches instead of full retrains
+        "alpha": 1e-6,  # SGD regularization strength
+        "max_pending_batches": 16,  # Labeled batches queued for the trainer before new ones are dropped
+    },
 }
 
 # Response Agent Settings
 RESPONSE_AGENT_CONFIG = {
     "enabled": True,
+    "queue_maxsize": STAGE_QUEUE_MAXSIZE,  # Bound on this stage's input queue
+    "replicas": 1,  # Worker processes sharing this stage's queue
     "alert_methods": ["email", "sms"],  # Methods to send alerts for malicious URLs
+    "min_score": 0.1,  # Benign URLs scored below this are skipped without any further work
+    "high_severity_score": 0.9,  # Malicious URLs scored at least this are alerted as high severity
     "encryption_key": ENCRYPTION_KEY,
 }
 
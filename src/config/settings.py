@@ -24,6 +24,7 @@ PROMETHEUS_PORT = 8000
 # Model Paths
 MODEL_SAVE_PATH = "models/"
 MODEL_NAME = "url_classifier.pkl"
+MODEL_REGISTRY_PATH = MODEL_SAVE_PATH + "classification/registry"  # Versioned model bundles (see utils.model_bundle)
 
 # Security Settings
 ENCRYPTION_KEY = b'your-generated-encryption-key-here'  # Replace with your generated encryption key
@@ -34,3 +35,9 @@ SYSTEM_OPTIMIZATION_INTERVAL = 30  # Time interval in seconds for system optimiz
 SECURITY_AUDIT_INTERVAL = 120  # Time interval in seconds for security audits
 HEALTH_MONITORING_INTERVAL = 15  # Time interval in seconds for health monitoring
 
+# Agent Queue Settings
+QUEUE_POLL_TIMEOUT = 1.0  # Seconds an agent blocks on its input queue before re-checking its state
+MICRO_BATCH_MAX_MESSAGES = 32  # Maximum messages an agent processes together
+MICRO_BATCH_MAX_WAIT_MS = 20  # Maximum time an agent waits for a micro-batch to fill up
+STAGE_QUEUE_MAXSIZE = 64  # Messages buffered per pipeline stage before producers block
+
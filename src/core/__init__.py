@@ -7,9 +7,9 @@ This package includes essential components such as the decentralized coordinatio
 responsible for facilitating communication and coordination among the various agents.
 """
 
-from .coordination_hub import CoordinationHub
+from .coordination_hub import CoordinationHub, MessageBus
 
 # You can add any common configuration or initialization logic here.
 # Example: Initialize global variables or setup configurations that are shared across the core modules.
 
-__all__ = ['CoordinationHub']
+__all__ = ['CoordinationHub', 'MessageBus']
@@ -1,13 +1,107 @@
 # core/coordination_hub.py
 
 import threading
+from multiprocessing import Queue
 from utils.logger import get_logger
 
+# Pipeline topology: message type -> stage whose queue receives it
+DEFAULT_ROUTES = {
+    "urls": "feature_extraction",
+    "features": "classification",
+    "classifications": "response",
+}
+
+# When a message carries several payloads, the most downstream one decides its type
+# (e.g. classification results also carry the URLs they belong to)
+MESSAGE_TYPES = ["classifications", "features", "urls"]
+
+class MessageBus:
+    """
+    Routes messages between pipeline stages.
+
+    Each stage has its own bounded multiprocessing.Queue. Agents use the bus as their output queue:
+    `put()` looks at the message type and forwards it to the queue of the stage that consumes it.
+    When a stage's queue is full, `put()` blocks the producer, so a slow stage applies backpressure
+    upstream instead of letting memory grow without limit.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.queues = {}
+        self.logger = get_logger("MessageBus")
+
+    def add_stage(self, stage, maxsize=0):
+        """
+        Creates the input queue for a stage. A maxsize of 0 means unbounded.
+        """
+        self.queues[stage] = Queue(maxsize)
+        return self.queues[stage]
+
+    def queue(self, stage):
+        """
+        Returns the input queue of a stage.
+        """
+        return self.queues[stage]
+
+    def message_type(self, message):
+        """
+        Returns the type of a message: its explicit "type" field, or the most downstream
+        payload key present in its data.
+        """
+        if "type" in message:
+            return message["type"]
+        data = message.get("data", {})
+        for message_type in MESSAGE_TYPES:
+            if message_type in data:
+                return message_type
+        return None
+
+    def put(self, message, block=True, timeout=None):
+        """
+        Routes a message to the queue of the stage that consumes its type.
+        Blocks while that queue is full (raises queue.Full if `timeout` expires).
+        """
+        message_type = self.message_type(message)
+        stage = self.routes.get(message_type)
+        if stage not in self.queues:
+            self.logger.warning(f"Dropping message of type {message_type} from {message.get('sender')}: no stage consumes it.")
+            return
+        self.queues[stage].put(message, block, timeout)
+
 class CoordinationHub:
-    def __init__(self):
+    def __init__(self, routes=None):
         self.agents = {}
         self.lock = threading.Lock()
         self.logger = get_logger("CoordinationHub")
+        self.bus = MessageBus(routes)
+        self.stages = {}  # stage -> names of the agents (replicas) consuming its queue
+        self.agent_kwargs = {}  # agent name -> keyword arguments it was launched with, reused on restart
+
+    def launch_stage(self, stage, agent_class, replicas=1, **kwargs):
+        """
+        Creates and registers `replicas` agents of `agent_class` for a pipeline stage.
+        All replicas consume the stage's input queue (created if needed) and publish to the bus,
+        so work is spread across them; results carry the request ID of the message they answer.
+
+        Returns:
+            list: The created agents.
+        """
+        if stage not in self.bus.queues:
+            self.bus.add_stage(stage)
+
+        agents = []
+        for replica in range(replicas):
+            agent = agent_class(self.bus.queue(stage), self.bus, **kwargs)
+            if replicas > 1:
+                agent.name = f"{agent.name}-{replica}"
+                agent.logger = get_logger(agent.name)
+            self.register_agent(agent)
+            self.agent_kwargs[agent.name] = kwargs
+            agents.append(agent)
+
+        self.stages[stage] = [agent.name for agent in agents]
+        self.logger.info(f"Stage {stage} launched with {replicas} {agent_class.__name__} replica(s).")
+        return agents
 
     def register_agent(self, agent):
         """
@@ -27,15 +121,22 @@ class CoordinationHub:
                 agent.start()
                 self.logger.info(f"Agent {agent_name} started.")
 
-    def stop(self):
+    def stop(self, timeout=10):
         """
         Stops all agents and shuts down the hub.
+        Agents that have not exited `timeout` seconds after being asked to stop are terminated.
         """
         self.logger.info("Stopping all agents and Coordination Hub.")
         with self.lock:
             for agent_name, agent in self.agents.items():
                 agent.stop()
-                agent.join()  # Ensures all agents stop cleanly
+            for agent_name, agent in self.agents.items():
+                agent.join(timeout)  # Ensures all agents stop cleanly
+                if agent.is_alive():
+                    # Agents sleeping between periodic tasks do not watch a queue; end them directly
+                    self.logger.warning(f"Agent {agent_name} did not stop within {timeout}s. Terminating.")
+                    agent.terminate()
+                    agent.join()
                 self.logger.info(f"Agent {agent_name} stopped.")
         self.logger.info("Coordination Hub stopped.")
 
@@ -66,10 +167,18 @@ class CoordinationHub:
 
     def restart_agent(self, agent_name):
         """
-        Restarts a failed agent by re-initializing it.
+        Restarts a failed agent by re-initializing it with the arguments it was launched with
+        (e.g. the shared memory transport and shared model weights).
         """
         original_agent = self.agents[agent_name]
         self.logger.info(f"Re-initializing agent: {agent_name}")
-        # Reinitialize the agent with the same configuration
-        new_agent = original_agent.__class__(self)  # Pass the CoordinationHub (self) to the new agent
+        # Shared memory slots the failed agent was still reading would otherwise never be freed
+        transport = self.agent_kwargs.get(agent_name, {}).get("transport")
+        if transport is not None and original_agent.pid is not None:
+            transport.reclaim(original_agent.pid)
+        # Reinitialize the agent with the same queues so it rejoins its stage
+        new_agent = original_agent.__class__(original_agent.input_queue, original_agent.output_queue,
+                                             **self.agent_kwargs.get(agent_name, {}))
+        new_agent.name = agent_name
+        new_agent.logger = get_logger(agent_name)
         return new_agent
@@ -1,29 +1,27 @@
 # main.py
-from core.coordination_hub import CoordinationHub
+from core.coordination_hub import CoordinationHub, DEFAULT_ROUTES
 from agents.data_collection_agent import DataCollectionAgent
-from agents.feature_extraction_agent import FeatureExtractionAgent
+from agents.feature_extraction_agent import FeatureExtractionAgent, load_feature_models, share_model_weights
 from agents.classification_agent import ClassificationAgent
 from agents.response_agent import ResponseAgent
 from agents.system_optimizer_agent import SystemOptimizerAgent
 from agents.security_auditor_agent import SecurityAuditorAgent
 from agents.health_monitoring_agent import HealthMonitoringAgent
 from utils.logger import setup_logging
+from utils.shared_ring import SharedArrayRing
+from config.agents_config import (
+    DATA_COLLECTION_AGENT_CONFIG,
+    FEATURE_EXTRACTION_AGENT_CONFIG,
+    CLASSIFICATION_AGENT_CONFIG,
+    RESPONSE_AGENT_CONFIG,
+)
 import logging
-import multiprocessing
 import time
-from multiprocessing import Queue
 
 # Configure global logging settings
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def run_agent(agent):
-    """
-    Function to start each agent by running their run() method.
-    This avoids using threading and relies on multiprocessing instead.
-    """
-    agent.run()
-
 def main():
     """
     Entry point for the BustedURL system.
@@ -34,52 +32,62 @@ def main():
 
     logger.info("BustedURL application started")
     try:
-        # Initialize the Coordination Hub (if still needed for logging, monitoring, etc.)
-        hub = CoordinationHub()
+        # In cascade mode, or with the hashing featurizer, the classification stage consumes raw URLs itself
+        routes = dict(DEFAULT_ROUTES)
+        if (CLASSIFICATION_AGENT_CONFIG.get("cascade", {}).get("enabled", False)
+                or CLASSIFICATION_AGENT_CONFIG.get("featurizer", {}).get("type") == "hashing"):
+            routes["urls"] = "classification"
+
+        # Initialize the Coordination Hub, which owns the message bus between pipeline stages
+        hub = CoordinationHub(routes)
+        bus = hub.bus
+
+        # Each stage gets its own bounded input queue; the bus routes outputs by message type
+        bus.add_stage("data_collection", DATA_COLLECTION_AGENT_CONFIG.get("queue_maxsize", 0))
+        bus.add_stage("feature_extraction", FEATURE_EXTRACTION_AGENT_CONFIG.get("queue_maxsize", 0))
+        bus.add_stage("classification", CLASSIFICATION_AGENT_CONFIG.get("queue_maxsize", 0))
+        bus.add_stage("response", RESPONSE_AGENT_CONFIG.get("queue_maxsize", 0))
+
+        # Feature matrices travel from extraction to classification through shared memory
+        shared_memory_config = FEATURE_EXTRACTION_AGENT_CONFIG.get("shared_memory", {})
+        transport = None
+        if shared_memory_config.get("enabled", False):
+            transport = SharedArrayRing(shared_memory_config.get("slots", 8), shared_memory_config.get("slot_bytes", 4 * 1024 * 1024))
+
+        # Optionally load the transformer ensemble once and share its weights with every extraction
+        # replica; otherwise each replica loads its own copy after it starts
+        feature_models = None
+        if FEATURE_EXTRACTION_AGENT_CONFIG.get("share_weights", False):
+            start = time.perf_counter()
+            feature_models = share_model_weights(load_feature_models(FEATURE_EXTRACTION_AGENT_CONFIG.get("models")))
+            logger.info(f"Loaded shared transformer weights in {time.perf_counter() - start:.1f}s.")
 
-        # Create Queues for inter-process communication
-        input_queue = Queue()
-        output_queue = Queue()
+        # Launch each stage's agents on their stage's input queue, with the bus as output.
+        # Pipeline stages can run several replicas that share one work queue.
+        hub.launch_stage("data_collection", DataCollectionAgent)
+        hub.launch_stage("feature_extraction", FeatureExtractionAgent,
+                         replicas=FEATURE_EXTRACTION_AGENT_CONFIG.get("replicas", 1), transport=transport,
+                         models=feature_models)
+        hub.launch_stage("classification", ClassificationAgent,
+                         replicas=CLASSIFICATION_AGENT_CONFIG.get("replicas", 1), transport=transport)
+        hub.launch_stage("response", ResponseAgent, replicas=RESPONSE_AGENT_CONFIG.get("replicas", 1))
+        hub.launch_stage("system_optimizer", SystemOptimizerAgent)
+        hub.launch_stage("security_auditor", SecurityAuditorAgent)
+        hub.launch_stage("health_monitoring", HealthMonitoringAgent)
 
-        # Initialize Agents with input_queue and output_queue
-        data_collection_agent = DataCollectionAgent(input_queue, output_queue)
-        feature_extraction_agent = FeatureExtractionAgent(input_queue, output_queue)
-        classification_agent = ClassificationAgent(input_queue, output_queue)
-        response_agent = ResponseAgent(input_queue, output_queue)
-        system_optimizer_agent = SystemOptimizerAgent(input_queue, output_queue)
-        security_auditor_agent = SecurityAuditorAgent(input_queue, output_queue)
-        health_monitoring_agent = HealthMonitoringAgent(input_queue, output_queue)
-    
-        # Start the Coordination Hub (if necessary)
+        # Start the Coordination Hub, which starts every registered agent process
         hub.start()
 
-        # Create processes for each agent and directly run the `run()` method
-        processes = [
-            multiprocessing.Process(target=run_agent, args=(data_collection_agent,)),
-            multiprocessing.Process(target=run_agent, args=(feature_extraction_agent,)),
-            multiprocessing.Process(target=run_agent, args=(classification_agent,)),
-            multiprocessing.Process(target=run_agent, args=(response_agent,)),
-            multiprocessing.Process(target=run_agent, args=(system_optimizer_agent,)),
-            multiprocessing.Process(target=run_agent, args=(security_auditor_agent,)),
-            multiprocessing.Process(target=run_agent, args=(health_monitoring_agent,))
-        ]
-    
-        # Start all processes
-        for process in processes:
-            process.start()
-    
-        # Monitor agents and handle any failures or restarts
+        # Monitor agents and restart any that died
         try:
             while True:
-                # Monitor agent status or handle inter-process communication here
+                hub.monitor_agents()
                 time.sleep(5)  # Adjust the monitoring interval as needed
         except KeyboardInterrupt:
             print("Shutting down BustedURL system...")
             hub.stop()
-            # Terminate all agent processes
-            for process in processes:
-                process.terminate()
-                process.join()
+            if transport is not None:
+                transport.close()
             print("All agents have been stopped. System exited successfully.")
         logger.info("All agents started successfully")
     except Exception as e:
@@ -0,0 +1,71 @@
+# utils/batching.py
+
+import time
+from queue import Empty
+
+# Put on an agent's input queue by stop() to unblock a waiting run() loop and end it
+SHUTDOWN = "__BUSTEDURL_SHUTDOWN__"
+
+def drain_queue(queue, max_messages, max_wait, timeout):
+    """
+    Collects a micro-batch of messages from a queue.
+
+    Blocks for up to `timeout` seconds for the first message, then keeps collecting until
+    `max_messages` have been gathered or `max_wait` seconds have passed since the first one.
+    Messages already waiting in the queue are always drained up to `max_messages`.
+
+    Args:
+        queue (multiprocessing.Queue): Queue to read from.
+        max_messages (int): Maximum number of messages in one batch.
+        max_wait (float): Maximum time in seconds to wait for the batch to fill up.
+        timeout (float): Maximum time in seconds to block waiting for the first message.
+
+    Returns:
+        tuple: (messages, shutdown) where shutdown is True if the SHUTDOWN sentinel was received.
+    """
+    try:
+        message = queue.get(timeout=timeout)
+    except Empty:
+        return [], False
+
+    messages = []
+    deadline = time.monotonic() + max_wait
+    while True:
+        if isinstance(message, str) and message == SHUTDOWN:
+            return messages, True
+        messages.append(message)
+        if len(messages) >= max_messages:
+            break
+
+        remaining = deadline - time.monotonic()
+        try:
+            message = queue.get(timeout=remaining) if remaining > 0 else queue.get_nowait()
+        except Empty:
+            break
+
+    return messages, False
+
+def discard_pending(queue):
+    """
+    Empties a queue without blocking, e.g. on shutdown, so the caller can release resources
+    held by the messages left in it. SHUTDOWN sentinels meant for other replicas are put back.
+
+    Args:
+        queue (multiprocessing.Queue): Queue to empty.
+
+    Returns:
+        list: The discarded messages.
+    """
+    messages, sentinels = [], 0
+    while True:
+        try:
+            message = queue.get_nowait()
+        except Empty:
+            break
+        if isinstance(message, str) and message == SHUTDOWN:
+            sentinels += 1
+        else:
+            messages.append(message)
+    for _ in range(sentinels):
+        queue.put(SHUTDOWN)
+    return messages
@@ -0,0 +1,105 @@
+# utils/bloom_filter.py
+
+import math
+import os
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger("BloomFilter")
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 64-bit keys, backed by a NumPy bit array.
+
+    Memory is set once from the expected number of items and the target false positive rate,
+    so membership checks over an unbounded stream stay in constant memory. Keys are added and
+    checked a whole array at a time: strings are hashed with pandas' vectorized 64-bit hash and
+    the k bit positions come from double hashing of that value.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0  # Keys added that were not already (probably) present
+        logger.info(f"Created Bloom filter for {capacity} items at {error_rate} error rate "
+                    f"({self.bits.nbytes / 2**20:.1f} MiB, {self.n_hashes} hashes).")
+
+    @staticmethod
+    def hash_keys(keys):
+        """
+        Returns one uint64 hash per key. uint64 arrays (e.g. row hashes from
+        pd.util.hash_pandas_object) are used as they are; anything else is hashed as strings.
+        """
+        keys = np.asarray(keys)
+        if keys.dtype == np.uint64:
+            return keys
+        return pd.util.hash_array(keys.astype(object))
+
+    def positions(self, hashes):
+        """
+        Returns the (n_keys, n_hashes) bit positions of each key.
+        """
+        # Second, independent hash derived with the splitmix64 finalizer; forced odd so it never repeats positions
+        mixed = hashes ^ (hashes >> np.uint64(30))
+        mixed = mixed * np.uint64(0xBF58476D1CE4E5B9)
+        mixed = mixed ^ (mixed >> np.uint64(27))
+        mixed = (mixed * np.uint64(0x94D049BB133111EB)) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (hashes[:, np.newaxis] + steps * mixed[:, np.newaxis]) % np.uint64(self.n_bits)
+
+    def contains(self, keys):
+        """
+        Returns a boolean array, True where a key is probably in the filter
+        (false positives at about `error_rate`, never false negatives).
+        """
+        positions = self.positions(self.hash_keys(keys))
+        bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, keys):
+        """
+        Adds keys to the filter.
+
+        Returns:
+            np.ndarray: Boolean array, True where the key was not (probably) present before.
+            Keys repeated within one call are all reported as new, so pass unique keys.
+        """
+        hashes = self.hash_keys(keys)
+        new = ~self.contains(hashes)
+        positions = self.positions(hashes[new]).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        self.count += int(new.sum())
+        return new
+
+    def save(self, path):
+        """
+        Saves the filter to a .npz file, replacing any previous one atomically.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, bits=self.bits, capacity=self.capacity, error_rate=self.error_rate, count=self.count)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a filter saved with save().
+        """
+        with np.load(path) as data:
+            bloom = cls(int(data["capacity"]), float(data["error_rate"]))
+            if data["bits"].shape != bloom.bits.shape:
+                raise ValueError(f"Bloom filter in {path} does not match its capacity and error rate.")
+            bloom.bits = data["bits"]
+            bloom.count = int(data["count"])
+        return bloom
+
+    def __contains__(self, key):
+        return bool(self.contains([key])[0])
+
+    def __len__(self):
+        return self.count
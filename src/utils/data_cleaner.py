@@ -1,49 +1,81 @@
 # utils/data_cleaner.py
 
+import numpy as np
 import pandas as pd
 import re
+from utils.bloom_filter import BloomFilter
 from utils.logger import get_logger
 
 logger = get_logger("DataCleaner")
 
+# Compiled once at import instead of on every call
+UNWANTED_CHARS = re.compile(r"[^\w\s:/.-]")
+URL_PATTERN = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
+    r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+INVALID_SAMPLE_SIZE = 5  # Invalid URLs quoted in the summary log line
+STREAM_CHUNK_SIZE = 100000  # Rows read, cleaned and written at a time in streaming mode
+DEDUPE_ERROR_RATE = 0.001  # Fraction of unique rows a Bloom filter may wrongly drop as duplicates
+
+def clean_url_series(urls, sample_size=INVALID_SAMPLE_SIZE):
+    """
+    Cleans URLs in bulk with vectorized pandas string operations: strips whitespace, removes
+    unwanted characters, lowercases and drops URLs that are not well-formed.
+
+    Args:
+        urls (pd.Series | list | pyarrow.Array): URLs to clean. Arrow-backed string Series are
+                                                  processed without converting to Python objects.
+        sample_size (int): Number of invalid URLs to keep as examples.
+
+    Returns:
+        tuple: (cleaned pd.Series keeping the index of the valid rows,
+                report dict with 'total', 'invalid' and a 'sample' of invalid URLs)
+    """
+    if hasattr(urls, "to_pandas") and not isinstance(urls, pd.Series):
+        urls = urls.to_pandas()
+    elif not isinstance(urls, pd.Series):
+        urls = pd.Series(list(urls), dtype=object)
+
+    cleaned = urls.str.strip().str.replace(UNWANTED_CHARS, "", regex=True).str.lower()
+    valid = cleaned.str.match(URL_PATTERN, na=False).astype(bool)
+
+    invalid = cleaned[~valid]
+    report = {
+        "total": len(urls),
+        "invalid": len(invalid),
+        "sample": invalid.head(sample_size).tolist(),
+    }
+    return cleaned[valid], report
+
+def log_invalid_report(report):
+    """
+    Logs one summary line for the invalid URLs found by clean_url_series.
+    """
+    if report["invalid"]:
+        logger.warning(f"Removed {report['invalid']} invalid URLs out of {report['total']} "
+                       f"(sample: {report['sample']}).")
+
 def clean_urls(urls):
     """
     Cleans a list of URLs by removing unwanted characters, normalizing formats, 
     and ensuring they are well-formed.
     """
-    cleaned_urls = []
-    for url in urls:
-        # Remove leading/trailing whitespace
-        url = url.strip()
-        
-        # Normalize by removing unwanted characters
-        url = re.sub(r"[^\w\s:/.-]", "", url)
-        
-        # Convert to lowercase
-        url = url.lower()
-        
-        if validate_url(url):
-            cleaned_urls.append(url)
-        else:
-            logger.warning(f"Invalid URL removed: {url}")
+    cleaned_urls, report = clean_url_series(urls)
+    log_invalid_report(report)
 
     logger.info(f"Cleaned {len(cleaned_urls)} URLs from {len(urls)} original URLs.")
-    return cleaned_urls
+    return cleaned_urls.tolist()
 
 def validate_url(url):
     """
     Validates a URL to ensure it is well-formed.
     """
-    regex = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
-        r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    
-    return re.match(regex, url) is not None
+    return URL_PATTERN.match(url) is not None
 
 def clean_dataframe(df, columns):
     """
@@ -62,20 +94,118 @@ def clean_dataframe(df, columns):
     logger.info(f"Cleaned DataFrame from {original_size} rows to {cleaned_size} rows.")
     return df
 
-def clean_data(raw_file_path, cleaned_file_path):
+def count_data_rows(file_path):
+    """
+    Counts the lines after the header of a CSV file without parsing it. Quoted fields spanning
+    several lines make this an overestimate, which is the safe side for sizing a Bloom filter.
+    """
+    with open(file_path, "rb") as f:
+        return max(0, sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) - 1)
+
+def clean_csv_stream(raw_file_path, cleaned_file_path, chunk_size=STREAM_CHUNK_SIZE, dedupe="exact",
+                     capacity=None, error_rate=DEDUPE_ERROR_RATE):
+    """
+    Cleans a CSV file chunk by chunk, so memory stays constant however large the file is.
+
+    Each chunk gets the same cleaning as clean_data (URL cleaning, dropping missing values,
+    normalizing text columns), then rows already written by an earlier chunk are dropped using
+    a 64-bit hash of the whole row, and the remaining rows are appended to the output file.
+    Rows are hashed from their text, since pandas may infer a column's dtype differently in each
+    chunk. The header is written up front, so even an input without rows gives a valid CSV file.
+
+    Args:
+        raw_file_path (str): Path to the raw CSV data.
+        cleaned_file_path (str): Path to write the cleaned data to (overwritten).
+        chunk_size (int): Rows per chunk.
+        dedupe (str): "exact" (set of row hashes, grows with the number of unique rows) or "bloom"
+                      (fixed-size Bloom filter, may drop about `error_rate` of unique rows).
+        capacity (int): Unique rows the Bloom filter is sized for. Defaults to the file's row count,
+                        so the filter never runs past the rate it was sized for.
+        error_rate (float): Bloom filter false positive rate at `capacity` rows.
+
+    Returns:
+        dict: Row counts ('rows_in', 'rows_out', 'invalid_urls', 'duplicates') and chunks processed.
+              With a Bloom filter, 'filter_dropped' counts the rows it rejected as seen in an
+              earlier chunk, which includes any unique rows it dropped by mistake.
+    """
+    if dedupe == "bloom":
+        seen = BloomFilter(capacity or max(1, count_data_rows(raw_file_path)), error_rate)
+    elif dedupe == "exact":
+        seen = set()
+    else:
+        raise ValueError(f"Unknown dedupe method: {dedupe}")
+
+    stats = {"rows_in": 0, "rows_out": 0, "invalid_urls": 0, "duplicates": 0, "chunks": 0}
+    if dedupe == "bloom":
+        stats["filter_dropped"] = 0
+    over_capacity = False
+    invalid_sample = []
+
+    with open(cleaned_file_path, "w", newline="") as output:
+        pd.read_csv(raw_file_path, nrows=0).to_csv(output, index=False)
+        for chunk in pd.read_csv(raw_file_path, chunksize=chunk_size):
+            stats["rows_in"] += len(chunk)
+            stats["chunks"] += 1
+
+            if 'url' in chunk.columns:
+                cleaned_urls, report = clean_url_series(chunk['url'])
+                stats["invalid_urls"] += report["invalid"]
+                invalid_sample.extend(report["sample"][:INVALID_SAMPLE_SIZE - len(invalid_sample)])
+                chunk = chunk.loc[cleaned_urls.index]
+                chunk['url'] = cleaned_urls
+
+            size = len(chunk)
+            chunk = clean_dataframe(chunk, chunk.columns)
+
+            # Drop rows seen in earlier chunks; rows within the chunk are already unique
+            row_hashes = pd.util.hash_pandas_object(chunk.astype(str), index=False).to_numpy()
+            if dedupe == "bloom":
+                new = seen.add(row_hashes)
+                stats["filter_dropped"] += int(len(new) - new.sum())
+                if seen.count > seen.capacity and not over_capacity:
+                    over_capacity = True
+                    logger.warning(f"Bloom filter passed its capacity of {seen.capacity} rows; unique rows "
+                                   f"will be dropped at more than the {seen.error_rate} error rate.")
+            else:
+                new = np.fromiter((row_hash not in seen for row_hash in row_hashes.tolist()), dtype=bool, count=len(row_hashes))
+                seen.update(row_hashes[new].tolist())
+            chunk = chunk[new]
+            stats["duplicates"] += size - len(chunk)
+
+            chunk.to_csv(output, header=False, index=False)
+            stats["rows_out"] += len(chunk)
+
+    log_invalid_report({"total": stats["rows_in"], "invalid": stats["invalid_urls"], "sample": invalid_sample})
+    logger.info(f"Streamed {stats['rows_in']} rows in {stats['chunks']} chunks to {cleaned_file_path}: "
+                f"kept {stats['rows_out']}, dropped {stats['duplicates']} duplicates and {stats['invalid_urls']} invalid URLs.")
+    if dedupe == "bloom":
+        logger.info(f"Bloom filter dropped {stats['filter_dropped']} rows as seen in earlier chunks "
+                    f"({seen.count} unique rows inserted, capacity {seen.capacity}).")
+    return stats
+
+def clean_data(raw_file_path, cleaned_file_path, chunk_size=None):
     """
     Reads raw data from a CSV file, performs cleaning, and saves the cleaned data to a new file.
     
     :param raw_file_path: Path to the raw CSV data
     :param cleaned_file_path: Path to save the cleaned data
+    :param chunk_size: If set, stream the file in chunks of this many rows (see clean_csv_stream)
     """
     try:
+        if chunk_size:
+            clean_csv_stream(raw_file_path, cleaned_file_path, chunk_size=chunk_size)
+            return
+
         # Load raw data into a DataFrame
         df = pd.read_csv(raw_file_path)
         
         # Perform data cleaning (you can adjust columns to be cleaned)
+        # Rows whose URL is invalid are dropped rather than misaligned with the cleaned values
         if 'url' in df.columns:
-            df['url'] = clean_urls(df['url'])
+            cleaned_urls, report = clean_url_series(df['url'])
+            log_invalid_report(report)
+            df = df.loc[cleaned_urls.index]
+            df['url'] = cleaned_urls
         
         df = clean_dataframe(df, df.columns)  # Clean the entire DataFrame
 
@@ -0,0 +1,227 @@
+# utils/embedding_cache.py
+
+import glob
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger("EmbeddingCache")
+
+KEY_SIZE = 20  # Length of a SHA-1 digest in bytes
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of URL embeddings with two tiers:
+    an in-memory LRU and an on-disk store of memory-mapped float32 shards.
+
+    Entries are keyed by SHA-1(namespace + URL), where the namespace identifies the model
+    set/version and pooling settings, so embeddings from a different ensemble are never reused.
+    Each shard is a raw float32 file (`<name>.f32`, one row per URL) next to a `<name>.keys` file
+    holding the matching 20-byte digests. Every process appends to its own shards, so several
+    extraction workers can share one cache directory without locking.
+
+    The disk tier keeps at most `max_shards` shards: starting a new one deletes the oldest shard
+    and drops its entries from the index, so both the directory and the in-memory index stay
+    bounded. A process whose shard was deleted by another one treats its rows as misses.
+    """
+
+    def __init__(self, cache_dir, namespace, memory_entries=100000, shard_rows=65536, max_shards=16):
+        self.namespace = namespace
+        self.cache_dir = os.path.join(cache_dir, hashlib.sha1(namespace.encode()).hexdigest()[:16])
+        self.memory_entries = memory_entries
+        self.shard_rows = shard_rows
+        self.max_shards = max_shards
+        self.memory = OrderedDict()
+        self.index = {}  # digest -> (shard path, row)
+        self.shard_paths = []  # Shards in the index, oldest first
+        self.shards = {}  # shard path -> np.memmap (reopened when the shard grows)
+        self.dim = None
+        self.writer = None
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self.load_index()  # The directory itself is only created by the first store()
+
+    def key(self, url):
+        """
+        Returns the cache key for a URL. URLs reach the feature extractor already normalized by
+        utils.data_cleaner.clean_urls, so only surrounding whitespace is stripped here.
+        """
+        return hashlib.sha1((self.namespace + "\0" + url.strip()).encode("utf-8")).digest()
+
+    def load_index(self):
+        """
+        Builds the digest -> row index from the key files of all shards on disk.
+        Rows without a matching key (or keys without a full row) from an interrupted write are ignored.
+        """
+        meta_path = os.path.join(self.cache_dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.dim = json.load(f)["dim"]
+
+        if self.dim is None:
+            return
+
+        for keys_path in sorted(glob.glob(os.path.join(self.cache_dir, "*.keys")), key=os.path.getmtime):
+            shard_path = keys_path[:-len(".keys")] + ".f32"
+            if not os.path.exists(shard_path):
+                continue
+            keys = np.fromfile(keys_path, dtype=np.uint8)
+            n_rows = min(len(keys) // KEY_SIZE, os.path.getsize(shard_path) // (4 * self.dim))
+            for row in range(n_rows):
+                self.index[keys[row * KEY_SIZE:(row + 1) * KEY_SIZE].tobytes()] = (shard_path, row)
+            self.shard_paths.append(shard_path)
+
+        while len(self.shard_paths) > self.max_shards:
+            self.evict_shard(self.shard_paths[0])
+
+        logger.info(f"Loaded embedding cache index with {len(self.index)} entries from {self.cache_dir}.")
+
+    def lookup(self, urls):
+        """
+        Looks up embeddings for a list of URLs.
+
+        Returns:
+            list: One float32 vector per URL, or None where the URL is not cached.
+        """
+        vectors = []
+        for url in urls:
+            digest = self.key(url)
+            vector = self.memory.get(digest)
+            if vector is not None:
+                self.memory.move_to_end(digest)
+                self.hits_memory += 1
+            elif digest in self.index:
+                try:
+                    vector = self.read_row(*self.index[digest])
+                except FileNotFoundError:
+                    self.evict_shard(self.index[digest][0])  # Evicted by another process
+                    self.misses += 1
+                else:
+                    self.remember(digest, vector)
+                    self.hits_disk += 1
+            else:
+                self.misses += 1
+            vectors.append(vector)
+        return vectors
+
+    def store(self, urls, features):
+        """
+        Adds freshly computed embeddings to both tiers.
+
+        Args:
+            urls (list): URLs the rows of `features` belong to.
+            features (np.ndarray): Float32 matrix of shape (len(urls), dim).
+        """
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        if len(urls) == 0:
+            return
+        if self.dim is None:
+            self.dim = features.shape[1]
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, "meta.json"), "w") as f:
+                json.dump({"dim": self.dim, "namespace": self.namespace}, f)
+        elif features.shape[1] != self.dim:
+            raise ValueError(f"Embedding width {features.shape[1]} does not match cache width {self.dim}.")
+
+        new_digests, new_rows = {}, []
+        for url, vector in zip(urls, features):
+            digest = self.key(url)
+            self.remember(digest, vector)
+            if digest not in self.index and digest not in new_digests:
+                new_digests[digest] = len(new_rows)
+                new_rows.append(vector)
+
+        if new_digests:
+            self.write_rows(list(new_digests), np.vstack(new_rows))
+
+    def remember(self, digest, vector):
+        """
+        Inserts a vector into the in-memory LRU tier, evicting the least recently used entry.
+        """
+        self.memory[digest] = vector
+        self.memory.move_to_end(digest)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def write_rows(self, digests, rows):
+        """
+        Appends rows to this process's current shard, starting a new shard whenever one is full.
+        """
+        written = 0
+        while written < len(digests):
+            if self.writer is None or self.writer["rows"] >= self.shard_rows:
+                while len(self.shard_paths) >= self.max_shards:
+                    self.evict_shard(self.shard_paths[0])
+                name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                self.writer = {"path": os.path.join(self.cache_dir, name + ".f32"), "rows": 0}
+                self.shard_paths.append(self.writer["path"])
+
+            shard_path = self.writer["path"]
+            count = min(self.shard_rows - self.writer["rows"], len(digests) - written)
+            with open(shard_path, "ab") as f:
+                f.write(rows[written:written + count].tobytes())
+            with open(shard_path[:-len(".f32")] + ".keys", "ab") as f:
+                f.write(b"".join(digests[written:written + count]))
+
+            for offset in range(count):
+                self.index[digests[written + offset]] = (shard_path, self.writer["rows"] + offset)
+            self.writer["rows"] += count
+            written += count
+
+    def evict_shard(self, shard_path):
+        """
+        Deletes a shard and drops its rows from the index.
+        """
+        keys_path = shard_path[:-len(".f32")] + ".keys"
+        try:
+            keys = np.fromfile(keys_path, dtype=np.uint8)
+        except FileNotFoundError:
+            # Already deleted by another process; find its rows the slow way
+            digests = [digest for digest, (path, _) in self.index.items() if path == shard_path]
+        else:
+            digests = [keys[row * KEY_SIZE:(row + 1) * KEY_SIZE].tobytes() for row in range(len(keys) // KEY_SIZE)]
+        for digest in digests:
+            if self.index.get(digest, (None,))[0] == shard_path:
+                del self.index[digest]
+
+        for path in (shard_path, keys_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.shards.pop(shard_path, None)
+        if shard_path in self.shard_paths:
+            self.shard_paths.remove(shard_path)
+        if self.writer is not None and self.writer["path"] == shard_path:
+            self.writer = None
+        logger.info(f"Evicted embedding cache shard {shard_path} ({len(digests)} rows).")
+
+    def read_row(self, shard_path, row):
+        """
+        Reads one row from a memory-mapped shard.
+        """
+        shard = self.shards.get(shard_path)
+        if shard is None or row >= shard.shape[0]:
+            shard = np.memmap(shard_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+            self.shards[shard_path] = shard
+        return np.array(shard[row])
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the overall hit rate.
+        """
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            "entries_memory": len(self.memory),
+            "entries_disk": len(self.index),
+        }
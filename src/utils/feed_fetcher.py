@@ -0,0 +1,94 @@
+# utils/feed_fetcher.py
+
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from utils.logger import get_logger
+
+logger = get_logger("FeedFetcher")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}  # Responses worth retrying; anything else is final
+USER_AGENT = "BustedURL/1.0"
+
+def make_session(pool_size=10):
+    """
+    Returns a requests.Session whose connection pool keeps up to `pool_size` connections per host,
+    so repeated fetches (and retries) reuse TCP/TLS connections instead of reconnecting.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+def fetch_with_retry(session, url, timeout=30.0, retries=3, backoff=1.0, **kwargs):
+    """
+    GETs a URL, retrying connection errors, timeouts and retryable status codes with
+    exponential backoff and full jitter (a random wait of up to backoff * 2**attempt seconds).
+
+    Args:
+        session (requests.Session): Session to send the request with.
+        url (str): URL to fetch.
+        timeout (float): Seconds to wait to connect and between bytes received, per attempt.
+        retries (int): Attempts after the first one.
+        backoff (float): Base of the backoff in seconds.
+        **kwargs: Passed to session.get (headers, proxies, ...).
+
+    Returns:
+        requests.Response: The last response received (possibly a non-2xx one).
+
+    Raises:
+        requests.RequestException: If the last attempt failed without a response.
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+            reason = f"status {response.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            reason = type(e).__name__
+        delay = random.uniform(0, backoff * 2 ** attempt)
+        logger.warning(f"Fetching {url} failed ({reason}); retry {attempt + 1}/{retries} in {delay:.2f}s.")
+        time.sleep(delay)
+
+def fetch_concurrently(collectors, max_workers=8, deadline=None):
+    """
+    Runs source collectors in a thread pool and yields their results as each one finishes,
+    so fast sources are processed without waiting for the slowest one.
+
+    Args:
+        collectors (dict): Source name -> callable returning a list of URLs.
+        max_workers (int): Sources fetched at the same time.
+        deadline (float): Seconds after which sources still running are abandoned (None waits for all).
+                          A collector's own timeouts should normally end it well before this.
+
+    Yields:
+        tuple: (source name, list of URLs, seconds taken); a collector that raised yields an empty list.
+    """
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+    pending = {executor.submit(collector): name for name, collector in collectors.items()}
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - (time.monotonic() - start)
+            if remaining is not None and remaining <= 0:
+                logger.error(f"Abandoning sources still running after {deadline}s: {', '.join(sorted(pending.values()))}.")
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    urls = future.result()
+                except Exception as e:
+                    logger.error(f"Error collecting from {name}: {e}")
+                    urls = []
+                yield name, urls or [], time.monotonic() - start
+    finally:
+        # Never block on a hung source; its thread finishes (or times out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+# utils/feed_state.py
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger("FeedState")
+
+class FeedState:
+    """
+    Per-source state for incremental feed fetching, persisted in `state_dir`.
+
+    For each source it keeps the HTTP validators of the last response (ETag, Last-Modified) and
+    a hash of its body, used to send conditional requests and to skip unchanged bodies from
+    servers that ignore them. It also keeps the 64-bit hashes of the URLs in the last snapshot of
+    the feed as a sorted array, so each new snapshot is reduced to the URLs it adds.
+    Every source has its own files, so sources fetched concurrently never share state.
+    """
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def path(self, source, suffix):
+        return os.path.join(self.state_dir, f"{source}{suffix}")
+
+    def validators(self, source):
+        """
+        Returns the stored validators of a source: a dict with 'etag', 'last_modified' and
+        'content_hash' (empty if the source was never fetched).
+        """
+        try:
+            with open(self.path(source, ".json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def conditional_headers(self, source):
+        """
+        Returns the If-None-Match / If-Modified-Since headers for the next request to a source.
+        """
+        validators = self.validators(source)
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    @staticmethod
+    def content_hash(content):
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def response_validators(response, content_hash):
+        """
+        Returns the validators of a 200 response, to be stored with save_validators.
+        """
+        return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                "content_hash": content_hash}
+
+    def save_validators(self, source, validators):
+        """
+        Stores the validators of a source's last response.
+        """
+        self.write(self.path(source, ".json"), lambda f: f.write(json.dumps(validators).encode()))
+
+    def delta(self, source, urls):
+        """
+        Returns the URLs of a new feed snapshot that were not in the previous one.
+        The previous snapshot is left in place: the caller saves the new one with save_snapshot
+        once the new URLs have been handed on, so URLs are never marked as seen and then dropped.
+
+        Args:
+            source (str): Source name.
+            urls (list): All URLs in the new snapshot.
+
+        Returns:
+            tuple: (URLs not in the previous snapshot, in feed order; the new snapshot for save_snapshot)
+        """
+        hashes = pd.util.hash_array(np.asarray(urls, dtype=object)) if len(urls) else np.empty(0, dtype=np.uint64)
+        try:
+            previous = np.load(self.path(source, ".urls.npy"))
+        except FileNotFoundError:
+            previous = np.empty(0, dtype=np.uint64)
+
+        new = ~np.isin(hashes, previous, assume_unique=False)
+        return [url for url, is_new in zip(urls, new) if is_new], np.unique(hashes)
+
+    def save_snapshot(self, source, snapshot):
+        """
+        Makes a snapshot returned by delta() the one the next call is compared against.
+        """
+        self.write(self.path(source, ".urls.npy"), lambda f: np.save(f, snapshot))
+
+    def write(self, path, write):
+        """
+        Writes a state file atomically, so a crash never leaves a truncated one behind.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            write(f)
+        os.replace(temporary, path)
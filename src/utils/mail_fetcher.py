@@ -0,0 +1,286 @@
+# utils/mail_fetcher.py
+
+import base64
+import html
+import imaplib
+import itertools
+import json
+import os
+import quopri
+import re
+import threading
+from utils.logger import get_logger
+
+logger = get_logger("MailFetcher")
+
+# Links are pulled out with regular expressions instead of building a DOM: only <a href> values
+# (HTML parts) and bare http(s) URLs (plain text parts) are needed
+HREF_PATTERN = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+PLAIN_URL_PATTERN = re.compile(r"""https?://[^\s<>"')\]]+""", re.IGNORECASE)
+# IMAP response tokens: parentheses, quoted strings, literal markers and atoms (including BODY[1.2] style names)
+TOKEN_PATTERN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}|([^\s()"\[]+(?:\[[^\]]*\](?:<\d+>)?)?))')
+
+def extract_links(text, subtype="html"):
+    """
+    Returns the links in the text of a message part: <a href> values for HTML, bare http(s) URLs otherwise.
+    """
+    if subtype == "html":
+        return [html.unescape(next(group for group in match.groups() if group is not None)).strip()
+                for match in HREF_PATTERN.finditer(text)]
+    return PLAIN_URL_PATTERN.findall(text)
+
+def tokenize(data):
+    """
+    Yields the tokens of an imaplib response: '(' and ')', str for atoms and quoted strings,
+    bytes for literals and None for NIL. imaplib hands literals over as (prefix, literal) tuples.
+    """
+    for item in data:
+        prefix, literal = item if isinstance(item, tuple) else (item, None)
+        for match in TOKEN_PATTERN.finditer(prefix):
+            opening, closing, quoted, literal_size, atom = match.groups()
+            if opening:
+                yield "("
+            elif closing:
+                yield ")"
+            elif quoted is not None:
+                yield re.sub(rb'\\(.)', rb'\1', quoted).decode("utf-8", errors="replace")
+            elif literal_size is not None:
+                yield literal
+            elif atom:
+                yield None if atom.upper() == b"NIL" else atom.decode("ascii", errors="replace")
+
+def parse_fetch_response(data):
+    """
+    Parses the data of an imaplib FETCH (or UID FETCH) response.
+
+    Returns:
+        list: One dict per message, mapping item names (upper case, e.g. 'UID', 'BODYSTRUCTURE',
+              'BODY[1.2]') to values: str, bytes, None or nested lists.
+    """
+    tokens = tokenize(data)
+
+    def parse_list():
+        items = []
+        for token in tokens:
+            if token == "(":
+                items.append(parse_list())
+            elif token == ")":
+                return items
+            else:
+                items.append(token)
+        return items
+
+    messages = []
+    for token in tokens:
+        if token == "(":
+            items = parse_list()
+            messages.append({str(key).upper(): value for key, value in zip(items[::2], items[1::2])})
+    return messages
+
+def text_parts(structure, section=""):
+    """
+    Walks a parsed BODYSTRUCTURE and yields (section, subtype, encoding, charset, size) for every
+    text/html and text/plain part. Attachments and other parts are never fetched.
+    """
+    if isinstance(structure[0], list):  # Multipart: child parts, then the subtype and extension data
+        for index, child in enumerate(itertools.takewhile(lambda item: isinstance(item, list), structure)):
+            yield from text_parts(child, f"{section}.{index + 1}" if section else str(index + 1))
+        return
+    media_type, subtype = as_text(structure[0]).lower(), as_text(structure[1]).lower()
+    if media_type != "text" or subtype not in ("html", "plain"):
+        return
+    params = [as_text(value) for value in structure[2]] if isinstance(structure[2], list) else []
+    charset = dict(zip([key.lower() for key in params[::2]], params[1::2])).get("charset")
+    yield section or "1", subtype, as_text(structure[5] or "7bit").lower(), charset, int(structure[6] or 0)
+
+def as_text(value):
+    """
+    Returns a response value as str (string values sent as literals arrive as bytes).
+    """
+    return value.decode("utf-8", errors="replace") if isinstance(value, bytes) else str(value)
+
+def decode_part(payload, encoding, charset):
+    """
+    Decodes a fetched body part from its transfer encoding and charset.
+    """
+    if encoding == "base64":
+        payload = base64.b64decode(payload)
+    elif encoding == "quoted-printable":
+        payload = quopri.decodestring(payload)
+    try:
+        return payload.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+class IncrementalMailFetcher:
+    """
+    Pulls links out of new mail in one IMAP mailbox.
+
+    The connection stays open between calls and is re-established if the server drops it.
+    Each call searches for UIDs above the last one processed (kept with the mailbox's UIDVALIDITY
+    in `state_path`, so restarts resume where they stopped) and handles them in batches: one
+    UID FETCH of the BODYSTRUCTUREs, then one UID FETCH per distinct set of text part sections,
+    downloading only the text/html (or, without one, text/plain) parts and never attachments.
+    """
+
+    def __init__(self, host, user, password, mailbox="INBOX", port=None, use_ssl=True, timeout=30, batch_size=200,
+                 initial_messages=10, max_part_bytes=1000000, state_path=None):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.mailbox = mailbox
+        self.port = port or (imaplib.IMAP4_SSL_PORT if use_ssl else imaplib.IMAP4_PORT)
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.initial_messages = initial_messages  # Most recent messages processed when there is no state yet
+        self.max_part_bytes = max_part_bytes  # Larger text parts are skipped
+        self.state_path = state_path
+        self.connection = None
+        self.lock = threading.Lock()  # One fetch at a time on the shared connection
+        self.state = self.load_state()
+        self.stats = {"messages": 0, "parts": 0, "bytes": 0, "fetch_commands": 0}
+
+    def load_state(self):
+        if self.state_path:
+            try:
+                with open(self.state_path) as f:
+                    return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        return {"uidvalidity": None, "last_uid": None}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        temporary = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.state_path)
+
+    def connect(self):
+        """
+        Opens the connection and selects the mailbox read-only. A changed UIDVALIDITY means
+        earlier UIDs no longer identify the same messages, so tracking starts over.
+        """
+        connection_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        connection = connection_class(self.host, self.port, timeout=self.timeout)
+        connection.login(self.user, self.password)
+        status, _ = connection.select(self.mailbox, readonly=True)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"Cannot select mailbox {self.mailbox}.")
+        uidvalidity = int(connection.response("UIDVALIDITY")[1][0])
+        if uidvalidity != self.state["uidvalidity"]:
+            if self.state["uidvalidity"] is not None:
+                logger.warning(f"UIDVALIDITY of {self.mailbox} changed; starting over from the latest messages.")
+            self.state = {"uidvalidity": uidvalidity, "last_uid": None}
+        self.connection = connection
+        logger.info(f"Connected to {self.host}:{self.port}/{self.mailbox}.")
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.logout()
+            except Exception:
+                pass
+            self.connection = None
+
+    def fetch_links(self):
+        """
+        Returns the links in all messages that arrived since the last call.
+        A dropped connection is reopened once and the fetch resumed after the last complete batch;
+        links from batches completed before the drop are kept. If the retry fails too, the links
+        fetched so far are returned (the error is raised only if there are none).
+        The processed UID is persisted only once the links are handed back, so a crash in between
+        means messages are fetched again rather than lost. Any other error (e.g. a NO response or
+        an unparsable message) discards the links and rewinds the state to where the call started.
+        """
+        with self.lock:
+            state = dict(self.state)
+            links = []
+            try:
+                for attempt in range(2):
+                    try:
+                        if self.connection is None:
+                            self.connect()
+                        self.fetch_new_links(links)
+                        break
+                    except (imaplib.IMAP4.abort, OSError) as e:
+                        self.close()
+                        if attempt and not links:
+                            raise
+                        if attempt:
+                            logger.error(f"IMAP connection lost again ({e}); returning the {len(links)} links fetched so far.")
+                        else:
+                            logger.warning(f"IMAP connection lost ({e}); reconnecting.")
+            except Exception:
+                self.state = state  # No links are handed back, so no message may count as processed
+                raise
+            self.save_state()
+            return links
+
+    def command(self, *args):
+        status, data = self.connection.uid(*args)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"UID {args[0]} failed: {data}")
+        return data
+
+    def new_uids(self):
+        """
+        Returns the UIDs to process, oldest first.
+        """
+        last_uid = self.state["last_uid"]
+        if last_uid is None:
+            uids = [int(uid) for uid in self.command("SEARCH", "ALL")[0].split()]
+            return sorted(uids)[-self.initial_messages:] if self.initial_messages else []
+        # "n:*" always matches the newest message, even when its UID is below n
+        uids = [int(uid) for uid in self.command("SEARCH", "UID", f"{last_uid + 1}:*")[0].split()]
+        return sorted(uid for uid in uids if uid > last_uid)
+
+    def fetch_new_links(self, links):
+        """
+        Appends the links of new messages to `links` batch by batch, advancing last_uid (in memory)
+        after each complete batch.
+        """
+        uids = self.new_uids()
+        fetched = len(links)
+        for start in range(0, len(uids), self.batch_size):
+            batch = uids[start:start + self.batch_size]
+            links += self.fetch_batch(batch)
+            self.state["last_uid"] = batch[-1]
+            self.stats["messages"] += len(batch)
+        if uids:
+            logger.info(f"Extracted {len(links) - fetched} links from {len(uids)} new messages (up to UID {uids[-1]}).")
+
+    def fetch_batch(self, uids):
+        """
+        Fetches the text parts of a batch of messages and returns their links.
+        """
+        uid_set = ",".join(map(str, uids))
+        self.stats["fetch_commands"] += 1
+        plans = {}  # Sections to fetch -> (uids, part details)
+        for message in parse_fetch_response(self.command("FETCH", uid_set, "(BODYSTRUCTURE)")):
+            parts = [part for part in text_parts(message["BODYSTRUCTURE"]) if part[4] <= self.max_part_bytes]
+            html_parts = [part for part in parts if part[1] == "html"]
+            parts = tuple(html_parts or parts)
+            if parts:
+                sections = tuple(part[0] for part in parts)
+                plans.setdefault(sections, ([], {}))[0].append(message["UID"])
+                plans[sections][1][message["UID"]] = parts
+
+        links = []
+        for sections, (message_uids, message_parts) in plans.items():
+            items = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+            self.stats["fetch_commands"] += 1
+            for message in parse_fetch_response(self.command("FETCH", ",".join(message_uids), f"({items})")):
+                for section, subtype, encoding, charset, _ in message_parts.get(message.get("UID"), ()):
+                    payload = message.get(f"BODY[{section}]")
+                    if not payload:
+                        continue
+                    if isinstance(payload, str):
+                        payload = payload.encode("utf-8")
+                    self.stats["parts"] += 1
+                    self.stats["bytes"] += len(payload)
+                    links += extract_links(decode_part(payload, encoding, charset), subtype)
+        return links
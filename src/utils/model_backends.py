@@ -0,0 +1,97 @@
+# utils/model_backends.py
+
+import pickle
+import time
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+from utils.logger import get_logger
+
+logger = get_logger("ModelBackends")
+
+CLASSES = np.array(["benign", "malicious"])  # Label set partial_fit needs from the first update
+MODEL_BACKENDS = ("hist_gradient_boosting", "gradient_boosting", "logistic_regression", "sgd")
+DEFAULT_MODEL_BACKEND = "hist_gradient_boosting"
+DEFAULT_SPARSE_MODEL_BACKEND = "logistic_regression"  # Linear models suit wide sparse text features
+SVD_COMPONENTS = 256  # Dense width sparse input is reduced to for histogram boosting
+MAX_SVD_FEATURES = 2 ** 16  # Wider sparse input is not reduced: the projection alone holds SVD_COMPONENTS x n_features floats
+
+def build_model(name=DEFAULT_MODEL_BACKEND, sparse=False, n_features=None):
+    """
+    Returns an untrained classifier for one of the supported backends.
+
+    Args:
+        name (str): 'hist_gradient_boosting' (histogram-based, multi-threaded gradient boosting),
+                    'gradient_boosting' (the original single-threaded GradientBoostingClassifier),
+                    'logistic_regression' or 'sgd' (logistic loss, supports partial_fit).
+        sparse (bool): Whether the model will be fitted on sparse input. Histogram boosting needs
+                       dense input, so it is then preceded by a TruncatedSVD to SVD_COMPONENTS columns.
+                       On input wider than MAX_SVD_FEATURES (or of unknown width), such as hashed
+                       n-grams, DEFAULT_SPARSE_MODEL_BACKEND is built instead.
+        n_features (int): Width of the input matrix, used to cap the SVD components.
+
+    Returns:
+        object: sklearn estimator or pipeline.
+    """
+    if name == "hist_gradient_boosting":
+        model = HistGradientBoostingClassifier(random_state=42)
+        if sparse and (n_features is None or n_features > MAX_SVD_FEATURES):
+            logger.warning(f"Sparse input with {n_features or 'an unknown number of'} features is too wide to reduce "
+                           f"with SVD for histogram boosting; using {DEFAULT_SPARSE_MODEL_BACKEND} instead.")
+            return build_model(DEFAULT_SPARSE_MODEL_BACKEND)
+        if sparse:
+            n_components = min(SVD_COMPONENTS, max(1, (n_features or SVD_COMPONENTS + 1) - 1))
+            return make_pipeline(TruncatedSVD(n_components=n_components, random_state=42), model)
+        return model
+    if name == "gradient_boosting":
+        return GradientBoostingClassifier()
+    if name == "logistic_regression":
+        return LogisticRegression(solver="liblinear", max_iter=1000)
+    if name == "sgd":
+        return SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+
+    raise ValueError(f"Unknown model backend: {name}")
+
+def model_size_bytes(model):
+    """
+    Returns the size of a model once serialized, in bytes.
+    """
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+def predict_latency_per_1k(model, X, repeats=5):
+    """
+    Returns the median time in milliseconds to predict 1,000 rows, built by cycling through the rows of X.
+    """
+    rows = np.resize(np.arange(X.shape[0]), 1000)
+    batch = X[rows]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(batch)
+        timings.append(time.perf_counter() - start)
+    return 1000 * float(np.median(timings))
+
+def train_and_profile(name, X_train, y_train, X_test=None):
+    """
+    Builds and fits a backend, and reports its train time, prediction latency per 1k URLs and size.
+
+    Args:
+        name (str): Model backend, see build_model.
+        X_train, y_train: Training data (dense or sparse).
+        X_test: Rows used to time prediction (defaults to X_train).
+
+    Returns:
+        tuple: (fitted model, dict with 'train_seconds', 'predict_ms_per_1k' and 'model_bytes')
+    """
+    model = build_model(name, sparse=sp.issparse(X_train), n_features=X_train.shape[1])
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    profile = {"train_seconds": time.perf_counter() - start}
+    profile["predict_ms_per_1k"] = predict_latency_per_1k(model, X_test if X_test is not None else X_train)
+    profile["model_bytes"] = model_size_bytes(model)
+    logger.info(f"{name}: trained in {profile['train_seconds']:.2f}s, {profile['predict_ms_per_1k']:.1f} ms per 1k URLs, "
+                f"{profile['model_bytes'] / 1024:,.0f} KiB.")
+    return model, profile
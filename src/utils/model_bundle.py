@@ -0,0 +1,171 @@
+# utils/model_bundle.py
+
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import joblib
+from utils.logger import get_logger
+
+logger = get_logger("ModelBundle")
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.joblib"
+FEATURIZER_FILE = "featurizer.joblib"
+STAGE1_FILE = "stage1.joblib"
+VERSION_PATTERN = re.compile(r"^v(\d{6})$")  # Bundle directories in a registry: v000001, v000002, ...
+DEFAULT_LABEL_MAP = {"0": "benign", "1": "malicious"}
+FEATURIZER_TYPES = {"HashingURLFeaturizer": "hashing", "TfidfVectorizer": "tfidf"}  # Featurizer class -> input kind
+
+class ModelBundle:
+    """
+    A trained classifier together with everything needed to use it: the featurizer or vectorizer
+    that turns URLs into its input (None when features come from the FeatureExtractionAgent),
+    a description of that input (see input_spec), the label map and free-form metadata
+    (backend, training data, metrics, ...). Bundles for the two-stage cascade also carry the
+    stage-1 model, which scores lexical features of raw URLs.
+
+    On disk a bundle is a directory holding a manifest.json plus uncompressed joblib files.
+    Uncompressed joblib stores NumPy arrays as raw buffers, so loading with mmap_mode='r'
+    maps tree nodes and coefficient matrices straight from the page cache instead of reading
+    and unpickling them: a cold start takes milliseconds and every worker that loads the same
+    bundle shares one copy of those pages.
+    """
+
+    def __init__(self, model, featurizer=None, label_map=None, metadata=None, version=None, path=None, model_input=None,
+                 stage1_model=None):
+        self.model = model
+        self.featurizer = featurizer
+        self.stage1_model = stage1_model
+        self.model_input = dict(model_input or input_spec(model, featurizer))
+        self.label_map = dict(label_map or DEFAULT_LABEL_MAP)
+        self.metadata = dict(metadata or {})
+        self.version = version
+        self.path = path
+
+def input_spec(model, featurizer=None):
+    """
+    Describes the input a model expects, so a consumer can tell whether it can serve it.
+
+    Returns:
+        dict: 'featurizer' ('embeddings' for feature matrices from the FeatureExtractionAgent,
+              'hashing', 'tfidf' or the featurizer's class name), 'n_features' (the model's input
+              width, None if unknown) and, for n-gram featurizers, 'ngram_range'.
+    """
+    spec = {
+        "featurizer": "embeddings" if featurizer is None else FEATURIZER_TYPES.get(type(featurizer).__name__,
+                                                                                   type(featurizer).__name__),
+        "n_features": int(model.n_features_in_) if hasattr(model, "n_features_in_") else None,
+    }
+    if hasattr(featurizer, "ngram_range"):
+        spec["ngram_range"] = list(featurizer.ngram_range)
+    return spec
+
+def save_bundle(registry_dir, model, featurizer=None, label_map=None, metadata=None, stage1_model=None):
+    """
+    Saves a model bundle as the next version in a registry directory.
+
+    The bundle is written to a temporary directory and renamed into place, so readers
+    (e.g. a ClassificationAgent watching the registry) never see a half-written version.
+
+    Args:
+        registry_dir (str): Registry directory; created if missing.
+        model (object): Trained classifier.
+        featurizer (object): Fitted vectorizer or featurizer for raw URLs, if the model uses one.
+        label_map (dict): Class index (as a string) -> label name.
+        metadata (dict): JSON-serializable metadata to store with the bundle.
+        stage1_model (object): Trained cascade stage-1 (lexical) model, if the bundle is for the cascade.
+
+    Returns:
+        str: Path of the saved bundle.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = os.path.join(registry_dir, f".staging-{uuid.uuid4().hex[:8]}")
+    os.makedirs(staging)
+    try:
+        # No compression, so arrays stay memory-mappable
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        if featurizer is not None:
+            joblib.dump(featurizer, os.path.join(staging, FEATURIZER_FILE))
+        if stage1_model is not None:
+            joblib.dump(stage1_model, os.path.join(staging, STAGE1_FILE))
+
+        # Claim the next free version; rename fails if another writer took it first
+        while True:
+            version = (latest_version(registry_dir) or 0) + 1
+            manifest = {
+                "format_version": BUNDLE_FORMAT_VERSION,
+                "version": version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "model_class": type(model).__name__,
+                "has_featurizer": featurizer is not None,
+                "has_stage1": stage1_model is not None,
+                "input": input_spec(model, featurizer),
+                "label_map": dict(label_map or DEFAULT_LABEL_MAP),
+                "metadata": dict(metadata or {}),
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            path = os.path.join(registry_dir, f"v{version:06d}")
+            try:
+                os.rename(staging, path)
+                break
+            except OSError:
+                if not os.path.exists(path):
+                    raise
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"Saved model bundle version {version} to {path}.")
+    return path
+
+def load_bundle(path, mmap_mode="r"):
+    """
+    Loads a model bundle directory.
+
+    Args:
+        path (str): Bundle directory (one version, not the registry).
+        mmap_mode (str): Passed to joblib.load; 'r' memory-maps arrays read-only, None loads them into memory.
+
+    Returns:
+        ModelBundle: The loaded bundle.
+    """
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest["format_version"] > BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Model bundle {path} uses format {manifest['format_version']}, "
+                         f"newer than the supported {BUNDLE_FORMAT_VERSION}.")
+
+    start = time.perf_counter()
+    model = joblib.load(os.path.join(path, MODEL_FILE), mmap_mode=mmap_mode)
+    featurizer = None
+    if manifest.get("has_featurizer"):
+        featurizer = joblib.load(os.path.join(path, FEATURIZER_FILE), mmap_mode=mmap_mode)
+    stage1_model = None
+    if manifest.get("has_stage1"):
+        stage1_model = joblib.load(os.path.join(path, STAGE1_FILE), mmap_mode=mmap_mode)
+    logger.info(f"Loaded model bundle version {manifest['version']} from {path} in {1000 * (time.perf_counter() - start):.1f} ms.")
+
+    # Bundles saved before the input was recorded get it from the loaded model and featurizer
+    return ModelBundle(model, featurizer, manifest.get("label_map"), manifest.get("metadata"), manifest["version"], path,
+                       manifest.get("input"), stage1_model)
+
+def latest_version(registry_dir):
+    """
+    Returns the highest bundle version in a registry directory, or None if it holds none.
+    """
+    if not os.path.isdir(registry_dir):
+        return None
+    versions = [int(match.group(1)) for match in map(VERSION_PATTERN.match, os.listdir(registry_dir)) if match]
+    return max(versions) if versions else None
+
+def latest_bundle_path(registry_dir):
+    """
+    Returns the directory of the newest bundle in a registry, or None if it holds none.
+    """
+    version = latest_version(registry_dir)
+    return os.path.join(registry_dir, f"v{version:06d}") if version is not None else None
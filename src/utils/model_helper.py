@@ -5,9 +5,10 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, precision_score, recall_score, f1_score
 import pandas as pd
 from transformers import Trainer, TrainingArguments
-from transformers import RobertaForSequenceClassification, BertForSequenceClassification
+from transformers import AutoModelForSequenceClassification, RobertaForSequenceClassification, BertForSequenceClassification
 import torch
 from utils.logger import get_logger
+from utils.model_bundle import load_bundle, save_bundle
 
 logger = get_logger("ModelHelper")
 
@@ -47,6 +48,24 @@ def preprocess_data(df, target_column):
     logger.info("Data has been preprocessed and split into training and testing sets.")
     return X_train, X_test, y_train, y_test
 
+def split_features(X, y, test_size=0.2, random_state=42):
+    """
+    Splits a feature matrix and labels into training and testing sets. Unlike preprocess_data,
+    the matrix is not put into a DataFrame, so sparse (CSR) matrices stay sparse.
+
+    Args:
+        X (np.ndarray | scipy.sparse matrix): Feature matrix.
+        y (array-like): Labels.
+        test_size (float): Fraction of rows held out for testing.
+        random_state (int): Seed, shared with preprocess_data so both give the same split.
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test datasets.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    logger.info(f"Split {X.shape[0]} rows x {X.shape[1]} features into training and testing sets.")
+    return X_train, X_test, y_train, y_test
+
 def evaluate_model(model, X_test, y_test, model_type="sklearn"):
     """
     Evaluates a trained model on the test set and logs the results. Supports sklearn and Hugging Face transformer models.
@@ -127,44 +146,57 @@ def fine_tune_transformer(model_name, train_dataset, val_dataset):
     
     return model
 
-def save_model(model, file_path, model_type="sklearn"):
+def save_model(model, file_path, model_type="sklearn", featurizer=None, label_map=None, metadata=None, stage1_model=None):
     """
-    Saves a trained model to a file using joblib or transformers.
+    Saves a trained model to a file using joblib or transformers, or as a versioned model bundle.
 
     Args:
         model (object): Trained machine learning model or transformer model.
-        file_path (str): Path to save the model file.
-        model_type (str): Type of the model - 'sklearn' for traditional ML models or 'transformer' for Hugging Face models.
+        file_path (str): Path to save the model file (for 'bundle', the registry directory).
+        model_type (str): Type of the model - 'sklearn' for traditional ML models, 'transformer' for Hugging Face models,
+                          or 'bundle' to save the model with its featurizer, label map and metadata (see utils.model_bundle).
+        featurizer (object): Fitted vectorizer/featurizer stored in the bundle ('bundle' only).
+        label_map (dict): Class index -> label name stored in the bundle ('bundle' only).
+        metadata (dict): JSON-serializable metadata stored in the bundle ('bundle' only).
+        stage1_model (object): Trained cascade stage-1 model stored in the bundle ('bundle' only).
 
     Returns:
-        None
+        str: Path of the saved bundle for 'bundle', otherwise None.
     """
     try:
         if model_type == "sklearn":
-            joblib.dump(model, file_path)
+            joblib.dump(model, file_path)  # Uncompressed, so it can be loaded with mmap_mode
         elif model_type == "transformer":
             model.save_pretrained(file_path)
+        elif model_type == "bundle":
+            return save_bundle(file_path, model, featurizer, label_map, metadata, stage1_model)
 
         logger.info(f"Model saved successfully at {file_path}.")
     except Exception as e:
         logger.error(f"Failed to save model at {file_path}: {e}")
 
-def load_model(file_path, model_type="sklearn"):
+def load_model(file_path, model_type="sklearn", mmap_mode=None):
     """
-    Loads a trained model from a file using joblib or transformers.
+    Loads a trained model from a file using joblib or transformers, or a versioned model bundle.
 
     Args:
-        file_path (str): Path to the model file.
-        model_type (str): Type of the model - 'sklearn' for traditional ML models or 'transformer' for Hugging Face models.
+        file_path (str): Path to the model file (for 'bundle', the bundle directory).
+        model_type (str): Type of the model - 'sklearn' for traditional ML models, 'transformer' for Hugging Face models,
+                          or 'bundle' for a model bundle (see utils.model_bundle).
+        mmap_mode (str): For 'sklearn' and 'bundle', 'r' memory-maps the model's arrays read-only instead of
+                         reading them into memory ('bundle' defaults to 'r').
 
     Returns:
-        object: Loaded machine learning model or transformer model.
+        object: Loaded machine learning model or transformer model, or a ModelBundle for 'bundle'.
     """
     try:
         if model_type == "sklearn":
-            model = joblib.load(file_path)
+            model = joblib.load(file_path, mmap_mode=mmap_mode)
         elif model_type == "transformer":
-            model = RobertaForSequenceClassification.from_pretrained(file_path)  # or BertForSequenceClassification
+            # The architecture (BERT, RoBERTa, ...) is read from the saved config
+            model = AutoModelForSequenceClassification.from_pretrained(file_path)
+        elif model_type == "bundle":
+            model = load_bundle(file_path, mmap_mode=mmap_mode or "r")
 
         logger.info(f"Model loaded successfully from {file_path}.")
         return model
@@ -0,0 +1,120 @@
+# utils/onnx_backend.py
+
+import hashlib
+import inspect
+import os
+import numpy as np
+import torch
+from utils.logger import get_logger
+
+logger = get_logger("OnnxBackend")
+
+OPSET_VERSION = 14
+
+class EncoderWrapper(torch.nn.Module):
+    """
+    Exposes a Hugging Face encoder as forward(*inputs) -> last hidden state,
+    so the exporter traces plain positional tensors.
+    """
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs)))[0]
+
+def export_onnx(extractor, path, opset_version=OPSET_VERSION):
+    """
+    Exports the encoder of a feature-extraction pipeline to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        extractor: Hugging Face feature-extraction pipeline.
+        path (str): Destination .onnx file.
+        opset_version (int): ONNX opset to target.
+
+    Returns:
+        list: Names of the model inputs, in the order the graph expects them.
+    """
+    model = extractor.model.eval()
+    sample = extractor.tokenizer(["http://example.com", "https://example.org/a/b?c=d"], padding=True,
+                                 return_tensors="pt")
+    # Only export the inputs the model's forward() takes (DistilBERT has no token_type_ids)
+    accepted = inspect.signature(model.forward).parameters
+    input_names = [name for name in sample.keys() if name in accepted]
+    dynamic_axes = {name: {0: "batch", 1: "tokens"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False  # Newer torch defaults to the dynamo exporter
+    # The exporter restores the wrapper's training flag afterwards, which would also switch the
+    # wrapped model (still used by the PyTorch path) into training mode unless it is in eval mode
+    wrapper = EncoderWrapper(model, input_names).eval()
+    with torch.no_grad():
+        torch.onnx.export(wrapper, tuple(sample[name] for name in input_names), path, input_names=input_names,
+                          output_names=["last_hidden_state"], dynamic_axes=dynamic_axes,
+                          opset_version=opset_version, **export_kwargs)
+    return input_names
+
+def quantize_onnx(path, quantized_path):
+    """
+    Applies dynamic int8 quantization to the weights of an exported model.
+    Activations stay float32 and are quantized on the fly by ONNX Runtime.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+
+class OnnxEncoder:
+    """
+    Runs an exported transformer encoder through ONNX Runtime on CPU.
+
+    Called with the tokenizer's NumPy output, it returns the (batch, tokens, hidden) float32
+    token embeddings, i.e. the same array the PyTorch model's first output holds.
+    """
+
+    def __init__(self, path, intra_op_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, encoded):
+        inputs = {name: np.asarray(encoded[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(["last_hidden_state"], inputs)[0]
+
+def build_onnx_encoder(model_name, extractor, export_dir, quantize=True, intra_op_threads=None):
+    """
+    Returns an OnnxEncoder for one pipeline, exporting (and quantizing) it first unless a file
+    for the same model is already in `export_dir`.
+
+    Exported files are named after the model and a hash of its weights' identity, so several
+    workers can reuse one export and a changed model is exported again.
+    """
+    model = extractor.model
+    identity = f"{getattr(model, 'name_or_path', '')}@{getattr(model.config, '_commit_hash', '')}|{model.config.to_json_string()}"
+    stem = os.path.join(export_dir, f"{model_name}-{hashlib.sha1(identity.encode()).hexdigest()[:12]}")
+    path = stem + (".int8.onnx" if quantize else ".onnx")
+
+    if not os.path.exists(path):
+        os.makedirs(export_dir, exist_ok=True)
+        # Write to process-specific temporary names so concurrent workers never read a partial file
+        temporary = f"{stem}.{os.getpid()}"
+        export_onnx(extractor, temporary + ".onnx")
+        if quantize:
+            quantize_onnx(temporary + ".onnx", temporary + ".int8.onnx")
+            os.remove(temporary + ".onnx")
+            os.replace(temporary + ".int8.onnx", path)
+        else:
+            os.replace(temporary + ".onnx", path)
+        logger.info(f"Exported {model_name} to {path}.")
+
+    return OnnxEncoder(path, intra_op_threads)
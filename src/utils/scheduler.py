@@ -0,0 +1,89 @@
+# utils/scheduler.py
+
+import random
+import time
+from utils.logger import get_logger
+
+logger = get_logger("AdaptiveScheduler")
+
+class AdaptiveScheduler:
+    """
+    Decides when each collection source is polled next.
+
+    Every source has its own interval, adapted to its churn: a poll that turns up new URLs
+    multiplies the interval by `speedup` (< 1), a poll that finds nothing multiplies it by
+    `slowdown` (> 1), always within [min_interval, max_interval]. Fast-moving feeds therefore
+    settle near min_interval and static lists drift towards max_interval. Each wait is jittered
+    by +/- `jitter` of the interval so sources (and replicas) do not poll in lockstep.
+
+    Times are kept on the monotonic clock; next_poll_times() converts them to wall-clock timestamps.
+    """
+
+    def __init__(self, intervals, min_interval=60, max_interval=86400, speedup=0.5, slowdown=1.5, jitter=0.1):
+        """
+        Args:
+            intervals (dict): Source name -> initial interval in seconds. All sources are due at once.
+            min_interval (float): Shortest interval a source adapts to.
+            max_interval (float): Longest interval a source adapts to.
+            speedup (float): Interval factor after a poll with new URLs.
+            slowdown (float): Interval factor after a poll without new URLs.
+            jitter (float): Fraction of the interval each wait is randomly lengthened or shortened by.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.jitter = jitter
+        now = time.monotonic()
+        self.sources = {source: {"interval": float(interval), "next_poll": now, "polls": 0, "last_new": None}
+                        for source, interval in intervals.items()}
+
+    def jittered(self, interval):
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def due(self, now=None):
+        """
+        Returns the sources whose next poll time has passed, and provisionally schedules each one
+        interval ahead, so a source that never reports back (e.g. abandoned after hanging) is not
+        retried in a tight loop.
+        """
+        now = time.monotonic() if now is None else now
+        sources = [source for source, state in self.sources.items() if state["next_poll"] <= now]
+        for source in sources:
+            self.sources[source]["next_poll"] = now + self.jittered(self.sources[source]["interval"])
+        return sources
+
+    def record(self, source, new_urls, now=None):
+        """
+        Adapts a source's interval to the number of new URLs its last poll found and schedules its next poll.
+
+        Returns:
+            float: The source's new interval in seconds.
+        """
+        now = time.monotonic() if now is None else now
+        state = self.sources[source]
+        factor = self.speedup if new_urls else self.slowdown
+        state["interval"] = min(self.max_interval, max(self.min_interval, state["interval"] * factor))
+        state["next_poll"] = now + self.jittered(state["interval"])
+        state["polls"] += 1
+        state["last_new"] = new_urls
+        return state["interval"]
+
+    def wait_time(self, now=None):
+        """
+        Returns the seconds until the next source is due (0 if one already is).
+        """
+        now = time.monotonic() if now is None else now
+        if not self.sources:
+            return self.max_interval
+        return max(0.0, min(state["next_poll"] for state in self.sources.values()) - now)
+
+    def next_poll_times(self):
+        """
+        Returns, per source, its current interval, the number of polls, the new URLs found by the
+        last one and the wall-clock time (Unix timestamp) of its next poll.
+        """
+        offset = time.time() - time.monotonic()
+        return {source: {"interval": state["interval"], "polls": state["polls"], "last_new": state["last_new"],
+                         "next_poll": state["next_poll"] + offset}
+                for source, state in self.sources.items()}
@@ -0,0 +1,141 @@
+# utils/seen_index.py
+
+import os
+import sqlite3
+import numpy as np
+from utils.bloom_filter import BloomFilter
+from utils.logger import get_logger
+
+logger = get_logger("SeenURLIndex")
+
+SEEN_INDEX_CAPACITY = 20000000  # URLs the Bloom filter front is sized for (~34 MiB at 0.1%)
+SEEN_INDEX_ERROR_RATE = 0.001  # Fraction of unseen URLs that need an SQLite lookup to confirm
+QUERY_CHUNK_SIZE = 900  # Hashes per SELECT ... IN (...), under SQLite's bound parameter limit
+
+class SeenURLIndex:
+    """
+    Persistent set of every URL already processed, for deduplication across collection cycles.
+
+    URLs are stored as 64-bit hashes in an SQLite table keyed on the hash, so the index lives on
+    disk (about 20 bytes per URL) and survives restarts. An in-memory Bloom filter sits in front
+    of it: a URL the filter has never seen is new without touching the database, and only the few
+    URLs it reports as possibly seen (the seen ones plus `error_rate` false positives) are looked
+    up. RAM is therefore fixed by `capacity` and `error_rate`, not by the size of the index.
+    The filter is saved next to the database and rebuilt from it if missing or stale.
+    """
+
+    def __init__(self, path, capacity=SEEN_INDEX_CAPACITY, error_rate=SEEN_INDEX_ERROR_RATE):
+        self.path = path
+        self.bloom_path = path + ".bloom.npz"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS seen (hash INTEGER PRIMARY KEY)")
+        self.count = self.connection.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self.bloom = self.load_bloom(capacity, error_rate)
+        self.stats = {"checked": 0, "new": 0, "db_lookups": 0}
+
+    def load_bloom(self, capacity, error_rate):
+        """
+        Returns the saved Bloom filter if it matches the database and settings, otherwise one rebuilt from the database.
+        """
+        try:
+            bloom = BloomFilter.load(self.bloom_path)
+            if (bloom.capacity, bloom.error_rate, len(bloom)) == (capacity, error_rate, self.count):
+                return bloom
+            logger.info(f"Saved Bloom filter for {self.path} is stale; rebuilding.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load the Bloom filter for {self.path} ({e}); rebuilding.")
+
+        bloom = BloomFilter(capacity, error_rate)
+        cursor = self.connection.execute("SELECT hash FROM seen")
+        while True:
+            rows = cursor.fetchmany(1000000)
+            if not rows:
+                break
+            bloom.add(np.array(rows, dtype=np.int64).ravel().view(np.uint64))
+        bloom.count = self.count  # Every stored hash is distinct, whatever add() reported
+        if self.count:
+            logger.info(f"Rebuilt Bloom filter from {self.count} URLs in {self.path}.")
+        return bloom
+
+    def stored(self, hashes):
+        """
+        Returns a boolean array, True where a hash is in the database.
+        """
+        keys = hashes.view(np.int64)
+        found = set()
+        for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[start:start + QUERY_CHUNK_SIZE].tolist()
+            query = f"SELECT hash FROM seen WHERE hash IN ({','.join('?' * len(chunk))})"
+            found.update(row[0] for row in self.connection.execute(query, chunk))
+        self.stats["db_lookups"] += len(keys)
+        return np.fromiter((key in found for key in keys.tolist()), dtype=bool, count=len(keys))
+
+    def unseen(self, urls):
+        """
+        Returns the URLs not seen before, in their original order and without repeats.
+        Nothing is recorded; call mark_seen once the URLs have actually been handled.
+
+        Args:
+            urls (list): URLs to check.
+
+        Returns:
+            list: URLs never passed to mark_seen (or filter_new) before.
+        """
+        if not len(urls):
+            return []
+        hashes, first = np.unique(BloomFilter.hash_keys(urls), return_index=True)
+        new = ~self.bloom.contains(hashes)
+        maybe_seen = np.flatnonzero(~new)
+        if len(maybe_seen):
+            new[maybe_seen] = ~self.stored(hashes[maybe_seen])
+
+        self.stats["checked"] += len(urls)
+        self.stats["new"] += int(new.sum())
+        return [urls[index] for index in np.sort(first[new])]
+
+    def mark_seen(self, urls):
+        """
+        Records URLs as seen. URLs already in the index are ignored.
+
+        Args:
+            urls (list): URLs to record.
+        """
+        if not len(urls):
+            return
+        hashes = np.unique(BloomFilter.hash_keys(urls))
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany("INSERT OR IGNORE INTO seen (hash) VALUES (?)",
+                                        ((key,) for key in hashes.view(np.int64).tolist()))
+            self.count += self.connection.total_changes - before
+        self.bloom.add(hashes)
+        self.bloom.count = self.count  # add() does not count false positives, which are stored too
+        if self.count > self.bloom.capacity:
+            logger.warning(f"Seen-URL index holds {self.count} URLs, over the Bloom filter's capacity of "
+                           f"{self.bloom.capacity}; more lookups will reach SQLite.")
+
+    def filter_new(self, urls):
+        """
+        Returns the URLs not seen before (see unseen) and records them as seen in the same step.
+        """
+        new_urls = self.unseen(urls)
+        self.mark_seen(new_urls)
+        return new_urls
+
+    def save(self):
+        """
+        Saves the Bloom filter, so the next start does not rebuild it from the database.
+        """
+        self.bloom.save(self.bloom_path)
+
+    def close(self):
+        self.save()
+        self.connection.close()
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,123 @@
+# utils/shared_ring.py
+
+import os
+from collections import namedtuple
+from multiprocessing import Array, Queue, resource_tracker, shared_memory
+from queue import Empty
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger("SharedArrayRing")
+
+# Sent over the queue in place of the array itself
+ArrayDescriptor = namedtuple("ArrayDescriptor", ["slot", "offset", "shape", "dtype"])
+
+class SharedArrayRing:
+    """
+    Ring of fixed-size slots in one multiprocessing.shared_memory block, used to pass
+    feature matrices between processes without pickling them.
+
+    The producer copies an array into a free slot and sends the small ArrayDescriptor
+    (slot, offset, shape, dtype) over the queue. The consumer wraps the slot with an
+    np.ndarray view (no copy) and releases the slot once it is done with the data.
+    Free slots are handed out through a multiprocessing.Queue, so any number of producer
+    and consumer replicas can share one ring; when every slot is in use, producers wait.
+    Each slot records the PID of the consumer reading it, so the slots of a consumer that
+    died before releasing them can be reclaimed.
+    """
+
+    def __init__(self, slots=8, slot_bytes=4 * 1024 * 1024):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.owner = True
+        self.free_slots = Queue()
+        self.holders = Array("q", slots)  # Slot -> PID of the consumer reading it (0 if none)
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        logger.info(f"Created shared memory ring {self.shm.name} with {slots} slots of {slot_bytes} bytes.")
+
+    def __getstate__(self):
+        # Only the segment name crosses process boundaries; the child re-attaches to it
+        return {"slots": self.slots, "slot_bytes": self.slot_bytes, "name": self.shm.name, "free_slots": self.free_slots,
+                "holders": self.holders}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self.free_slots = state["free_slots"]
+        self.holders = state["holders"]
+        self.owner = False
+        self.shm = shared_memory.SharedMemory(name=state["name"])
+        # Attaching registers the segment with this process's resource tracker, which would
+        # unlink it when the process exits; only the creating process may do that
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+
+    def write(self, array, timeout=None):
+        """
+        Copies an array into a free slot.
+
+        Args:
+            array (np.ndarray): Array to share (converted to contiguous float32).
+            timeout (float): Seconds to wait for a free slot.
+
+        Returns:
+            ArrayDescriptor: Descriptor to send to the consumer, or None if the array does not
+            fit in a slot or no slot became free in time (the caller should send it inline).
+        """
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        if array.nbytes > self.slot_bytes:
+            return None
+        try:
+            slot = self.free_slots.get(timeout=timeout)
+        except Empty:
+            return None
+
+        descriptor = ArrayDescriptor(slot, slot * self.slot_bytes, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=descriptor.offset)[...] = array
+        return descriptor
+
+    def read(self, descriptor):
+        """
+        Returns a zero-copy np.ndarray view of the slot described by `descriptor`.
+        The view is only valid until the slot is released.
+        """
+        self.holders[descriptor.slot] = os.getpid()
+        return np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=self.shm.buf,
+                          offset=descriptor.offset)
+
+    def release(self, descriptor):
+        """
+        Returns a slot to the pool once the consumer no longer needs its data.
+        """
+        self.holders[descriptor.slot] = 0
+        self.free_slots.put(descriptor.slot)
+
+    def reclaim(self, pid):
+        """
+        Returns the slots still held by a consumer process that exited without releasing them.
+
+        Args:
+            pid (int): PID of the exited consumer.
+
+        Returns:
+            int: Number of slots reclaimed.
+        """
+        reclaimed = 0
+        with self.holders.get_lock():
+            for slot in range(self.slots):
+                if self.holders[slot] == pid:
+                    self.holders[slot] = 0
+                    self.free_slots.put(slot)
+                    reclaimed += 1
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} shared memory slots held by exited process {pid}.")
+        return reclaimed
+
+    def close(self):
+        """
+        Detaches from the shared memory block; the creating process also removes it.
+        """
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
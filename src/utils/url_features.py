@@ -0,0 +1,166 @@
+# utils/url_features.py
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from utils.logger import get_logger
+
+logger = get_logger("URLFeatures")
+
+SUSPICIOUS_KEYWORDS = [
+    "login", "signin", "verify", "secure", "account", "update", "bank", "confirm",
+    "password", "paypal", "webscr", "ebayisapi", "wallet", "free", "bonus", "lucky",
+]
+SUSPICIOUS_TLDS = ["tk", "ml", "ga", "cf", "gq", "xyz", "top", "zip", "work", "click", "country", "kim", "buzz"]
+COMMON_TLDS = ["com", "org", "net", "edu", "gov", "io", "co", "uk", "de"]
+SPECIAL_CHARS = ".-_@?=&%/~+"
+TLD_WIDTH = 8  # Characters of the TLD compared against the lists above
+HASHING_N_FEATURES = 2 ** 20  # Columns of the hashed character n-gram space
+HASHING_NGRAM_RANGE = (3, 5)  # Character n-gram lengths hashed into it
+
+class LexicalFeatureExtractor:
+    """
+    Extracts lexical and structural features from URLs without any model inference.
+
+    All features are computed on whole arrays of URLs at once: the URLs are viewed as a
+    (n_urls, max_length) matrix of code points and every statistic is a NumPy reduction
+    over that matrix, so there is no per-URL Python loop.
+    """
+
+    def __init__(self, max_length=256, chunk_size=16384):
+        self.max_length = max_length  # Longer URLs are truncated before feature extraction
+        self.chunk_size = chunk_size  # URLs processed per matrix, bounds peak memory
+        self.feature_names = (
+            ["length", "host_length", "path_length", "digit_ratio", "letter_ratio", "special_ratio", "entropy",
+             "subdomain_depth", "is_ip_host", "has_port", "is_https", "tld_length", "suspicious_tld", "common_tld",
+             "path_tokens", "path_depth", "suspicious_keywords"]
+            + [f"count_{char}" for char in SPECIAL_CHARS]
+        )
+
+    def transform(self, urls):
+        """
+        Extracts lexical features for a list or array of URLs.
+
+        Args:
+            urls (list | np.ndarray | pd.Series): URLs to featurize.
+
+        Returns:
+            np.ndarray: Float32 matrix of shape (n_urls, len(feature_names)).
+        """
+        urls = np.asarray(urls, dtype=str)
+        if len(urls) == 0:
+            return np.empty((0, len(self.feature_names)), dtype=np.float32)
+
+        chunks = [self.transform_chunk(urls[start:start + self.chunk_size])
+                  for start in range(0, len(urls), self.chunk_size)]
+        return np.vstack(chunks)
+
+    def transform_chunk(self, urls):
+        """
+        Extracts features for one chunk of URLs held as a NumPy unicode array.
+        """
+        urls = urls.astype(f"<U{min(max(urls.dtype.itemsize // 4, 1), self.max_length)}")
+        codes = urls.view(np.uint32).reshape(len(urls), -1).copy()
+        n_urls, width = codes.shape
+
+        # Fold ASCII upper case to lower case
+        upper = (codes >= ord("A")) & (codes <= ord("Z"))
+        codes[upper] += 32
+
+        positions = np.arange(width)
+        valid = codes != 0
+        length = valid.sum(axis=1)
+        lowered = codes.view(f"<U{width}").ravel()
+
+        # Split into scheme / host / path using the first "://" and the first delimiter after it
+        scheme_end = np.char.find(lowered, "://")
+        host_start = np.where(scheme_end >= 0, scheme_end + 3, 0)
+        after_host_start = positions >= host_start[:, np.newaxis]
+        path_delimiter = ((codes == ord("/")) | (codes == ord("?")) | (codes == ord("#"))) & after_host_start
+        path_start = np.where(path_delimiter.any(axis=1), path_delimiter.argmax(axis=1), length)
+        port_delimiter = (codes == ord(":")) & after_host_start & (positions < path_start[:, np.newaxis])
+        host_end = np.where(port_delimiter.any(axis=1), port_delimiter.argmax(axis=1), path_start)
+        in_host = after_host_start & (positions < host_end[:, np.newaxis])
+        in_path = (positions >= path_start[:, np.newaxis]) & valid
+
+        is_digit = (codes >= ord("0")) & (codes <= ord("9"))
+        is_letter = (codes >= ord("a")) & (codes <= ord("z"))
+        is_special = valid & ~is_digit & ~is_letter
+        is_dot = codes == ord(".")
+
+        # Host structure
+        host_length = host_end - host_start
+        host_dots = (is_dot & in_host).sum(axis=1)
+        host_other = (in_host & ~is_digit & ~is_dot).sum(axis=1)
+        is_ip_host = (host_other == 0) & (host_dots == 3)
+        subdomain_depth = np.where(is_ip_host, 0, np.maximum(host_dots - 1, 0))
+        has_port = host_end < path_start
+
+        # TLD: characters after the last dot of the host, gathered into a fixed-width string array
+        last_dot = np.where((is_dot & in_host).any(axis=1),
+                            width - 1 - (is_dot & in_host)[:, ::-1].argmax(axis=1), host_end)
+        tld_positions = last_dot[:, np.newaxis] + 1 + np.arange(TLD_WIDTH)
+        tld_codes = np.take_along_axis(codes, np.minimum(tld_positions, width - 1), axis=1)
+        tld_codes[tld_positions >= host_end[:, np.newaxis]] = 0
+        tlds = np.ascontiguousarray(tld_codes).view(f"<U{TLD_WIDTH}").ravel()
+        tld_length = np.where(is_ip_host, 0, np.maximum(host_end - last_dot - 1, 0))
+
+        # Path structure
+        path_length = in_path.sum(axis=1)
+        path_separators = np.isin(codes, [ord(char) for char in "/._-?=&"]) & in_path
+        token_chars = in_path & ~path_separators
+        path_tokens = token_chars[:, 0] + (token_chars[:, 1:] & ~token_chars[:, :-1]).sum(axis=1)
+        path_depth = ((codes == ord("/")) & in_path).sum(axis=1)
+
+        # Shannon entropy over characters, using one bincount for the whole chunk
+        clipped = np.minimum(codes, 128)
+        counts = np.bincount((np.arange(n_urls)[:, np.newaxis] * 129 + clipped)[valid],
+                             minlength=n_urls * 129).reshape(n_urls, 129).astype(np.float32)
+        probabilities = counts / np.maximum(length, 1)[:, np.newaxis]
+        entropy = -(probabilities * np.log2(np.where(probabilities > 0, probabilities, 1))).sum(axis=1)
+
+        keyword_counts = sum(np.char.count(lowered, keyword) for keyword in SUSPICIOUS_KEYWORDS)
+        special_counts = [counts[:, ord(char)] for char in SPECIAL_CHARS]
+        safe_length = np.maximum(length, 1)
+
+        features = np.column_stack([
+            length, host_length, path_length,
+            is_digit.sum(axis=1) / safe_length, is_letter.sum(axis=1) / safe_length, is_special.sum(axis=1) / safe_length,
+            entropy, subdomain_depth, is_ip_host, has_port, np.char.startswith(lowered, "https://"),
+            tld_length, np.isin(tlds, SUSPICIOUS_TLDS), np.isin(tlds, COMMON_TLDS),
+            path_tokens, path_depth, keyword_counts,
+        ] + special_counts)
+        return features.astype(np.float32)
+
+class HashingURLFeaturizer:
+    """
+    Stateless character n-gram featurizer for URLs.
+
+    Character 3- to 5-grams of the lowercased URL are hashed into a fixed number of columns
+    and L2-normalized, giving a sparse float32 CSR matrix. Nothing is fitted, so training,
+    evaluation and the live ClassificationAgent produce identical features without a vocabulary
+    file, and any chunk of a stream can be featurized on its own for partial_fit training.
+    """
+
+    def __init__(self, n_features=HASHING_N_FEATURES, ngram_range=HASHING_NGRAM_RANGE):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.vectorizer = HashingVectorizer(analyzer="char", ngram_range=self.ngram_range, n_features=n_features,
+                                            alternate_sign=False, norm="l2", lowercase=True, dtype=np.float32)
+
+    def transform(self, urls):
+        """
+        Hashes a list or array of URLs.
+
+        Args:
+            urls (list | np.ndarray | pd.Series): URLs to featurize.
+
+        Returns:
+            scipy.sparse.csr_matrix: Float32 matrix of shape (n_urls, n_features).
+        """
+        return self.vectorizer.transform(urls)
+
+    def fit_transform(self, urls, y=None):
+        """
+        Same as transform; there is nothing to fit. Lets the featurizer stand in for a fitted vectorizer.
+        """
+        return self.transform(urls)
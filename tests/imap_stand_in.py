@@ -0,0 +1,188 @@
+# tests/imap_stand_in.py
+
+"""
+Minimal local IMAP4rev1 server for tests and benchmarks of the mail collector.
+Serves one read-only mailbox over plain TCP and supports just what the collector sends:
+CAPABILITY, LOGIN, SELECT/EXAMINE, (UID) SEARCH, (UID) FETCH of UID, BODYSTRUCTURE,
+RFC822 and BODY[section] / BODY.PEEK[section], NOOP and LOGOUT.
+"""
+
+import re
+import socketserver
+import threading
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+UIDVALIDITY = 1700000000
+
+def make_message(index, n_links=5, attachment_bytes=0):
+    """
+    Returns a multipart/alternative message (plain text and HTML, optionally with a PDF
+    attachment) whose HTML part links to n_links URLs numbered after `index`.
+    """
+    message = EmailMessage()
+    message["From"] = f"sender{index}@example.com"
+    message["To"] = "inbox@example.com"
+    message["Subject"] = f"Message {index}"
+    urls = [f"http://link{index}-{i}.example/path?id={i}&amp;ref=mail" for i in range(n_links)]
+    message.set_content("Plain text version.\n" + "\n".join(url.replace("&amp;", "&") for url in urls))
+    message.add_alternative("<html><body><p>Hello</p>" + "".join(f'<a class="l" href="{url}">link {i}</a><br>'
+                                                                 for i, url in enumerate(urls)) + "</body></html>",
+                            subtype="html")
+    if attachment_bytes:
+        message.add_attachment(bytes(range(256)) * (attachment_bytes // 256), maintype="application", subtype="pdf",
+                               filename=f"invoice{index}.pdf")
+    return message.as_bytes()
+
+def quote(value):
+    return "NIL" if value is None else '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def bodystructure(part):
+    """
+    Returns the BODYSTRUCTURE of a parsed message or part.
+    """
+    if part.is_multipart():
+        return "(" + "".join(bodystructure(child) for child in part.get_payload()) + f" {quote(part.get_content_subtype())})"
+    params = " ".join(f"{quote(key)} {quote(value)}" for key, value in part.get_params()[1:]) if part.get_params() else ""
+    body = part.get_payload().encode()
+    fields = (f"{quote(part.get_content_maintype())} {quote(part.get_content_subtype())} ({params or 'NIL'}) NIL NIL "
+              f"{quote(part.get('Content-Transfer-Encoding', '7bit'))} {len(body)}")
+    if part.get_content_maintype() == "text":
+        fields += f" {len(body.splitlines())}"
+    return f"({fields})"
+
+def section_body(message, section):
+    """
+    Returns the raw (still transfer-encoded) body of a part, e.g. section '1.2'.
+    """
+    part = message
+    for number in section.split("."):
+        if part.is_multipart():
+            part = part.get_payload()[int(number) - 1]
+    return part.get_payload().encode()
+
+def parse_set(value, uids):
+    """
+    Returns the UIDs matched by an IMAP sequence set such as '1,4:7,9:*'.
+    """
+    highest = max(uids) if uids else 0
+    matched = set()
+    for item in value.split(","):
+        low, _, high = item.partition(":")
+        low = highest if low == "*" else int(low)
+        high = low if not high else highest if high == "*" else int(high)
+        low, high = min(low, high), max(low, high)
+        matched.update(uid for uid in uids if low <= uid <= high)
+    return sorted(matched)
+
+class ImapHandler(socketserver.StreamRequestHandler):
+    def send(self, line):
+        self.wfile.write(line if isinstance(line, bytes) else line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.send("* OK IMAP4rev1 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, command, *args = line.decode().rstrip("\r\n").split(" ", 2)
+            command = command.upper()
+            self.server.commands.append(" ".join([command] + args))
+            if command == "UID":
+                command, _, rest = args[0].partition(" ")
+                command, uid_mode, args = command.upper(), True, [rest]
+            else:
+                uid_mode = False
+            if not self.dispatch(tag, command, args[0] if args else "", uid_mode):
+                return
+
+    def dispatch(self, tag, command, args, uid_mode):
+        mailbox = self.server.mailbox
+        uids = sorted(mailbox)
+        if command == "CAPABILITY":
+            self.send("* CAPABILITY IMAP4rev1")
+        elif command in ("LOGIN", "NOOP"):
+            pass
+        elif command in ("SELECT", "EXAMINE"):
+            self.send(f"* {len(uids)} EXISTS")
+            self.send(f"* OK [UIDVALIDITY {self.server.uidvalidity}] UIDs valid")
+            self.send(f"* OK [UIDNEXT {(uids[-1] if uids else 0) + 1}] Predicted next UID")
+        elif command == "SEARCH":
+            criteria = args.split()
+            matched = parse_set(criteria[1], uids) if criteria[0].upper() == "UID" else uids
+            if not uid_mode:
+                matched = [uids.index(uid) + 1 for uid in matched]
+            self.send("* SEARCH" + "".join(f" {uid}" for uid in matched))
+        elif command == "FETCH":
+            if uid_mode and self.server.failing_uids.intersection(parse_set(args.partition(" ")[0], uids)):
+                self.send(f"{tag} NO FETCH failed")
+                return True
+            self.fetch(args, uids, uid_mode)
+        elif command == "LOGOUT":
+            self.send("* BYE")
+            self.send(f"{tag} OK LOGOUT completed")
+            return False
+        else:
+            self.send(f"{tag} BAD unsupported command")
+            return True
+        self.send(f"{tag} OK {command} completed")
+        return True
+
+    def fetch(self, args, uids, uid_mode):
+        id_set, _, items = args.partition(" ")
+        if uid_mode:
+            selected = parse_set(id_set, uids)
+        else:
+            selected = [uids[number - 1] for number in parse_set(id_set, list(range(1, len(uids) + 1)))]
+        names = re.findall(r"BODY(?:\.PEEK)?\[[^\]]*\]|[A-Z0-9.]+", items.strip("()").upper())
+        for uid in selected:
+            raw = self.server.mailbox[uid]
+            message = message_from_bytes(raw, policy=policy.compat32)
+            self.wfile.write(f"* {uids.index(uid) + 1} FETCH (UID {uid}".encode())
+            for name in names:
+                if name == "UID":
+                    continue
+                if name == "BODYSTRUCTURE":
+                    self.wfile.write(f" BODYSTRUCTURE {bodystructure(message)}".encode())
+                    continue
+                if name == "RFC822":
+                    data = raw
+                else:
+                    section = name[name.index("[") + 1:-1]
+                    name = f"BODY[{section}]"
+                    data = section_body(message, section)
+                self.server.body_bytes += len(data)
+                self.wfile.write(f" {name} {{{len(data)}}}\r\n".encode() + data)
+            self.wfile.write(b")\r\n")
+
+class ImapStandIn(socketserver.ThreadingTCPServer):
+    """
+    Serves `mailbox` (UID -> raw RFC822 bytes) on 127.0.0.1. Messages can be added while it runs.
+    `commands` logs every command received, `connections` counts client connections and `body_bytes`
+    counts message bytes sent. A UID FETCH that includes one of `failing_uids` gets a NO response.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox=None, uidvalidity=UIDVALIDITY):
+        super().__init__(("127.0.0.1", 0), ImapHandler)
+        self.mailbox = dict(mailbox or {})
+        self.uidvalidity = uidvalidity
+        self.commands = []
+        self.connections = 0
+        self.body_bytes = 0
+        self.failing_uids = set()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
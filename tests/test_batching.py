@@ -0,0 +1,48 @@
+# tests/test_batching.py
+
+import time
+import pytest
+from multiprocessing import Queue
+from utils.batching import SHUTDOWN, discard_pending, drain_queue
+
+@pytest.fixture
+def queue():
+    return Queue()
+
+def test_drain_returns_empty_after_timeout(queue):
+    start = time.monotonic()
+    messages, shutdown = drain_queue(queue, max_messages=10, max_wait=0.01, timeout=0.05)
+    assert messages == []
+    assert shutdown is False
+    assert time.monotonic() - start < 1
+
+def test_drain_caps_batch_size(queue):
+    for i in range(5):
+        queue.put(i)
+    time.sleep(0.1)  # Let the feeder thread flush
+    messages, _ = drain_queue(queue, max_messages=3, max_wait=0.5, timeout=1)
+    assert messages == [0, 1, 2]
+
+def test_drain_stops_at_shutdown(queue):
+    queue.put("a")
+    queue.put(SHUTDOWN)
+    queue.put("b")
+    messages, shutdown = drain_queue(queue, max_messages=10, max_wait=0.5, timeout=1)
+    assert messages == ["a"]
+    assert shutdown is True
+
+def test_discard_pending_keeps_shutdown_sentinels(queue):
+    for message in ["a", SHUTDOWN, "b"]:
+        queue.put(message)
+    time.sleep(0.1)  # Let the feeder thread flush
+    assert discard_pending(queue) == ["a", "b"]
+    assert queue.get(timeout=1) == SHUTDOWN
+
+def test_stop_unblocks_agent_process():
+    from agents.classification_agent import ClassificationAgent
+
+    agent = ClassificationAgent(Queue(), Queue())
+    agent.start()
+    agent.stop()
+    agent.join(timeout=10)
+    assert not agent.is_alive()
@@ -0,0 +1,35 @@
+# tests/test_bloom_filter.py
+
+import numpy as np
+from utils.bloom_filter import BloomFilter
+
+def test_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    keys = [f"http://example{i}.com" for i in range(1000)]
+    assert bloom.add(keys).all()
+    assert bloom.contains(keys).all()
+    assert not bloom.add(keys[:10]).any()
+    assert len(bloom) == 1000
+    assert "http://example5.com" in bloom
+
+def test_false_positive_rate():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    bloom.add([f"http://seen{i}.com" for i in range(10000)])
+    unseen = bloom.contains([f"http://unseen{i}.com" for i in range(10000)])
+    assert unseen.mean() < 0.02
+
+def test_uint64_keys():
+    bloom = BloomFilter(100)
+    hashes = np.arange(50, dtype=np.uint64)
+    bloom.add(hashes)
+    assert bloom.contains(hashes).all()
+
+def test_save_and_load(tmp_path):
+    bloom = BloomFilter(1000, error_rate=0.01)
+    keys = [f"http://example{i}.com" for i in range(500)]
+    bloom.add(keys)
+    bloom.save(str(tmp_path / "bloom.npz"))
+
+    loaded = BloomFilter.load(str(tmp_path / "bloom.npz"))
+    assert loaded.contains(keys).all()
+    assert len(loaded) == 500 and loaded.n_hashes == bloom.n_hashes
@@ -1,6 +1,7 @@
 # tests/test_classification.py
 
 import pytest
+import numpy as np
 from agents.classification_agent import ClassificationAgent
 from core.coordination_hub import CoordinationHub
 
@@ -31,3 +32,273 @@ def test_classify(classification_agent):
     classification_agent.model.fit(features, [0, 1])  # Example training data
     classifications = classification_agent.classify(features)
     assert classifications is not None
+
+class RecordingExtractor:
+    """Stands in for the transformer ensemble and records which URLs reach stage 2."""
+    def __init__(self):
+        self.seen = []
+
+    def extract_features(self, urls):
+        self.seen.extend(urls)
+        return [[1.0 if "login" in url else 0.0] for url in urls]
+
+def test_cascade_escalates_only_uncertain_urls():
+    from multiprocessing import Queue
+
+    extractor = RecordingExtractor()
+    agent = ClassificationAgent(Queue(), Queue(), feature_extractor=extractor)
+    agent.uncertainty_band = (0.2, 0.8)
+
+    # Stage 1 learns URL length; stage 2 learns the "login" keyword
+    agent.stage1_model.predict_proba = lambda X: np.column_stack([1 - np.clip((X[:, 0] - 10) / 40, 0, 1),
+                                                                  np.clip((X[:, 0] - 10) / 40, 0, 1)])
+    agent.stage1_model.classes_ = np.array(["benign", "malicious"])
+    agent.stage1_trained = True
+    agent.train_model([[0.0], [1.0]] * 5, ["benign", "malicious"] * 5)
+
+    urls = ["http://a.io", "http://example.com/login", "http://" + "x" * 60 + ".com"]
+    labels, probabilities = agent.classify_cascade(urls)
+
+    assert extractor.seen == ["http://example.com/login"]
+    assert list(labels) == ["benign", "malicious", "malicious"]
+    assert probabilities.dtype == np.float32
+    report = agent.cascade_report()
+    assert report["stage1"]["urls"] == 3
+    assert report["stage2"]["urls"] == 1
+
+def test_hashing_featurizer_classifies_raw_urls():
+    from multiprocessing import Queue
+    from utils.url_features import HashingURLFeaturizer
+
+    output_queue = Queue()
+    agent = ClassificationAgent(Queue(), output_queue)
+    agent.featurizer = HashingURLFeaturizer(n_features=2 ** 12)
+    urls = ["http://paypal-login.verify.tk/account", "https://github.com/python"] * 10
+    agent.train_model(agent.featurizer.transform(urls), ["malicious", "benign"] * 10)
+
+    agent.receive_batch([{"sender": "DataCollectionAgent", "data": {"request_id": "a", "urls": urls[:2]}},
+                         {"sender": "DataCollectionAgent", "data": {"request_id": "b", "urls": urls[3:4]}}])
+
+    first, second = output_queue.get(timeout=5)["data"], output_queue.get(timeout=5)["data"]
+    assert first["request_id"] == "a" and list(first["classifications"]) == ["malicious", "benign"]
+    assert second["request_id"] == "b" and list(second["classifications"]) == ["benign"]
+
+def test_online_updates_swap_model(monkeypatch):
+    import time
+    from multiprocessing import Queue
+    from config.agents_config import CLASSIFICATION_AGENT_CONFIG
+
+    monkeypatch.setitem(CLASSIFICATION_AGENT_CONFIG["online_learning"], "enabled", True)
+    output_queue = Queue()
+    agent = ClassificationAgent(Queue(), output_queue)
+    agent.start_online_learning()
+
+    rng = np.random.default_rng(0)
+    serving_models = []
+    for _ in range(5):
+        features = rng.normal(size=(64, 4)).astype(np.float32)
+        labels = np.where(features[:, 0] > 0, "malicious", "benign")
+        serving_models.append(agent.model)
+        agent.receive_message("FeatureExtractionAgent", {"request_id": "r", "features": features, "labels": labels})
+        output_queue.get(timeout=5)
+
+    deadline = time.time() + 10
+    while agent.model_version < (0, 5) and time.time() < deadline:
+        time.sleep(0.01)
+    assert agent.model_version == (0, 5)
+    assert agent.is_trained
+
+    # Every update produced a new model object; earlier ones were never modified in place
+    assert agent.model not in serving_models
+    assert not hasattr(serving_models[0], "coef_")
+
+    test = rng.normal(size=(200, 4)).astype(np.float32)
+    accuracy = np.mean(agent.classify(test) == np.where(test[:, 0] > 0, "malicious", "benign"))
+    assert accuracy > 0.9
+
+    agent.training_queue.put(None)
+    agent.trainer.join(timeout=5)
+
+def test_scores_and_threshold():
+    from multiprocessing import Queue
+
+    output_queue = Queue()
+    agent = ClassificationAgent(Queue(), output_queue)
+    agent.model_backend = "logistic_regression"
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3)).astype(np.float32)
+    agent.train_model(X, np.where(X[:, 0] > 0, "malicious", "benign"))
+
+    agent.receive_batch([{"sender": "FeatureExtractionAgent", "data": {"request_id": "a", "urls": ["u1", "u2"], "features": X[:2]}}])
+    data = output_queue.get(timeout=5)["data"]
+    assert data["scores"].dtype == np.float32 and data["scores"].shape == (2,)
+    assert list(data["classifications"]) == list(np.where(data["scores"] >= 0.5, "malicious", "benign"))
+
+    agent.decision_threshold = 0.99
+    labels, scores = agent.classify_with_scores(X)
+    assert list(labels) == list(np.where(scores >= 0.99, "malicious", "benign"))
+
+def test_calibrated_training():
+    from multiprocessing import Queue
+
+    agent = ClassificationAgent(Queue(), Queue())
+    agent.model_backend = "logistic_regression"
+    agent.calibration = "sigmoid"
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 3)).astype(np.float32)
+    agent.train_model(X, np.where(X[:, 0] + 0.5 * rng.normal(size=300) > 0, "malicious", "benign"))
+    _, scores = agent.classify_with_scores(X)
+    assert ((scores >= 0) & (scores <= 1)).all()
+
+def test_loads_latest_model_bundle(tmp_path):
+    from multiprocessing import Queue
+    from sklearn.linear_model import LogisticRegression
+    from utils.model_bundle import save_bundle
+    from utils.url_features import HashingURLFeaturizer
+
+    featurizer = HashingURLFeaturizer(n_features=2 ** 12)
+    urls = ["http://paypal-login.verify.tk/account", "https://github.com/python"] * 10
+    model = LogisticRegression().fit(featurizer.transform(urls), ["malicious", "benign"] * 10)
+    save_bundle(str(tmp_path), LogisticRegression())  # Older version, never served
+    save_bundle(str(tmp_path), model, featurizer)
+
+    # An agent fed transformer embeddings refuses a model trained on hashed URLs
+    agent = ClassificationAgent(Queue(), Queue())
+    agent.model_path = str(tmp_path)
+    assert not agent.load_latest_model()
+    assert not agent.is_trained and agent.featurizer is None
+
+    # ... and so does one hashing URLs into a different number of columns
+    agent.featurizer = HashingURLFeaturizer(n_features=2 ** 13)
+    assert not agent.load_latest_model()
+
+    agent.featurizer = HashingURLFeaturizer(n_features=2 ** 12)
+    assert agent.load_latest_model()
+    assert agent.is_trained and agent.model_version == (2, 0)
+    assert list(agent.classify(agent.featurizer.transform(urls[:2]))) == ["malicious", "benign"]
+
+    agent.model_path = str(tmp_path / "empty")
+    assert not agent.load_latest_model()
+
+def test_hot_reload_swaps_between_batches(tmp_path):
+    import time
+    from multiprocessing import Queue
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.svm import LinearSVC
+    from utils.model_bundle import save_bundle
+    from utils.url_features import HashingURLFeaturizer
+
+    featurizer = HashingURLFeaturizer(n_features=2 ** 12)
+    urls = ["http://paypal-login.verify.tk/account", "https://github.com/python"] * 10
+    X = featurizer.transform(urls)
+    save_bundle(str(tmp_path), LogisticRegression().fit(X, ["malicious", "benign"] * 10), featurizer)
+
+    output_queue = Queue()
+    agent = ClassificationAgent(Queue(), output_queue)
+    agent.model_path = str(tmp_path)
+    agent.featurizer = featurizer
+    agent.hot_reload = True
+    agent.load_latest_model()
+    batch = [{"sender": "DataCollectionAgent", "data": {"request_id": "a", "urls": urls[:2]}}]
+    agent.receive_batch(batch)
+    assert list(output_queue.get(timeout=5)["data"]["classifications"]) == ["malicious", "benign"]
+
+    # A model without predict_proba fails its warm-up and is never served
+    save_bundle(str(tmp_path), LinearSVC().fit(X, ["malicious", "benign"] * 10), featurizer)
+    assert not agent.check_for_new_model()
+    assert agent.rejected_versions == {2}
+
+    # The watcher loads version 3 in the background; it is only served once applied between batches
+    save_bundle(str(tmp_path), LogisticRegression().fit(X, ["benign", "malicious"] * 10), featurizer)
+    agent.reload_interval = 0.01
+    agent.start_model_watcher()
+    deadline = time.time() + 10
+    while agent.pending_bundle is None and time.time() < deadline:
+        time.sleep(0.01)
+    agent.reload_stop.set()
+    agent.watcher.join(timeout=5)
+    assert agent.pending_bundle.version == 3 and agent.model_version == (1, 0)
+
+    agent.apply_pending_model()
+    agent.receive_batch(batch)
+    assert list(output_queue.get(timeout=5)["data"]["classifications"]) == ["benign", "malicious"]
+
+    report = agent.version_report()
+    assert report[(1, 0)]["urls"] == 2 and report[(3, 0)]["urls"] == 2
+    assert report[(3, 0)]["urls_per_second"] > 0 and report[(3, 0)]["warmup_ms_per_url"] > 0
+
+def test_hot_reload_warms_up_on_received_features(tmp_path):
+    from multiprocessing import Queue
+    from sklearn.linear_model import LogisticRegression
+    from utils.model_bundle import save_bundle
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 6)).astype(np.float32)
+    y = np.where(X[:, 0] > 0, "malicious", "benign")
+    save_bundle(str(tmp_path), LogisticRegression().fit(X, y))
+
+    output_queue = Queue()
+    agent = ClassificationAgent(Queue(), output_queue)
+    agent.model_path = str(tmp_path)
+    agent.hot_reload = True
+    assert agent.load_latest_model()  # No traffic yet: warmed up on zeros of the model's width
+    agent.receive_batch([{"sender": "FeatureExtractionAgent", "data": {"request_id": "a", "features": X[:4]}}])
+    output_queue.get(timeout=5)
+    assert agent.warmup_features.shape == (4, 6)
+
+    # A model for narrower embeddings could never score this agent's batches
+    save_bundle(str(tmp_path), LogisticRegression().fit(X[:, :4], y))
+    assert not agent.check_for_new_model()
+    assert agent.rejected_versions == {2}
+
+    save_bundle(str(tmp_path), LogisticRegression(C=0.1).fit(X, y))
+    assert agent.check_for_new_model()
+    assert agent.pending_bundle.version == 3
+
+def test_online_updates_are_versioned_per_bundle(tmp_path):
+    from multiprocessing import Queue
+    from sklearn.linear_model import SGDClassifier
+    from utils.model_bundle import save_bundle
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(64, 4)).astype(np.float32)
+    y = np.where(X[:, 0] > 0, "malicious", "benign")
+    save_bundle(str(tmp_path), SGDClassifier(loss="log_loss").fit(X, y))
+
+    agent = ClassificationAgent(Queue(), Queue())
+    agent.model_path = str(tmp_path)
+    agent.load_latest_model()
+    agent.update_model(X, y)
+    agent.classify(X)
+    assert agent.model_version == (1, 1)
+
+    # The next bundle starts its own stats instead of merging into the online update's
+    save_bundle(str(tmp_path), SGDClassifier(loss="log_loss").fit(X, y))
+    agent.load_latest_model()
+    agent.classify(X)
+    report = agent.version_report()
+    assert agent.model_version == (2, 0)
+    assert report[(1, 1)]["urls"] == 64 and report[(2, 0)]["urls"] == 64
+
+def test_cascade_serves_stage1_model_from_bundle(tmp_path):
+    from multiprocessing import Queue
+    from sklearn.linear_model import LogisticRegression
+    from utils.model_bundle import save_bundle
+
+    extractor = RecordingExtractor()
+    agent = ClassificationAgent(Queue(), Queue(), feature_extractor=extractor)
+    agent.cascade_enabled = True
+    agent.model_path = str(tmp_path)
+
+    # Untrained, like classify(): everything is benign rather than every URL sitting at 0.5
+    labels, probabilities = agent.classify_cascade(["http://a.io", "http://example.com/login"])
+    assert list(labels) == ["benign", "benign"] and not probabilities.any()
+
+    urls = ["http://a.io", "http://" + "x" * 60 + ".com/login/verify/account"] * 10
+    stage1_model = LogisticRegression().fit(agent.lexical_extractor.transform(urls), ["benign", "malicious"] * 10)
+    save_bundle(str(tmp_path), LogisticRegression().fit([[0.0], [1.0]] * 5, ["benign", "malicious"] * 5),
+                stage1_model=stage1_model)
+    assert agent.load_latest_model()
+    assert agent.stage1_trained and agent.stage1_model.n_features_in_ == len(agent.lexical_extractor.feature_names)
+    labels, _ = agent.classify_cascade(urls[:2])
+    assert list(labels) == ["benign", "malicious"]
@@ -0,0 +1,78 @@
+# tests/test_coordination_hub.py
+
+import queue
+import pytest
+from core.coordination_hub import CoordinationHub, MessageBus
+
+@pytest.fixture
+def bus():
+    bus = MessageBus()
+    bus.add_stage("feature_extraction", maxsize=2)
+    bus.add_stage("classification")
+    bus.add_stage("response")
+    return bus
+
+def test_routes_by_message_type(bus):
+    bus.put({"sender": "DataCollectionAgent", "data": {"urls": ["http://a.com"]}})
+    bus.put({"sender": "FeatureExtractionAgent", "data": {"urls": ["http://a.com"], "features": [[0.1]]}})
+    bus.put({"sender": "ClassificationAgent", "data": {"urls": ["http://a.com"], "classifications": ["benign"]}})
+
+    assert bus.queue("feature_extraction").get(timeout=1)["sender"] == "DataCollectionAgent"
+    assert bus.queue("classification").get(timeout=1)["sender"] == "FeatureExtractionAgent"
+    assert bus.queue("response").get(timeout=1)["sender"] == "ClassificationAgent"
+
+def test_full_stage_applies_backpressure(bus):
+    message = {"sender": "DataCollectionAgent", "data": {"urls": ["http://a.com"]}}
+    bus.put(message)
+    bus.put(message)
+    with pytest.raises(queue.Full):
+        bus.put(message, timeout=0.1)
+
+def test_unrouted_message_is_dropped(bus):
+    bus.put({"sender": "Somebody", "data": {"status": "ok"}})
+    for stage in bus.queues:
+        assert bus.queue(stage).empty()
+
+def test_hub_routes_override():
+    hub = CoordinationHub({"urls": "classification"})
+    hub.bus.add_stage("classification")
+    hub.bus.put({"sender": "DataCollectionAgent", "data": {"urls": []}})
+    assert hub.bus.queue("classification").get(timeout=1)["data"] == {"urls": []}
+
+def test_launch_stage_replicas_share_queue():
+    from agents.feature_extraction_agent import FeatureExtractionAgent
+
+    hub = CoordinationHub()
+    results = hub.bus.add_stage("classification")
+    agents = hub.launch_stage("feature_extraction", FeatureExtractionAgent, replicas=2, models={})
+    for agent in agents:
+        agent.mode = "lexical"
+
+    assert [agent.name for agent in agents] == ["FeatureExtractionAgent-0", "FeatureExtractionAgent-1"]
+    assert all(agent.input_queue is hub.bus.queue("feature_extraction") for agent in agents)
+
+    hub.start()
+    try:
+        for index in range(4):
+            hub.bus.put({"sender": "Test", "data": {"request_id": f"r{index}", "urls": ["http://a.com"] * (index + 1)}})
+        outputs = {}
+        for _ in range(4):
+            data = results.get(timeout=30)["data"]
+            outputs[data["request_id"]] = data
+    finally:
+        hub.stop()
+
+    assert sorted(outputs) == ["r0", "r1", "r2", "r3"]
+    assert all(len(outputs[f"r{index}"]["features"]) == index + 1 for index in range(4))
+
+def test_restart_agent_keeps_launch_arguments():
+    from agents.classification_agent import ClassificationAgent
+
+    hub = CoordinationHub()
+    transport = object()  # Stands in for the SharedArrayRing
+    agents = hub.launch_stage("classification", ClassificationAgent, replicas=2, transport=transport)
+
+    restarted = hub.restart_agent(agents[1].name)
+    assert restarted.name == "ClassificationAgent-1"
+    assert restarted.transport is transport
+    assert restarted.input_queue is hub.bus.queue("classification")
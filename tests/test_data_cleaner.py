@@ -0,0 +1,75 @@
+# tests/test_data_cleaner.py
+
+import logging
+import pytest
+import pandas as pd
+from utils.data_cleaner import clean_urls, clean_url_series, clean_csv_stream, clean_data, validate_url
+
+def test_clean_urls():
+    urls = [" HTTP://Example.com/path?id=1 ", "not a url", "ftp://10.0.0.1/file", "https://login.bank.tk/verify!"]
+    assert clean_urls(urls) == ["http://example.com/pathid1", "ftp://10.0.0.1/file", "https://login.bank.tk/verify"]
+    assert validate_url("http://localhost:8080/")
+    assert not validate_url("example.com")
+
+def test_invalid_urls_reported_once(caplog):
+    urls = pd.Series(["http://example.com"] + [f"bad url {i}" for i in range(100)] + [None])
+    with caplog.at_level(logging.WARNING, logger="DataCleaner"):
+        cleaned = clean_urls(urls)
+    assert cleaned == ["http://example.com"]
+    warnings = [record for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "101 invalid URLs out of 102" in warnings[0].getMessage()
+
+def test_clean_url_series_keeps_index():
+    cleaned, report = clean_url_series(pd.Series(["bad", "HTTP://A.COM", "http://b.org"], index=[10, 20, 30]))
+    assert cleaned.to_dict() == {20: "http://a.com", 30: "http://b.org"}
+    assert report == {"total": 3, "invalid": 1, "sample": ["bad"]}
+
+def test_clean_data_drops_invalid_rows(tmp_path):
+    raw = tmp_path / "raw.csv"
+    pd.DataFrame({"url": ["http://a.com", "bad", "HTTP://B.COM"], "label": ["benign", "malicious", "malicious"]}).to_csv(raw, index=False)
+    clean_data(str(raw), str(tmp_path / "clean.csv"))
+    cleaned = pd.read_csv(tmp_path / "clean.csv")
+    assert cleaned.to_dict("list") == {"url": ["http://a.com", "http://b.com"], "label": ["benign", "malicious"]}
+
+@pytest.mark.parametrize("dedupe", ["bloom", "exact"])
+def test_clean_csv_stream_dedupes_across_chunks(tmp_path, dedupe):
+    raw = tmp_path / "raw.csv"
+    urls = [f"http://site{i % 7}.com/page" for i in range(40)] + ["bad url"] * 3 + ["HTTP://SITE0.COM/page"]
+    pd.DataFrame({"url": urls, "label": ["malicious"] * len(urls)}).to_csv(raw, index=False)
+
+    stats = clean_csv_stream(str(raw), str(tmp_path / "clean.csv"), chunk_size=5, dedupe=dedupe, capacity=1000)
+    cleaned = pd.read_csv(tmp_path / "clean.csv")
+
+    assert cleaned["url"].tolist() == [f"http://site{i}.com/page" for i in range(7)]
+    assert stats["rows_in"] == 44 and stats["rows_out"] == 7
+    assert stats["invalid_urls"] == 3 and stats["duplicates"] == 34
+    assert stats["chunks"] == 9
+    if dedupe == "bloom":
+        assert stats["filter_dropped"] == 34  # No chunk repeats a row within itself
+
+def test_clean_csv_stream_bloom_sizing_and_capacity_warning(tmp_path, caplog):
+    raw = tmp_path / "raw.csv"
+    pd.DataFrame({"url": [f"http://site{i}.com/" for i in range(50)]}).to_csv(raw, index=False)
+    with caplog.at_level(logging.INFO):
+        clean_csv_stream(str(raw), str(tmp_path / "clean.csv"), chunk_size=10, dedupe="bloom")
+    assert "Created Bloom filter for 50 items" in caplog.text
+    assert "passed its capacity" not in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="DataCleaner"):
+        stats = clean_csv_stream(str(raw), str(tmp_path / "clean.csv"), chunk_size=10, dedupe="bloom", capacity=20)
+    assert len([record for record in caplog.records if "passed its capacity of 20 rows" in record.getMessage()]) == 1
+    assert stats["rows_out"] + stats["filter_dropped"] == 50
+
+def test_clean_csv_stream_mixed_dtypes_and_empty_input(tmp_path):
+    # The label column reads as integers in the first chunk and as strings in the second
+    raw = tmp_path / "raw.csv"
+    raw.write_text("url,label\nhttp://a.com,1\nhttp://b.com,1\nhttp://a.com,1\nhttp://c.com,x\n")
+    stats = clean_csv_stream(str(raw), str(tmp_path / "clean.csv"), chunk_size=2, dedupe="exact")
+    assert stats["rows_out"] == 3 and stats["duplicates"] == 1
+
+    raw.write_text("url,label\n")
+    stats = clean_csv_stream(str(raw), str(tmp_path / "clean.csv"))
+    assert stats["rows_out"] == 0
+    assert pd.read_csv(tmp_path / "clean.csv").columns.tolist() == ["url", "label"]
@@ -20,3 +20,216 @@ def test_collect_urls(data_collection_agent):
     urls = data_collection_agent.collect_urls()
     assert isinstance(urls, list)
     assert all(isinstance(url, str) for url in urls)
+
+@pytest.fixture
+def feed_server():
+    """
+    Local HTTP stand-in for the feeds: /fast answers at once, /slow stalls for 2s,
+    /flaky fails with 503 on its first request and /missing is always a 404.
+    """
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            if self.path == "/slow":
+                time.sleep(2)
+            if self.path == "/flaky" and requests_seen.count("/flaky") == 1 or self.path == "/missing":
+                self.send_response(503 if self.path == "/flaky" else 404)
+                self.end_headers()
+                return
+            body = (b"url,phish_id\nhttp://phish.example/a,1\nhttp://phish.example/b,2\n" if self.path == "/flaky"
+                    else b"http://fast.example/1\nhttp://fast.example/2\n")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client timed out first
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests_seen
+    server.shutdown()
+
+def test_concurrent_collection_streams_results(feed_server, tmp_path, monkeypatch):
+    import time
+    from multiprocessing import Queue
+
+    base, requests_seen = feed_server
+    monkeypatch.chdir(tmp_path)
+    agent = DataCollectionAgent(Queue(), Queue())
+    agent.sources = {
+        "openphish": {"url": f"{base}/fast", "timeout": 5, "retries": 0},
+        "phishtank": {"url": f"{base}/flaky", "timeout": 5, "retries": 2, "backoff": 0.01},
+        "phishing_database": {"url": f"{base}/slow", "timeout": 0.3, "retries": 1, "backoff": 0.01},
+        "twitter": {"enabled": False}, "email": {"enabled": False}, "dark_web": {"enabled": False},
+    }
+
+    start = time.monotonic()
+    results = list(agent.collect_urls_streaming())
+    elapsed = time.monotonic() - start
+
+    # The hung source times out (twice, with one retry) without holding up the others
+    assert [source for source, _ in results][-1] == "phishing_database"
+    assert dict(results) == {"openphish": ["http://fast.example/1", "http://fast.example/2"],
+                             "phishtank": ["http://phish.example/a", "http://phish.example/b"],
+                             "phishing_database": []}
+    assert requests_seen.count("/flaky") == 2 and requests_seen.count("/slow") == 2
+    assert elapsed < 1.5
+
+def test_fetch_with_retry_returns_final_errors(feed_server):
+    from utils.feed_fetcher import fetch_with_retry, make_session
+
+    base, requests_seen = feed_server
+    response = fetch_with_retry(make_session(), f"{base}/missing", timeout=5, retries=3, backoff=0.01)
+    assert response.status_code == 404 and requests_seen.count("/missing") == 1  # Not retryable
+
+def test_cycle_deadline_abandons_hung_sources():
+    import threading
+    from utils.feed_fetcher import fetch_concurrently
+
+    release = threading.Event()
+    collectors = {"fast": lambda: ["http://fast.example/"], "hung": lambda: release.wait(10) and []}
+    results = list(fetch_concurrently(collectors, deadline=0.5))
+    release.set()
+    assert [(source, urls) for source, urls, _ in results] == [("fast", ["http://fast.example/"])]
+
+def test_incremental_fetching(tmp_path, monkeypatch):
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from multiprocessing import Queue
+
+    feed = {"body": b"http://phish.example/a\nhttp://phish.example/b\n", "etag": '"v1"'}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/etag" and self.headers.get("If-None-Match") == feed["etag"]:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if self.path == "/etag":
+                self.send_header("ETag", feed["etag"])
+            self.send_header("Content-Length", str(len(feed["body"])))
+            self.end_headers()
+            self.wfile.write(feed["body"])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.chdir(tmp_path)
+    agent = DataCollectionAgent(Queue(), Queue())
+    agent.sources = {"openphish": {"url": f"{base}/etag", "retries": 0},  # Sends an ETag
+                     "phishing_database": {"url": f"{base}/plain", "retries": 0}}  # No validators
+
+    try:
+        # Until the URLs are handed on (e.g. the fetch was abandoned at the cycle deadline), nothing is committed
+        assert agent.fetch_feed("openphish", str.splitlines) == ["http://phish.example/a", "http://phish.example/b"]
+        assert agent.feed_state.validators("openphish") == {}
+
+        for source in ("openphish", "phishing_database"):
+            assert agent.fetch_feed(source, str.splitlines) == ["http://phish.example/a", "http://phish.example/b"]
+            assert agent.fetch_stats[source]["new"] == 2 and agent.fetch_stats[source]["bytes"] > 0
+            agent.commit_feed_state(source)
+
+            # Unchanged: a 304 without a body, or an identical body that is not parsed again
+            assert agent.fetch_feed(source, str.splitlines) == []
+        assert agent.fetch_stats["openphish"] == {"status": 304, "bytes": 0, "urls": 0, "new": 0, "seen": 0}
+        assert agent.fetch_stats["phishing_database"]["urls"] == 0
+
+        feed.update(body=b"http://phish.example/b\nhttp://phish.example/c\n", etag='"v2"')
+        for source in ("openphish", "phishing_database"):
+            assert agent.fetch_feed(source, str.splitlines) == ["http://phish.example/c"]
+            assert agent.fetch_stats[source] == dict(agent.fetch_stats[source], urls=2, new=1, seen=1)
+            agent.commit_feed_state(source)
+
+        # Collection cycles commit a source's state once its URLs have been taken
+        feed.update(body=b"http://phish.example/d\n", etag='"v3"')
+        for source, urls in agent.collect_urls_streaming(["openphish"]):
+            assert urls == ["http://phish.example/d"]
+            assert agent.feed_state.conditional_headers(source) == {"If-None-Match": '"v2"'}
+
+        # State survives a restart
+        assert DataCollectionAgent(Queue(), Queue()).feed_state.conditional_headers("openphish") == {"If-None-Match": '"v3"'}
+    finally:
+        server.shutdown()
+
+def test_run_polls_due_sources_and_stops_promptly(feed_server, tmp_path, monkeypatch):
+    import threading
+    import time
+    from multiprocessing import Queue
+    from utils.scheduler import AdaptiveScheduler
+
+    base, _ = feed_server
+    monkeypatch.chdir(tmp_path)
+    output_queue = Queue()
+    agent = DataCollectionAgent(Queue(), output_queue)
+    agent.sources = {"openphish": {"url": f"{base}/fast", "retries": 0}}
+    agent.scheduler = AdaptiveScheduler({"openphish": 60}, min_interval=60, max_interval=3600)
+
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    message = output_queue.get(timeout=10)
+    assert message["data"]["urls"] == ["http://fast.example/1", "http://fast.example/2"]
+
+    schedule = agent.schedule()["openphish"]
+    assert schedule["polls"] == 1 and schedule["last_new"] == 2
+    assert schedule["next_poll"] > time.time() + 20  # About 60s ahead, jittered
+
+    start = time.monotonic()
+    agent.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive() and time.monotonic() - start < 2
+
+def test_collect_from_emails_incrementally(tmp_path, monkeypatch):
+    from multiprocessing import Queue
+    from imap_stand_in import ImapStandIn, make_message
+
+    server = ImapStandIn({uid: make_message(uid, n_links=2) for uid in range(1, 4)}).start()
+    monkeypatch.chdir(tmp_path)
+    agent = DataCollectionAgent(Queue(), Queue())
+    agent.sources = {"email": {"host": "127.0.0.1", "port": server.port, "use_ssl": False, "user": "user",
+                               "password": "password", "state_path": "data/feed_state/email.json"}}
+    try:
+        assert len(agent.collect_from_emails()) == 6
+        server.mailbox[4] = make_message(4, n_links=2)
+        assert agent.collect_from_emails() == ["http://link4-0.example/path?id=0&ref=mail",
+                                               "http://link4-1.example/path?id=1&ref=mail"]
+        assert server.connections == 1
+    finally:
+        agent.mail_fetcher.close()
+        server.stop()
+
+def test_urls_are_marked_seen_only_after_sending(tmp_path, monkeypatch):
+    from multiprocessing import Queue
+
+    monkeypatch.chdir(tmp_path)
+    outputs = Queue()
+    agent = DataCollectionAgent(Queue(), outputs)
+    agent.seen_config = {"path": str(tmp_path / "seen.sqlite"), "capacity": 1000}
+    monkeypatch.setattr(agent, "get_collectors", lambda: {"openphish": lambda: ["http://phish.example/a"]})
+
+    send_urls = agent.send_urls
+    monkeypatch.setattr(agent, "send_urls", lambda urls: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        agent.collect_cycle()
+    assert len(agent.seen_index) == 0
+
+    # The URL was never handed on, so the next cycle sends it
+    monkeypatch.setattr(agent, "send_urls", send_urls)
+    agent.collect_cycle()
+    assert outputs.get(timeout=1)["data"]["urls"] == ["http://phish.example/a"]
+    assert len(agent.seen_index) == 1
@@ -0,0 +1,64 @@
+# tests/test_embedding_cache.py
+
+import pytest
+import numpy as np
+from utils.embedding_cache import EmbeddingCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path), "bert@v1", memory_entries=2, shard_rows=3)
+
+def test_lookup_miss_then_hit(cache, tmp_path):
+    urls = ["http://a.com", "http://b.com"]
+    assert cache.lookup(urls) == [None, None]
+    assert not list(tmp_path.iterdir())  # Nothing is created on disk before the first store
+
+    features = np.array([[1, 2], [3, 4]], dtype=np.float32)
+    cache.store(urls, features)
+    vectors = cache.lookup(urls)
+
+    np.testing.assert_array_equal(np.vstack(vectors), features)
+    assert cache.stats()["hits_memory"] == 2
+    assert cache.stats()["misses"] == 2
+
+def test_disk_tier_survives_restart(cache, tmp_path):
+    urls = [f"http://site{i}.com" for i in range(5)]
+    features = np.arange(10, dtype=np.float32).reshape(5, 2)
+    cache.store(urls, features)
+
+    reopened = EmbeddingCache(str(tmp_path), "bert@v1", memory_entries=2, shard_rows=3)
+    vectors = reopened.lookup(urls[::-1])
+
+    np.testing.assert_array_equal(np.vstack(vectors), features[::-1])
+    assert reopened.stats()["hits_disk"] == 5
+    assert reopened.stats()["hit_rate"] == 1.0
+
+def test_lru_evicts_oldest(cache):
+    urls = ["http://a.com", "http://b.com", "http://c.com"]
+    cache.store(urls, np.eye(3, dtype=np.float32))
+    assert len(cache.memory) == 2
+
+    cache.lookup(["http://a.com"])
+    assert cache.stats()["hits_disk"] == 1
+
+def test_namespace_isolation(cache, tmp_path):
+    cache.store(["http://a.com"], np.ones((1, 2), dtype=np.float32))
+    other = EmbeddingCache(str(tmp_path), "bert@v2")
+    assert other.lookup(["http://a.com"]) == [None]
+
+def test_disk_tier_evicts_oldest_shard(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "bert@v1", memory_entries=1, shard_rows=2, max_shards=2)
+    urls = [f"http://site{i}.com" for i in range(6)]
+    for url, vector in zip(urls, np.arange(12, dtype=np.float32).reshape(6, 2)):
+        cache.store([url], vector[np.newaxis])
+
+    assert len(cache.index) == 4 and len(cache.shard_paths) == 2
+    assert len(list(tmp_path.glob("*/*.f32"))) == 2
+    assert cache.lookup(urls[:2]) == [None, None]
+    np.testing.assert_array_equal(cache.lookup(urls[2:3])[0], [4, 5])
+
+    # A process that still indexes a shard deleted by another one counts its rows as misses
+    reopened = EmbeddingCache(str(tmp_path), "bert@v1", memory_entries=1, shard_rows=2, max_shards=2)
+    cache.store(urls[:1], np.zeros((1, 2), dtype=np.float32))
+    assert reopened.lookup(urls[2:4]) == [None, None]
+    assert len(reopened.index) == 2
@@ -1,9 +1,16 @@
 # tests/test_feature_extraction.py
 
 import pytest
+import numpy as np
 from agents.feature_extraction_agent import FeatureExtractionAgent
 from core.coordination_hub import CoordinationHub
 
+@pytest.fixture(autouse=True)
+def cache_directory(monkeypatch, tmp_path):
+    # Agents built with models get an embedding cache; keep it out of the working tree
+    import agents.feature_extraction_agent as module
+    monkeypatch.setitem(module.FEATURE_EXTRACTION_AGENT_CONFIG["cache"], "directory", str(tmp_path / "embedding_cache"))
+
 @pytest.fixture
 def coordination_hub():
     return CoordinationHub()
@@ -19,5 +26,157 @@ def test_feature_extraction_initialization(feature_extraction_agent):
 def test_extract_features(feature_extraction_agent):
     urls = ["http://example.com", "https://test.com"]
     features = feature_extraction_agent.extract_features(urls)
-    assert isinstance(features, list)
-    assert len(features) == len(urls)
+    assert isinstance(features, np.ndarray)
+    assert features.dtype == np.float32
+    assert features.shape[0] == len(urls)
+
+TINY_MAX_LENGTH = 32  # Position limit of the tiny models, so truncation can be checked
+
+@pytest.fixture
+def tiny_models(tmp_path):
+    # Small randomly initialised BERT so batching can be checked without downloading weights
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast, pipeline
+
+    chars = list("abcdefghijklmnopqrstuvwxyz0123456789:/.-_?=&")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + chars + ["##" + c for c in chars]
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab))
+
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                        intermediate_size=32, max_position_embeddings=TINY_MAX_LENGTH)
+    model = BertModel(config).eval()
+    tokenizer = BertTokenizerFast(vocab_file=str(vocab_file), model_max_length=TINY_MAX_LENGTH)
+    return {"bert": pipeline("feature-extraction", model=model, tokenizer=tokenizer)}
+
+@pytest.fixture
+def tiny_ensemble(tiny_models, tmp_path):
+    # Adds a tiny XLNet that pads on the left and is pooled from its last token, like the real one
+    import torch
+    from transformers import BertTokenizerFast, XLNetConfig, XLNetModel, pipeline
+
+    tokenizer = BertTokenizerFast(vocab_file=str(tmp_path / "vocab.txt"), model_max_length=TINY_MAX_LENGTH,
+                                  padding_side="left")
+    torch.manual_seed(0)
+    config = XLNetConfig(vocab_size=tokenizer.vocab_size, d_model=16, n_layer=1, n_head=2, d_inner=32, pad_token_id=0)
+    model = XLNetModel(config).eval()
+    return {**tiny_models, "xlnet": pipeline("feature-extraction", model=model, tokenizer=tokenizer)}
+
+@pytest.mark.parametrize("pooling", ["mean", "cls"])
+def test_batched_matches_per_url(tiny_ensemble, pooling):
+    from multiprocessing import Queue
+
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=tiny_ensemble)
+    agent.cache = None
+    agent.pooling = pooling
+    agent.ensemble = "concat"
+    urls = ["http://example.com", "https://test.com/a/much/longer/path?q=1", "http://a.io", "https://b.org/x",
+            "https://over.length.example.com/" + "segment/" * 10]  # Longer than TINY_MAX_LENGTH tokens
+
+    agent.batched = False
+    per_url = agent.extract_features(urls)
+    agent.batched = True
+    batched = agent.extract_features(urls, batch_size=3)
+
+    assert batched.shape == (len(urls), 32)
+    np.testing.assert_allclose(batched, per_url, atol=1e-5)
+
+@pytest.mark.parametrize("strategy", ["mean", "max", "cls"])
+def test_pool_hidden_states_ignores_padding(strategy):
+    from agents.feature_extraction_agent import pool_hidden_states
+
+    hidden_states = np.arange(24, dtype=np.float32).reshape(2, 3, 4)
+    mask = np.array([[True, True, True], [True, True, False]])
+    pooled = pool_hidden_states(hidden_states, mask, strategy)
+
+    expected = {
+        "mean": [hidden_states[0].mean(axis=0), hidden_states[1, :2].mean(axis=0)],
+        "max": [hidden_states[0].max(axis=0), hidden_states[1, :2].max(axis=0)],
+        "cls": [hidden_states[0, 0], hidden_states[1, 0]],
+    }[strategy]
+    assert pooled.dtype == np.float32
+    np.testing.assert_allclose(pooled, expected)
+
+def test_cached_features_skip_inference(tiny_models, tmp_path):
+    from multiprocessing import Queue
+    from utils.embedding_cache import EmbeddingCache
+
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=tiny_models)
+    agent.cache = EmbeddingCache(str(tmp_path), agent.model_fingerprint())
+    urls = ["http://example.com", "http://a.io", "http://example.com"]
+
+    first = agent.extract_features(urls)
+    agent.models = {}  # Any further inference would now fail
+    second = agent.extract_features(urls[::-1])
+
+    np.testing.assert_allclose(second, first[::-1])
+    assert agent.cache.stats()["hits_memory"] == 3
+
+def test_fingerprint_names_the_backend_that_computes_embeddings(tiny_models):
+    from multiprocessing import Queue
+
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=tiny_models)
+    pytorch = agent.model_fingerprint()
+    agent.backend = "onnx"
+    agent.onnx_config = {"quantize": True}
+    assert "onnx-int8" in agent.model_fingerprint()
+    agent.batched = False  # The per-URL path runs the PyTorch pipelines
+    assert agent.model_fingerprint() == pytorch
+
+def test_hybrid_mode_prepends_lexical_features(tiny_models):
+    from multiprocessing import Queue
+
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=tiny_models)
+    agent.cache = None
+    urls = ["http://example.com", "http://a.io/login"]
+
+    agent.mode = "hybrid"
+    hybrid = agent.extract_features(urls)
+    agent.mode = "lexical"
+    lexical = agent.extract_features(urls)
+
+    assert hybrid.shape == (2, lexical.shape[1] + 16)
+    np.testing.assert_array_equal(hybrid[:, :lexical.shape[1]], lexical)
+
+def test_models_load_lazily(monkeypatch, tiny_models):
+    from multiprocessing import Queue
+    import agents.feature_extraction_agent as module
+
+    calls = []
+    monkeypatch.setattr(module, "load_feature_models", lambda names=None: calls.append(names) or tiny_models)
+    monkeypatch.setitem(module.FEATURE_EXTRACTION_AGENT_CONFIG["cache"], "enabled", False)
+    agent = FeatureExtractionAgent(Queue(), Queue())
+    assert agent.models is None and calls == []
+
+    agent.mode = "transformer"
+    features = agent.extract_features(["http://example.com"])
+    assert len(calls) == 1
+    assert features.shape == (1, 16)
+
+def test_share_model_weights(tiny_models):
+    from agents.feature_extraction_agent import share_model_weights
+
+    share_model_weights(tiny_models)
+    assert all(parameter.is_shared() for parameter in tiny_models["bert"].model.parameters())
+
+@pytest.mark.parametrize("quantize,min_cosine", [(False, 0.9999), (True, 0.99)])
+def test_onnx_backend_matches_pytorch(tiny_models, tmp_path, quantize, min_cosine):
+    pytest.importorskip("onnxruntime")
+    from multiprocessing import Queue
+
+    agent = FeatureExtractionAgent(Queue(), Queue(), models=tiny_models)
+    agent.cache = None
+    urls = ["http://example.com", "https://test.com/a/much/longer/path?q=1", "http://a.io"]
+    reference = agent.extract_features(urls)
+
+    agent.backend = "onnx"
+    agent.onnx_config = {"export_dir": str(tmp_path / "onnx"), "quantize": quantize}
+    features = agent.extract_features(urls)
+
+    assert features.shape == reference.shape
+    cosine = (features * reference).sum(axis=1) / (np.linalg.norm(features, axis=1) * np.linalg.norm(reference, axis=1))
+    assert cosine.min() > min_cosine
+    # The exported encoder is reused, and the PyTorch model is left untouched
+    assert not tiny_models["bert"].model.training
+    assert len(list((tmp_path / "onnx").iterdir())) == 1
@@ -0,0 +1,92 @@
+# tests/test_mail_fetcher.py
+
+import imaplib
+import socket
+import pytest
+from imap_stand_in import ImapStandIn, make_message
+from utils.mail_fetcher import IncrementalMailFetcher, extract_links, parse_fetch_response, text_parts
+
+@pytest.fixture
+def imap_server():
+    server = ImapStandIn({uid: make_message(uid, attachment_bytes=8192) for uid in range(1, 26)}).start()
+    yield server
+    server.stop()
+
+def make_fetcher(server, tmp_path, **kwargs):
+    return IncrementalMailFetcher("127.0.0.1", "user", "password", port=server.port, use_ssl=False, timeout=5,
+                                  state_path=str(tmp_path / "email.json"), **kwargs)
+
+def test_fetches_only_new_messages(imap_server, tmp_path):
+    fetcher = make_fetcher(imap_server, tmp_path, batch_size=4, initial_messages=10)
+    links = fetcher.fetch_links()
+    assert len(links) == 50 and links[0] == "http://link16-0.example/path?id=0&ref=mail"
+    assert fetcher.state["last_uid"] == 25
+    # Only the HTML parts were downloaded, never the RFC822 messages or their attachments
+    assert not [command for command in imap_server.commands if "RFC822" in command or "[3]" in command]
+    assert imap_server.body_bytes < 10 * 2000
+
+    assert fetcher.fetch_links() == []
+    imap_server.mailbox[26] = make_message(26)
+    assert fetcher.fetch_links() == [f"http://link26-{i}.example/path?id={i}&ref=mail" for i in range(5)]
+    assert imap_server.connections == 1  # One persistent connection
+    fetcher.close()
+
+    # A restart resumes after the last UID; a new UIDVALIDITY starts over
+    imap_server.mailbox[27] = make_message(27)
+    restarted = make_fetcher(imap_server, tmp_path)
+    assert len(restarted.fetch_links()) == 5
+    restarted.close()
+    imap_server.uidvalidity += 1
+    assert len(make_fetcher(imap_server, tmp_path, initial_messages=2).fetch_links()) == 10
+
+def test_reconnects_after_connection_loss(imap_server, tmp_path):
+    fetcher = make_fetcher(imap_server, tmp_path)
+    fetcher.fetch_links()
+    fetcher.connection.sock.shutdown(socket.SHUT_RDWR)  # As if the server dropped the connection
+    imap_server.mailbox[26] = make_message(26)
+    assert len(fetcher.fetch_links()) == 5
+    assert imap_server.connections == 2
+
+def test_keeps_links_of_completed_batches_when_connection_drops(imap_server, tmp_path):
+    fetcher = make_fetcher(imap_server, tmp_path, batch_size=2, initial_messages=8)
+    fetch_batch, calls = fetcher.fetch_batch, []
+
+    def drop_during_third_batch(uids):
+        calls.append(uids)
+        if len(calls) == 3:
+            fetcher.connection.sock.shutdown(socket.SHUT_RDWR)
+        return fetch_batch(uids)
+
+    fetcher.fetch_batch = drop_during_third_batch
+    links = fetcher.fetch_links()
+    assert len(links) == 40 and len(set(links)) == 40  # Two batches before the drop, the rest after reconnecting
+    assert fetcher.load_state()["last_uid"] == 25
+    assert fetcher.fetch_links() == []
+
+def test_failed_fetch_keeps_messages_for_the_next_call(imap_server, tmp_path):
+    fetcher = make_fetcher(imap_server, tmp_path, batch_size=2, initial_messages=8)
+    imap_server.failing_uids = {23}  # The third batch gets a NO
+    with pytest.raises(imaplib.IMAP4.error):
+        fetcher.fetch_links()
+    assert fetcher.state["last_uid"] is None and fetcher.load_state()["last_uid"] is None
+
+    imap_server.failing_uids = set()
+    assert len(fetcher.fetch_links()) == 40
+    assert fetcher.load_state()["last_uid"] == 25
+
+def test_parse_fetch_response_and_text_parts():
+    data = [(b'1 (UID 7 BODYSTRUCTURE (("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 10 1)'
+             b'(("text" "html" ("charset" "iso-8859-1") NIL NIL "quoted-printable" 20 1)'
+             b'("application" "pdf" ("name" {5}', b'a.pdf'),
+            b') NIL NIL "base64" 4000) "mixed") "alternative" ("boundary" "x") NIL NIL))']
+    message = parse_fetch_response(data)[0]
+    assert message["UID"] == "7"
+    assert list(text_parts(message["BODYSTRUCTURE"])) == [("1", "plain", "7bit", "utf-8", 10),
+                                                          ("2.1", "html", "quoted-printable", "iso-8859-1", 20)]
+
+def test_extract_links():
+    text = """<p><A HREF="http://a.example/?x=1&amp;y=2">a</A> <a class='c' href='http://b.example/'>b</a>
+              <a href=http://c.example/path>c</a> <area href="http://ignored.example/"></p>"""
+    assert extract_links(text) == ["http://a.example/?x=1&y=2", "http://b.example/", "http://c.example/path"]
+    assert extract_links("see https://d.example/x, or (http://e.example/y)", "plain") == \
+        ["https://d.example/x,", "http://e.example/y"]
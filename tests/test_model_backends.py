@@ -0,0 +1,38 @@
+# tests/test_model_backends.py
+
+import pytest
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+from utils.model_backends import MODEL_BACKENDS, build_model, train_and_profile
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 8)).astype(np.float32)
+    y = np.where(X[:, 0] + X[:, 1] > 0, "malicious", "benign")
+    return X, y
+
+@pytest.mark.parametrize("name", MODEL_BACKENDS)
+def test_train_and_profile(data, name):
+    X, y = data
+    model, profile = train_and_profile(name, X[:300], y[:300], X[300:])
+    assert model.score(X[300:], y[300:]) > 0.8
+    assert profile["train_seconds"] > 0
+    assert profile["predict_ms_per_1k"] > 0
+    assert profile["model_bytes"] > 0
+
+def test_hist_gradient_boosting_on_sparse_input(data):
+    X, y = data
+    model = build_model("hist_gradient_boosting", sparse=True, n_features=X.shape[1])
+    model.fit(sp.csr_matrix(X), y)
+    assert model.predict(sp.csr_matrix(X[:5])).shape == (5,)
+
+def test_wide_sparse_input_skips_svd():
+    # Hashed n-grams have 2**20 columns; an SVD projection of that width would be gigabytes
+    assert isinstance(build_model("hist_gradient_boosting", sparse=True, n_features=2 ** 20), LogisticRegression)
+    assert isinstance(build_model("hist_gradient_boosting", sparse=True), LogisticRegression)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        build_model("random_forest")
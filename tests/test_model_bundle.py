@@ -0,0 +1,42 @@
+# tests/test_model_bundle.py
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from utils.model_bundle import latest_bundle_path, latest_version, load_bundle, save_bundle
+
+URLS = ["http://example.com/login", "https://bank-secure-update.xyz/verify", "https://github.com/repo",
+        "http://paypal.account-check.ru/signin"] * 10
+LABELS = np.array(["benign", "malicious", "benign", "malicious"] * 10)
+
+@pytest.fixture
+def trained():
+    vectorizer = TfidfVectorizer(dtype=np.float32)
+    model = LogisticRegression().fit(vectorizer.fit_transform(URLS), LABELS)
+    return model, vectorizer
+
+def test_round_trip(tmp_path, trained):
+    model, vectorizer = trained
+    path = save_bundle(str(tmp_path), model, vectorizer, {"0": "benign", "1": "malicious"}, {"model_backend": "logistic_regression"})
+    bundle = load_bundle(path)
+
+    assert bundle.version == 1
+    assert bundle.metadata["model_backend"] == "logistic_regression"
+    assert bundle.label_map == {"0": "benign", "1": "malicious"}
+    assert bundle.model_input == {"featurizer": "tfidf", "n_features": len(vectorizer.vocabulary_), "ngram_range": [1, 1]}
+    assert isinstance(bundle.model.coef_, np.memmap)  # Arrays are mapped, not read into memory
+    assert list(bundle.model.predict(bundle.featurizer.transform(URLS))) == list(model.predict(vectorizer.transform(URLS)))
+
+def test_versions_increment(tmp_path, trained):
+    model, _ = trained
+    assert latest_bundle_path(str(tmp_path)) is None
+    save_bundle(str(tmp_path), model)
+    path = save_bundle(str(tmp_path), model)
+
+    assert latest_version(str(tmp_path)) == 2
+    assert latest_bundle_path(str(tmp_path)) == path
+    bundle = load_bundle(path, mmap_mode=None)
+    assert bundle.featurizer is None
+    assert bundle.model_input["featurizer"] == "embeddings"
+    assert not [name for name in (tmp_path).iterdir() if name.name.startswith(".staging")]
@@ -0,0 +1,43 @@
+# tests/test_response_agent.py
+
+import logging
+import numpy as np
+from multiprocessing import Queue
+from agents.response_agent import ResponseAgent
+
+def test_take_action_prioritizes_by_score(caplog):
+    agent = ResponseAgent(Queue(), Queue())
+    agent.min_score = 0.2
+    message = {"urls": ["http://a.com", "http://b.tk", "http://c.ml"],
+               "classifications": ["benign", "malicious", "malicious"],
+               "scores": np.array([0.05, 0.7, 0.95], dtype=np.float32)}
+    with caplog.at_level(logging.INFO, logger="ResponseAgent"):
+        agent.receive_message("ClassificationAgent", message)
+
+    messages = [record.getMessage() for record in caplog.records]
+    blocked = [text for text in messages if text.startswith("Blocked URL")]
+    assert [text.split()[2] for text in blocked] == ["http://c.ml", "http://b.tk"]
+    assert "Skipped 1 benign URLs scored below 0.2." in messages
+    assert not any("http://a.com" in text for text in messages)
+    assert sum("high severity" in text for text in messages) == 1
+
+def test_take_action_never_skips_malicious_urls(caplog):
+    agent = ResponseAgent(Queue(), Queue())
+    agent.min_score = 0.5  # Above a decision threshold of e.g. 0.3
+    with caplog.at_level(logging.INFO, logger="ResponseAgent"):
+        agent.take_action({"http://a.com": "benign", "http://b.tk": "malicious"}, {"http://a.com": 0.1, "http://b.tk": 0.35})
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Blocked URL: http://b.tk (score 0.350)" in messages
+    assert "Skipped 1 benign URLs scored below 0.5." in messages
+
+def test_take_action_without_scores(caplog):
+    agent = ResponseAgent(Queue(), Queue())
+    with caplog.at_level(logging.INFO, logger="ResponseAgent"):
+        agent.take_action({"http://example.com": "malicious", "https://test.com": "benign"})
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Blocked URL: http://example.com" in messages
+    assert any(text.startswith("Alert sent for malicious URL (normal severity): http://example.com") for text in messages)
+    assert "URL is benign: https://test.com" in messages
+    assert not any(text.startswith("Skipped") for text in messages)
@@ -0,0 +1,26 @@
+# tests/test_scheduler.py
+
+import time
+from utils.scheduler import AdaptiveScheduler
+
+def test_intervals_adapt_to_churn():
+    scheduler = AdaptiveScheduler({"fast": 100, "static": 100}, min_interval=10, max_interval=1000, jitter=0.0)
+    start = time.monotonic()
+    assert sorted(scheduler.due(now=start)) == ["fast", "static"]
+    assert scheduler.due(now=start + 1) == []  # Provisionally scheduled one interval ahead
+
+    for now in range(0, 1000, 100):
+        scheduler.record("fast", 25, now=start + now)
+        scheduler.record("static", 0, now=start + now)
+    assert scheduler.sources["fast"]["interval"] == 10
+    assert scheduler.sources["static"]["interval"] == 1000
+    assert abs(scheduler.wait_time(now=start + 900) - 10) < 1e-6
+
+    times = scheduler.next_poll_times()
+    assert abs(times["static"]["next_poll"] - times["fast"]["next_poll"] - 990) < 1e-6
+    assert times["fast"]["polls"] == 10 and times["fast"]["last_new"] == 25
+
+def test_jitter_stays_within_bounds():
+    scheduler = AdaptiveScheduler({"feed": 100}, min_interval=100, max_interval=100, jitter=0.2)
+    waits = [scheduler.record("feed", 1, now=0) and scheduler.sources["feed"]["next_poll"] for _ in range(200)]
+    assert min(waits) >= 80 and max(waits) <= 120 and len(set(waits)) > 1
@@ -0,0 +1,45 @@
+# tests/test_seen_index.py
+
+import os
+from utils.seen_index import SeenURLIndex
+
+def test_filter_new_across_batches(tmp_path):
+    index = SeenURLIndex(str(tmp_path / "seen.sqlite"), capacity=1000, error_rate=0.01)
+    assert index.filter_new(["http://a.com", "http://b.com", "http://a.com"]) == ["http://a.com", "http://b.com"]
+    assert index.filter_new(["http://c.com", "http://b.com", "http://d.com"]) == ["http://c.com", "http://d.com"]
+    assert len(index) == 4
+    # Only URLs the Bloom filter reports as possibly seen reach SQLite
+    assert index.stats["db_lookups"] < 3
+
+def test_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "seen.sqlite")
+    index = SeenURLIndex(path, capacity=10000, error_rate=0.01)
+    urls = [f"http://example{i}.com/" for i in range(5000)]
+    index.filter_new(urls)
+    index.close()
+    assert os.path.exists(path + ".bloom.npz")
+
+    reopened = SeenURLIndex(path, capacity=10000, error_rate=0.01)
+    assert len(reopened) == 5000
+    assert reopened.filter_new(urls[::-1] + ["http://new.example/"]) == ["http://new.example/"]
+    reopened.connection.close()
+
+    # A filter saved with other settings (or none) is rebuilt from the database
+    os.remove(path + ".bloom.npz")
+    rebuilt = SeenURLIndex(path, capacity=20000, error_rate=0.001)
+    assert len(rebuilt) == 5001 and len(rebuilt.bloom) == 5001
+    assert rebuilt.filter_new(urls[:100]) == []
+    rebuilt.close()
+
+def test_unseen_records_nothing_until_marked(tmp_path):
+    index = SeenURLIndex(str(tmp_path / "seen.sqlite"), capacity=1000, error_rate=0.01)
+    urls = ["http://a.com", "http://b.com", "http://a.com"]
+    assert index.unseen(urls) == ["http://a.com", "http://b.com"]
+    assert index.unseen(urls) == ["http://a.com", "http://b.com"]
+    assert len(index) == 0
+
+    index.mark_seen(["http://a.com", "http://b.com"])
+    index.mark_seen(["http://b.com"])
+    assert len(index) == 2 and len(index.bloom) == 2
+    assert index.unseen(urls + ["http://c.com"]) == ["http://c.com"]
+    index.close()
@@ -0,0 +1,91 @@
+# tests/test_shared_ring.py
+
+import multiprocessing
+import time
+import pytest
+import numpy as np
+from utils.shared_ring import ArrayDescriptor, SharedArrayRing
+
+@pytest.fixture
+def ring():
+    ring = SharedArrayRing(slots=2, slot_bytes=1024)
+    yield ring
+    ring.close()
+
+def test_round_trip_is_zero_copy(ring):
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    descriptor = ring.write(array)
+    assert isinstance(descriptor, ArrayDescriptor)
+
+    view = ring.read(descriptor)
+    np.testing.assert_array_equal(view, array)
+    assert not view.flags.owndata
+    assert np.shares_memory(view, ring.read(descriptor))
+    del view
+    ring.release(descriptor)
+
+def test_oversized_array_is_rejected(ring):
+    assert ring.write(np.zeros((1024,), dtype=np.float32)) is None
+
+def test_full_ring_times_out_then_recovers(ring):
+    first = ring.write(np.ones(4))
+    ring.write(np.ones(4))
+    assert ring.write(np.ones(4), timeout=0.1) is None
+
+    ring.release(first)
+    assert ring.write(np.ones(4), timeout=1) is not None
+
+def read_in_child(ring, descriptor, results):
+    results.put(float(ring.read(descriptor).sum()))
+    ring.release(descriptor)
+
+def test_consumer_in_another_process(ring):
+    descriptor = ring.write(np.full((8, 8), 0.5, dtype=np.float32))
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=read_in_child, args=(ring, descriptor, results))
+    process.start()
+    process.join(timeout=10)
+
+    assert results.get(timeout=1) == 32.0
+    assert ring.free_slots.get(timeout=1) in (0, 1)
+
+def read_without_release(ring, descriptor):
+    ring.read(descriptor)
+
+def test_reclaim_slots_of_exited_consumer(ring):
+    descriptor = ring.write(np.ones(4))
+    process = multiprocessing.Process(target=read_without_release, args=(ring, descriptor))
+    process.start()
+    process.join(timeout=10)
+
+    ring.write(np.ones(4))
+    assert ring.write(np.ones(4), timeout=0.1) is None
+    assert ring.reclaim(process.pid) == 1
+    assert ring.write(np.ones(4), timeout=1).slot == descriptor.slot
+
+def test_classification_releases_slots_queued_after_shutdown(ring):
+    from agents.classification_agent import ClassificationAgent
+    from utils.batching import SHUTDOWN
+
+    inputs = multiprocessing.Queue()
+    agent = ClassificationAgent(inputs, multiprocessing.Queue(), transport=ring)
+    for _ in range(2):
+        inputs.put({"sender": "FeatureExtractionAgent", "data": {"urls": ["a"], "features": ring.write(np.zeros((1, 2)))}})
+    inputs.put(SHUTDOWN)  # Meant for a sibling replica
+    time.sleep(0.1)  # Let the feeder thread flush
+
+    agent.release_pending_features()
+    assert {ring.free_slots.get(timeout=1), ring.free_slots.get(timeout=1)} == {0, 1}
+    assert inputs.get(timeout=1) == SHUTDOWN
+
+def test_classification_reads_from_ring(ring):
+    from agents.classification_agent import ClassificationAgent
+
+    outputs = multiprocessing.Queue()
+    agent = ClassificationAgent(multiprocessing.Queue(), outputs, transport=ring)
+    descriptor = ring.write(np.zeros((3, 2), dtype=np.float32))
+    agent.receive_batch([{"sender": "FeatureExtractionAgent", "data": {"urls": ["a", "b", "c"], "features": descriptor}}])
+
+    assert list(outputs.get(timeout=1)["data"]["classifications"]) == ["benign"] * 3
+    slots = {ring.free_slots.get(timeout=1), ring.free_slots.get(timeout=1)}
+    assert slots == {0, 1}
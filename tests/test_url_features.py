@@ -0,0 +1,53 @@
+# tests/test_url_features.py
+
+import pytest
+import numpy as np
+from utils.url_features import LexicalFeatureExtractor
+
+@pytest.fixture
+def extractor():
+    return LexicalFeatureExtractor()
+
+def features_of(extractor, url):
+    return dict(zip(extractor.feature_names, extractor.transform([url])[0]))
+
+def test_transform_shape(extractor):
+    urls = ["http://example.com", "https://login.secure-bank.tk/verify", "ftp://10.0.0.1/file"]
+    features = extractor.transform(urls)
+    assert features.shape == (3, len(extractor.feature_names))
+    assert features.dtype == np.float32
+
+def test_structural_features(extractor):
+    features = features_of(extractor, "HTTPS://Login.Secure.Paypal.com.evil.tk:8080/Verify/account.php?id=1")
+    assert features["is_https"] == 1
+    assert features["has_port"] == 1
+    assert features["subdomain_depth"] == 4
+    assert features["suspicious_tld"] == 1
+    assert features["tld_length"] == 2
+    assert features["suspicious_keywords"] == 5
+    assert features["path_tokens"] == 5
+
+def test_ip_host(extractor):
+    features = features_of(extractor, "http://192.168.0.1/a")
+    assert features["is_ip_host"] == 1
+    assert features["subdomain_depth"] == 0
+    assert features["common_tld"] == 0
+
+def test_chunks_match_single_pass():
+    urls = [f"http://site{i}.com/{'x' * i}" for i in range(50)]
+    np.testing.assert_array_equal(LexicalFeatureExtractor(chunk_size=7).transform(urls),
+                                  LexicalFeatureExtractor().transform(urls))
+
+def test_empty_input(extractor):
+    assert extractor.transform([]).shape == (0, len(extractor.feature_names))
+
+def test_hashing_featurizer_is_stateless():
+    from utils.url_features import HashingURLFeaturizer
+
+    urls = ["http://example.com/login", "https://bank.tk/verify"]
+    first = HashingURLFeaturizer(n_features=2 ** 12).transform(urls)
+    second = HashingURLFeaturizer(n_features=2 ** 12).transform(urls[::-1])
+    assert first.shape == (2, 2 ** 12)
+    assert first.dtype == np.float32
+    assert (first[0] != second[1]).nnz == 0
+    np.testing.assert_allclose(np.asarray(first.multiply(first).sum(axis=1)).ravel(), 1.0, rtol=1e-5)
@@ -1,16 +1,17 @@
 from utils.model_helper import load_data, preprocess_data, evaluate_model, save_model
-from sklearn.ensemble import GradientBoostingClassifier
+from utils.model_backends import DEFAULT_MODEL_BACKEND, train_and_profile
+
+# Model backend: "hist_gradient_boosting", "gradient_boosting", "logistic_regression" or "sgd"
+MODEL_BACKEND = DEFAULT_MODEL_BACKEND
 
 # Load and preprocess data
 df = load_data('data/processed/cleaned_urls.csv')
 X_train, X_test, y_train, y_test = preprocess_data(df, 'target_column')
 
-# Initialize model
-model = GradientBoostingClassifier()
-
-# Train model
-print("Training the model...")
-model.fit(X_train, y_train)
+# Train model, reporting train time, prediction latency per 1k URLs and model size
+print(f"Training the model ({MODEL_BACKEND})...")
+model, profile = train_and_profile(MODEL_BACKEND, X_train, y_train, X_test)
+print(profile)
 
 # Evaluate the model
 evaluate_model(model, X_test, y_test)